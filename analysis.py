@@ -0,0 +1,134 @@
+from students import EXAM_SESSION
+
+BAND_LABELS = {'fcd': "Distinction", 'fc': "First Class", 'sc': "Second Class", 'p': "Pass Class"}
+BAND_PROJECTION = {'_id': 0, 'usn': 1, 'name': 1, 'percentage_float': 1}
+
+
+def band_row(student, label):
+    return {'usn': student['usn'], 'name': student['name'], 'marks': f"{student['percentage_float']:.2f}%",
+            'status': label}
+
+
+def band_rows(students, class_type):
+    label = BAND_LABELS[class_type]
+    result_list = [band_row(s, label) for s in students]
+    n = len(result_list)
+    return {'total': n, 'pass': n, 'fail': 0}, result_list
+
+
+def subject_stages(subject_code, session):
+    """Each student who sat `subject_code`, with just that subject."""
+    return [
+        {'$match': {'exam_session': session, 'subjects.code': subject_code}},
+        {'$project': {'_id': 0, 'usn': 1, 'name': 1, 'subject': {'$arrayElemAt': [
+            {'$filter': {'input': '$subjects', 'as': 'sub', 'cond': {'$eq': ['$$sub.code', subject_code]}}}, 0]}}},
+    ]
+
+
+FAILED_SUBJECT_STAGES = [
+    {'$match': {'subject.result': {'$ne': 'P'}}},
+    {'$sort': {'usn': 1}},
+    {'$project': {'usn': 1, 'name': 1, 'marks': '$subject.total', 'status': '$subject.result'}},
+]
+
+
+def subject_pipeline(subject_code, session=EXAM_SESSION):
+    return subject_stages(subject_code, session) + [
+        {'$facet': {
+            'stats': [{'$group': {'_id': None, 'total': {'$sum': 1},
+                                  'pass': {'$sum': {'$cond': [{'$eq': ['$subject.result', 'P']}, 1, 0]}}}}],
+            'failed': FAILED_SUBJECT_STAGES,
+        }},
+    ]
+
+
+def subject_rows(facet):
+    counts = facet['stats'][0] if facet['stats'] else {'total': 0, 'pass': 0}
+    stats = {'total': counts['total'], 'pass': counts['pass'], 'fail': counts['total'] - counts['pass']}
+    return stats, facet['failed']
+
+
+def graded_query(session):
+    """Results that were graded from subjects; summary-only uploads have no class band and are not counted."""
+    return {'exam_session': session, 'class_band': {'$ne': None}}
+
+
+def overall_pipeline(session=EXAM_SESSION):
+    return [
+        {'$match': {'exam_session': session, 'failed_count': {'$gt': 0}}},
+        {'$sort': {'usn': 1}},
+        {'$project': {'_id': 0, 'usn': 1, 'name': 1, 'failed': {'$filter': {
+            'input': '$subjects', 'as': 'sub', 'cond': {'$ne': ['$$sub.result', 'P']}}}}},
+    ]
+
+
+def overall_row(student):
+    return {'usn': student['usn'], 'name': student['name'],
+            'marks': ', '.join(f"{sub['code']} ({sub['total']})" for sub in student['failed']), 'status': 'FAIL'}
+
+
+def overall_rows(total, fail, failing):
+    result_list = [overall_row(s) for s in failing]
+    return {'total': total, 'pass': total - fail, 'fail': fail}, result_list
+
+
+def class_band_report(students_col, class_type, session=EXAM_SESSION):
+    """Students in one class band (written at fetch time), sorted by USN."""
+    if class_type not in BAND_LABELS:
+        return {'total': 0, 'pass': 0, 'fail': 0}, []
+    cursor = students_col.find({'exam_session': session, 'class_band': class_type}, BAND_PROJECTION).sort('usn', 1)
+    return band_rows(cursor, class_type)
+
+
+def subject_report(students_col, subject_code, session=EXAM_SESSION):
+    """Pass/fail counts for one subject, plus the students who did not pass it."""
+    facets = students_col.aggregate(subject_pipeline(subject_code, session))
+    return subject_rows(next(facets, {'stats': [], 'failed': []}))
+
+
+def overall_report(students_col, session=EXAM_SESSION):
+    """Pass/fail counts over all students, plus each failing student's failed subjects."""
+    total = students_col.count_documents(graded_query(session))
+    fail = students_col.count_documents({'exam_session': session, 'failed_count': {'$gt': 0}})
+    return overall_rows(total, fail, students_col.aggregate(overall_pipeline(session)))
+
+
+def analysis_report(students_col, subject_code, session=EXAM_SESSION):
+    """/analysis for one exam session; every query starts with exam_session so it stays on the compound indexes."""
+    if subject_code.startswith('class_'):
+        return class_band_report(students_col, subject_code.split('_')[1], session)
+    if subject_code and subject_code != 'overall':
+        return subject_report(students_col, subject_code, session)
+    return overall_report(students_col, session)
+
+
+def analysis_rows(students_col, subject_code, session=EXAM_SESSION):
+    """The rows of analysis_report(), streamed one at a time from a Mongo cursor (for /export)."""
+    if subject_code.startswith('class_'):
+        class_type = subject_code.split('_')[1]
+        if class_type not in BAND_LABELS: return
+        label = BAND_LABELS[class_type]
+        cursor = students_col.find({'exam_session': session, 'class_band': class_type}, BAND_PROJECTION).sort('usn', 1)
+        for s in cursor:
+            yield band_row(s, label)
+    elif subject_code and subject_code != 'overall':
+        yield from students_col.aggregate(subject_stages(subject_code, session) + FAILED_SUBJECT_STAGES)
+    else:
+        for s in students_col.aggregate(overall_pipeline(session)):
+            yield overall_row(s)
+
+
+async def async_analysis_report(students_col, subject_code, session=EXAM_SESSION):
+    """analysis_report() for a Motor collection (async_app)."""
+    if subject_code.startswith('class_'):
+        class_type = subject_code.split('_')[1]
+        if class_type not in BAND_LABELS:
+            return {'total': 0, 'pass': 0, 'fail': 0}, []
+        cursor = students_col.find({'exam_session': session, 'class_band': class_type}, BAND_PROJECTION).sort('usn', 1)
+        return band_rows(await cursor.to_list(None), class_type)
+    if subject_code and subject_code != 'overall':
+        facets = await students_col.aggregate(subject_pipeline(subject_code, session)).to_list(1)
+        return subject_rows(facets[0] if facets else {'stats': [], 'failed': []})
+    total = await students_col.count_documents(graded_query(session))
+    fail = await students_col.count_documents({'exam_session': session, 'failed_count': {'$gt': 0}})
+    return overall_rows(total, fail, await students_col.aggregate(overall_pipeline(session)).to_list(None))
@@ -0,0 +1,471 @@
+"""
+Asyncio variant of run_app: Quart + Motor + httpx.
+
+    VTU_URL=... MONGO_URI=... hypercorn async_app:app --bind 0.0.0.0:$PORT
+
+Serves the same captcha / fetch / leaderboard / analysis / ingestion
+routes. Captcha and result exchanges with VTU and all Mongo calls are
+awaited on one event loop, so a single process keeps hundreds of them in
+flight without a thread each. Only the Selenium fallback, the one-off
+loads of the in-memory views and result-cache misses run in worker
+threads. Batch jobs (/batch) stay on run_app.
+"""
+
+import os
+import time
+import uuid
+import json
+import asyncio
+from datetime import datetime, timezone
+from quart import Quart, Response, render_template, request, jsonify, session
+from motor.motor_asyncio import AsyncIOMotorClient
+from browser_pool import PoolExhausted
+from result_detector import PhaseTimer
+from result_parser import parse_result_page
+from page_archive import open_archive
+from result_cache import ResultCache, RESULT_REVALIDATE, fetched_iso
+from live_feed import LiveFeed, async_sse_stream, start_id
+from export import ANALYSIS_COLUMNS, EXPORT_FORMATS, LEADERBOARD_COLUMNS, export_columns, async_export_response
+from leaderboard import Leaderboard, session_page, session_rows
+from distribution import Distribution
+from rank_service import RankService
+from analysis import analysis_rows, async_analysis_report
+from response_cache import ResponseCache, async_cached_json
+from ingest import MAX_BODY_BYTES, SubmissionError, parse_submission, normalize_record, stored_versions, submit_denied, upsert_op
+from students import EXAM_SESSION, ensure_student_indexes, result_key, stamp_session, validate_usn
+from transcripts import record_transcripts
+from vtu_http_async import AsyncVTUHttpEngine, ThreadedEngine
+from vtu_selenium import SeleniumEngine
+
+app = Quart(__name__)
+app.secret_key = 'vtu_final_secret'
+# Compressed /submit_result bodies are capped here; ingest caps them again once inflated.
+app.config['MAX_CONTENT_LENGTH'] = MAX_BODY_BYTES
+
+# --- DATABASE CONNECTION ---
+MONGO_URI = os.environ.get('MONGO_URI', 'mongodb://127.0.0.1:27017/')
+MONGO_DB = os.environ.get('MONGO_DB', 'university_db')
+
+client = None
+db = None
+students_col = None
+page_archive = None
+db_connected = False
+
+async def connect_db():
+    global client, db, students_col, page_archive, db_connected
+    try:
+        print("🔄 Connecting to MongoDB...")
+        # One client for every attempt: it keeps reconnecting on its own, and a new one per retry would leak.
+        if client is None:
+            client = AsyncIOMotorClient(MONGO_URI, serverSelectionTimeoutMS=10000)
+        await client.admin.command('ping')
+        db = client[MONGO_DB]
+        students_col = db['students']
+        await ensure_indexes()
+        try:
+            page_archive = await asyncio.to_thread(open_archive, db.delegate)
+        except Exception as e:
+            print(f"⚠️ Page archive disabled: {str(e)}")
+        db_connected = True
+        print("✅ Database Connected Successfully!")
+        return True
+    except Exception as e:
+        db_connected = False
+        print(f"❌ DATABASE CONNECTION FAILED: {str(e)}")
+        return False
+
+async def ensure_indexes():
+    try:
+        await asyncio.to_thread(ensure_student_indexes, students_col.delegate)
+    except Exception as e:
+        print(f"⚠️ Could not create indexes: {str(e)}")
+
+# --- LEADERBOARD ---
+LEADERBOARD_PAGE_SIZE = 50
+LEADERBOARD_MAX_PAGE = 500
+leaderboard = Leaderboard()
+distribution = Distribution()
+rank_service = RankService()
+response_cache = ResponseCache()
+result_cache = ResultCache()
+live_feed = LiveFeed()
+
+async def ensure_loaded(view):
+    """Load an in-memory view once, on a worker thread over Motor's underlying pymongo collection."""
+    if not view.loaded and db_connected:
+        await asyncio.to_thread(view.load, students_col.delegate)
+
+async def record_cgpa(students):
+    """Stamp session keys and add each student's CGPA (record_transcripts on a worker thread)."""
+    for s in students:
+        stamp_session(s)
+    cgpa = await asyncio.to_thread(record_transcripts, db.delegate['transcripts'], students)
+    for s in students:
+        s.update(cgpa.get(s['usn'], {}))
+
+async def record_student(student_data, page_digest=None):
+    """Store a result fetched from VTU; `page_digest` is its archived page, which lets reparse.py rewrite it."""
+    await record_cgpa([student_data])
+    fetched_at = datetime.now(timezone.utc)
+    await students_col.update_one(result_key(student_data),
+                                  {'$set': {**student_data, 'fetched_at': fetched_at, 'page_digest': page_digest,
+                                            'source': 'vtu'}},
+                                  upsert=True)
+    delta = leaderboard.upsert(student_data)
+    distribution.upsert(student_data)
+    rank_service.upsert(student_data)
+    result_cache.put(student_data, fetched_at.timestamp())
+    response_cache.bump()
+    if delta: live_feed.publish(delta)
+
+async def record_students(students):
+    """Upsert many uploaded results in one unordered bulk write."""
+    if not students: return None
+    await record_cgpa(students)
+    extra = {'fetched_at': datetime.now(timezone.utc), 'page_digest': None, 'source': 'upload'}
+    result = await students_col.bulk_write([upsert_op(s, extra) for s in students], ordered=False)
+    # Summary-only uploads did not replace graded records; the views follow what was stored.
+    students = await asyncio.to_thread(stored_versions, students_col.delegate, students)
+    deltas = []
+    for s in students:
+        deltas.append(leaderboard.upsert(s))
+        distribution.upsert(s)
+        rank_service.upsert(s)
+        result_cache.discard(s['usn'])
+    response_cache.bump()
+    for delta in deltas:
+        if delta: live_feed.publish(delta)
+    return result
+
+# --- FETCH ENGINES ---
+FETCH_ENGINE = os.environ.get('FETCH_ENGINE', 'auto')
+engines = {'http': AsyncVTUHttpEngine(), 'selenium': ThreadedEngine(SeleniumEngine())}
+
+def engine_order():
+    if FETCH_ENGINE == 'auto':
+        return ['http', 'selenium']
+    return [FETCH_ENGINE]
+
+def client_token():
+    token = session.get('browser_token')
+    if token is None:
+        token = uuid.uuid4().hex
+        session['browser_token'] = token
+    return token
+
+@app.before_serving
+async def startup():
+    await connect_db()
+
+@app.after_serving
+async def shutdown():
+    for engine in engines.values():
+        await engine.close()
+    if client is not None:
+        client.close()
+
+# --- ROUTES ---
+
+@app.route('/')
+async def home():
+    return await render_template('index.html')
+
+@app.route('/get_captcha')
+async def get_captcha():
+    token = client_token()
+    try:
+        name, image, content_type = await load_captcha(token)
+        session['engine'] = name
+        return image, 200, {'Content-Type': content_type}
+    except PoolExhausted:
+        return "Server Busy", 503
+    except Exception as e:
+        return "Browser Error", 500
+
+@app.route('/leaderboard')
+@async_cached_json(response_cache)
+async def get_leaderboard():
+    if not db_connected: await connect_db()
+
+    sort_by = request.args.get('sort', 'total_marks')
+    order = request.args.get('order', 'desc')
+    prefix = request.args.get('q', '').strip()
+    fields = request.args.get('fields')
+    exam_session = request.args.get('session', EXAM_SESSION)
+
+    try:
+        limit = min(max(int(request.args.get('limit', LEADERBOARD_PAGE_SIZE)), 1), LEADERBOARD_MAX_PAGE)
+        offset = max(int(request.args.get('cursor') or 0), 0)
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'Invalid limit or cursor'})
+
+    try:
+        if exam_session == leaderboard.session:
+            await ensure_loaded(leaderboard)
+            rows, total = leaderboard.page(sort_by, order, offset, limit, prefix)
+        else:
+            rows, total = await asyncio.to_thread(session_page, students_col.delegate, exam_session,
+                                                  sort_by, order, offset, limit, prefix)
+        if fields:
+            wanted = set(fields.split(','))
+            rows = [{k: v for k, v in row.items() if k in wanted} for row in rows]
+        next_offset = offset + len(rows)
+        next_cursor = str(next_offset) if next_offset < total else None
+        return jsonify({'status': 'success', 'data': rows, 'total': total, 'next_cursor': next_cursor})
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)})
+
+@app.route('/analysis')
+@async_cached_json(response_cache)
+async def get_analysis():
+    if not db_connected: await connect_db()
+
+    subject_code = request.args.get('subject', 'overall')
+    exam_session = request.args.get('session', EXAM_SESSION)
+
+    try:
+        stats, result_list = await async_analysis_report(students_col, subject_code, exam_session)
+        return jsonify({'status': 'success', 'stats': stats, 'data': result_list})
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)})
+
+@app.route('/stats/distribution')
+async def get_distribution():
+    if not db_connected: await connect_db()
+
+    try:
+        await ensure_loaded(distribution)
+        return jsonify({'status': 'success', **distribution.snapshot()})
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)})
+
+# --- LIVE UPDATES ---
+# Streams are awaited on the event loop, so unlike run_app there is no cap on open streams.
+
+@app.route('/leaderboard/stream')
+async def leaderboard_stream():
+    last_id = start_id(live_feed, request.headers.get('Last-Event-ID') or request.args.get('since'))
+    resp = Response(async_sse_stream(live_feed, last_id), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    resp.timeout = None
+    return resp
+
+@app.route('/leaderboard/updates')
+async def leaderboard_updates():
+    last_id = start_id(live_feed, request.args.get('since'))
+    events = live_feed.since(last_id)
+    if events is None:
+        return jsonify({'status': 'success', 'resync': True, 'last_id': live_feed.last_id, 'events': []})
+    return jsonify({'status': 'success', 'resync': False, 'last_id': events[-1][0] if events else last_id,
+                    'events': [dict(json.loads(data), id=event_id) for event_id, data in events]})
+
+# --- EXPORT ---
+# Same as run_app: the pymongo cursor and spreadsheet writer run on worker threads, a chunk at a time.
+
+def export_format():
+    fmt = request.args.get('format', 'csv')
+    return fmt if fmt in EXPORT_FORMATS else None
+
+@app.route('/export/leaderboard')
+async def export_leaderboard():
+    if not db_connected: await connect_db()
+    if not db_connected:
+        return jsonify({'status': 'error', 'message': 'Database not connected'}), 503
+    fmt = export_format()
+    if fmt is None:
+        return jsonify({'status': 'error', 'message': f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+
+    sort_by = request.args.get('sort', 'total_marks')
+    order = request.args.get('order', 'desc')
+    prefix = request.args.get('q', '').strip()
+    exam_session = request.args.get('session', EXAM_SESSION)
+    columns = export_columns(LEADERBOARD_COLUMNS, request.args.get('fields'))
+
+    rank_of = None
+    if exam_session == leaderboard.session:
+        await ensure_loaded(leaderboard)
+        rank_of = leaderboard.rank_of
+    rows = session_rows(students_col.delegate, exam_session, sort_by, order, prefix, rank_of=rank_of)
+    return async_export_response(fmt, columns, rows, f"leaderboard_{exam_session}")
+
+@app.route('/export/analysis')
+async def export_analysis():
+    if not db_connected: await connect_db()
+    if not db_connected:
+        return jsonify({'status': 'error', 'message': 'Database not connected'}), 503
+    fmt = export_format()
+    if fmt is None:
+        return jsonify({'status': 'error', 'message': f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+
+    subject_code = request.args.get('subject', 'overall')
+    exam_session = request.args.get('session', EXAM_SESSION)
+    rows = analysis_rows(students_col.delegate, subject_code, exam_session)
+    return async_export_response(fmt, ANALYSIS_COLUMNS, rows, f"analysis_{exam_session}_{subject_code}")
+
+async def load_captcha(token):
+    """Load a fresh captcha for `token`, trying each configured engine. Returns (engine name, image, content type)."""
+    last_error = None
+    for name in engine_order():
+        try:
+            image, content_type = await engines[name].get_captcha(token)
+            return name, image, content_type
+        except PoolExhausted:
+            raise
+        except Exception as e:
+            print(f"❌ {name} engine could not load captcha: {e}")
+            last_error = e
+    raise last_error or RuntimeError("No fetch engine configured")
+
+async def archive_page(usn, html, parsed):
+    """Keep the raw result page so it can be re-parsed later (reparse.py) without VTU. Returns its digest."""
+    if page_archive is None: return None
+    try:
+        return await asyncio.to_thread(page_archive.put, usn, html, parsed, EXAM_SESSION)
+    except Exception as e:
+        print(f"⚠️ Could not archive page for {usn}: {str(e)}")
+        return None
+
+async def scrape_result(engine, token, usn, captcha_text, timer):
+    """Submit a solved captcha and store the parsed result. Returns (student_data, None) or (None, error message)."""
+    try:
+        outcome, payload = await engine.submit(token, usn, captcha_text, timer)
+        if outcome == 'expired':
+            return None, 'Session expired. Reload Captcha.'
+        if outcome == 'alert':
+            return None, f"VTU Says: {payload}"
+        if outcome == 'timeout':
+            return None, 'Result Window did not open. Reload Captcha.'
+
+        student_data = parse_result_page(payload, usn)
+        timer.mark('parse')
+        digest = await archive_page(usn, payload, student_data['name'] != "Unknown")
+        timer.mark('archive')
+        if student_data['name'] == "Unknown":
+            return None, 'Could not parse result.'
+
+        if db_connected:
+            await record_student(student_data, digest)
+        return student_data, None
+    finally:
+        await engine.release(token)
+
+refresh_tasks = set()   # running background refreshes, kept referenced until they finish
+
+async def revalidate_result(engine, token, usn, captcha_text):
+    """Re-fetch a stale stored result in the background with the captcha the client already solved."""
+    try:
+        _, error = await scrape_result(engine, token, usn, captcha_text, PhaseTimer())
+        if error: print(f"⚠️ Background refresh of {usn} failed: {error}")
+    except Exception as e:
+        print(f"⚠️ Background refresh of {usn} failed: {e}")
+    finally:
+        result_cache.end_refresh(usn)
+
+async def result_response(student_data, fetched_at, timer, cached=False, stale=False, refreshing=False):
+    ranks = None
+    if db_connected:
+        await ensure_loaded(rank_service)
+        ranks = rank_service.ranks(student_data['usn'])
+    if ranks is None:
+        ranks = {'uni_rank': "N/A", 'coll_rank': "N/A", 'branch_rank': "N/A"}
+    timer.mark('rank')
+    print(f"⏱️ {student_data['usn']} timings (ms): {timer.timings}")
+
+    return jsonify({'status': 'success', 'data': student_data, 'ranks': ranks, 'fetched_at': fetched_iso(fetched_at),
+                    'cached': cached, 'stale': stale, 'refreshing': refreshing, 'timings': timer.timings})
+
+@app.route('/fetch_result', methods=['POST'])
+async def fetch_result():
+    if not db_connected: await connect_db()
+
+    form = await request.form
+    usn = form['usn'].strip().upper()
+    captcha_text = form['captcha'].strip()
+
+    error = validate_usn(usn)
+    if error:
+        return jsonify({'status': 'error', 'message': error})
+
+    token = client_token()
+    engine = engines.get(session.get('engine'))
+
+    timer = PhaseTimer()
+    try:
+        # Same result cache as run_app: fresh stored results are served without VTU,
+        # stale ones (with RESULT_REVALIDATE) are served and refreshed in a background task.
+        cached = None
+        if db_connected and form.get('refresh') != '1':
+            cached = await asyncio.to_thread(result_cache.lookup, usn, students_col.delegate)
+            timer.mark('cache')
+        if cached is not None:
+            student_data, fetched_at = cached
+            fresh = result_cache.is_fresh(fetched_at)
+            if fresh or (RESULT_REVALIDATE and engine is not None):
+                refreshing = not fresh and result_cache.begin_refresh(usn)
+                if refreshing:
+                    # The refresh owns this VTU session now; the next /get_captcha starts a new one.
+                    session.pop('browser_token', None)
+                    task = asyncio.create_task(revalidate_result(engine, token, usn, captcha_text))
+                    refresh_tasks.add(task)
+                    task.add_done_callback(refresh_tasks.discard)
+                elif engine is not None:
+                    await engine.release(token)
+                return await result_response(student_data, fetched_at, timer, cached=True, stale=not fresh,
+                                             refreshing=refreshing)
+
+        if engine is None:
+            return jsonify({'status': 'error', 'message': 'Session expired. Reload Captcha.'})
+        student_data, error = await scrape_result(engine, token, usn, captcha_text, timer)
+        if error:
+            return jsonify({'status': 'error', 'message': error, 'timings': timer.timings})
+        return await result_response(student_data, time.time(), timer)
+
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': f'System Error: {str(e)}'})
+
+# --- INGESTION ---
+@app.route('/submit_result', methods=['POST'])
+async def submit_result():
+    if not db_connected: await connect_db()
+    if not db_connected:
+        return jsonify({'status': 'error', 'message': 'Database not connected'}), 503
+    denied = submit_denied(request.headers.get('X-Submit-Token'))
+    if denied:
+        return jsonify({'status': 'error', 'message': denied}), 403
+
+    try:
+        records = parse_submission(await request.get_data(), request.content_type, request.content_encoding)
+    except SubmissionError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    students, errors = {}, []
+    for index, raw in enumerate(records):
+        student_data, error = normalize_record(raw, validate_usn)
+        if error:
+            errors.append({'index': index, 'usn': raw.get('usn') if isinstance(raw, dict) else None, 'message': error})
+        else:
+            # Last one wins within a request, per result: two semesters of a USN are both kept.
+            students[tuple(result_key(stamp_session(student_data)).values())] = student_data
+
+    try:
+        result = await record_students(list(students.values()))
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': f'System Error: {str(e)}'}), 500
+
+    # 400 when no record could be stored, so a rejected upload is never mistaken for a stored one.
+    return jsonify({
+        'status': 'success' if students else 'error',
+        'accepted': len(students),
+        'upserted': result.upserted_count if result else 0,
+        'modified': result.modified_count if result else 0,
+        'errors': errors,
+    }), 200 if students else 400
+
+@app.route('/health')
+async def health_check():
+    return jsonify({'status': 'healthy', 'database_connected': db_connected})
+
+if __name__ == '__main__':
+    port = int(os.environ.get('PORT', 5001))
+    app.run(host='0.0.0.0', port=port)
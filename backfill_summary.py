@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+One-off backfill of the per-student summary fields
+(percentage_float, failed_count, failed_codes, class_band) for documents
+stored before fetch_result started writing them.
+
+    MONGO_URI=... python backfill_summary.py [--all]
+
+Without --all only documents missing class_band are touched.
+"""
+
+import os
+import sys
+from pymongo import MongoClient, UpdateOne
+from result_parser import summarize_result
+
+MONGO_URI = os.environ.get('MONGO_URI', 'mongodb://127.0.0.1:27017/')
+MONGO_DB = os.environ.get('MONGO_DB', 'university_db')
+BATCH_SIZE = 1000
+
+
+def backfill(students_col, everything=False):
+    query = {} if everything else {'class_band': {'$exists': False}}
+    projection = {'_id': 1, 'total_marks': 1, 'subjects': 1}
+    ops = []
+    updated = 0
+    for doc in students_col.find(query, projection):
+        summary = summarize_result({'total_marks': doc.get('total_marks', 0), 'subjects': doc.get('subjects', [])})
+        fields = {k: summary[k] for k in ('percentage_float', 'failed_count', 'failed_codes', 'class_band')}
+        ops.append(UpdateOne({'_id': doc['_id']}, {'$set': fields}))
+        if len(ops) == BATCH_SIZE:
+            updated += students_col.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        updated += students_col.bulk_write(ops, ordered=False).modified_count
+    return updated
+
+
+def main():
+    everything = '--all' in sys.argv[1:]
+    print("🔄 Connecting to MongoDB...")
+    students_col = MongoClient(MONGO_URI, serverSelectionTimeoutMS=10000)[MONGO_DB]['students']
+    updated = backfill(students_col, everything)
+    print(f"✅ Backfilled summary fields on {updated} students")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import os
+import re
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from result_detector import PhaseTimer
+
+# --- CONFIG ---
+BATCH_WORKERS = int(os.environ.get('BATCH_WORKERS', 8))
+CAPTCHAS_AHEAD = int(os.environ.get('BATCH_CAPTCHAS_AHEAD', 6))
+MAX_ATTEMPTS = int(os.environ.get('BATCH_MAX_ATTEMPTS', 3))
+MAX_BATCH_SIZE = 500
+
+RANGE_RE = re.compile(r'^([0-9A-Z]+?)(\d{3})\s*[-–]\s*(?:\1)?(\d{1,3})$')
+
+# Item states. 'loading' / 'ready' / 'submitting' only exist in memory; a
+# resumed job puts them back to 'queued'.
+QUEUED, LOADING, READY, SUBMITTING, DONE, FAILED = 'queued', 'loading', 'ready', 'submitting', 'done', 'failed'
+
+
+def parse_usn_range(spec):
+    """'1DB23CS001-120' or '1DB23CS001–1DB23CS120' -> ['1DB23CS001', ..., '1DB23CS120']."""
+    spec = spec.strip().upper()
+    m = RANGE_RE.match(spec)
+    if not m:
+        return [spec] if spec else []
+    prefix, start, end = m.group(1), int(m.group(2)), int(m.group(3))
+    if end < start:
+        raise ValueError("Range end is before range start")
+    if end - start + 1 > MAX_BATCH_SIZE:
+        raise ValueError(f"At most {MAX_BATCH_SIZE} USNs per batch")
+    return [f"{prefix}{n:03d}" for n in range(start, end + 1)]
+
+
+class BatchJob:
+    def __init__(self, job_id, usns, items=None, created_at=None):
+        self.id = job_id
+        self.usns = usns
+        self.created_at = created_at or time.time()
+        self.items = items or {usn: {'state': QUEUED, 'attempts': 0, 'error': None} for usn in usns}
+        # In-memory only: loaded captchas per USN -> (engine name, image, content type)
+        self.captchas = {}
+
+    def token(self, usn):
+        return f"batch-{self.id}-{usn}"
+
+    def progress(self):
+        counts = {}
+        for item in self.items.values():
+            counts[item['state']] = counts.get(item['state'], 0) + 1
+        return {
+            'id': self.id, 'total': len(self.usns), 'counts': counts,
+            'ready': [usn for usn in self.usns if self.items[usn]['state'] == READY],
+            'failed': {usn: self.items[usn]['error'] for usn in self.usns if self.items[usn]['state'] == FAILED},
+            'finished': all(self.items[u]['state'] in (DONE, FAILED) for u in self.usns),
+        }
+
+
+class BatchManager:
+    """Runs batch fetch jobs: keeps a few captchas pre-loaded per job and
+    submits each one as soon as the operator solves it.
+
+    `load_captcha(token)` returns (engine name, image, content type);
+    `submit(engine name, token, usn, captcha, timer)` returns (data, error).
+    Job state is mirrored to `jobs_col()` so an interrupted job can resume.
+    """
+
+    def __init__(self, load_captcha, submit, jobs_col):
+        self.load_captcha = load_captcha
+        self.submit = submit
+        self.jobs_col = jobs_col
+        self._lock = threading.RLock()
+        self._jobs = {}
+        self._executor = ThreadPoolExecutor(max_workers=BATCH_WORKERS, thread_name_prefix='batch')
+
+    # --- PERSISTENCE ---
+    def _save(self, job, usn=None):
+        col = self.jobs_col()
+        if col is None: return
+        try:
+            if usn is None:
+                col.replace_one({'_id': job.id}, {'_id': job.id, 'usns': job.usns, 'items': job.items,
+                                                  'created_at': job.created_at}, upsert=True)
+            else:
+                col.update_one({'_id': job.id}, {'$set': {f'items.{usn}': job.items[usn]}})
+        except Exception as e:
+            print(f"⚠️ Could not save batch job {job.id}: {e}")
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None: return job
+            col = self.jobs_col()
+            doc = col.find_one({'_id': job_id}) if col is not None else None
+            if doc is None: return None
+            for item in doc['items'].values():
+                if item['state'] not in (DONE, FAILED):
+                    item['state'] = QUEUED
+            job = BatchJob(doc['_id'], doc['usns'], doc['items'], doc.get('created_at'))
+            self._jobs[job_id] = job
+        self._fill(job)
+        return job
+
+    # --- JOB LIFECYCLE ---
+    def create(self, usns):
+        job = BatchJob(uuid.uuid4().hex[:12], usns)
+        with self._lock:
+            self._jobs[job.id] = job
+        self._save(job)
+        self._fill(job)
+        return job
+
+    def _set(self, job, usn, state, error=None, count_attempt=False):
+        with self._lock:
+            item = job.items[usn]
+            item['state'] = state
+            item['error'] = error
+            if count_attempt: item['attempts'] += 1
+        if state in (QUEUED, DONE, FAILED):
+            self._save(job, usn)
+
+    def _fill(self, job):
+        """Start loading captchas until CAPTCHAS_AHEAD are ready or loading."""
+        with self._lock:
+            in_flight = sum(1 for i in job.items.values() if i['state'] in (LOADING, READY))
+            for usn in job.usns:
+                if in_flight >= CAPTCHAS_AHEAD: break
+                if job.items[usn]['state'] == QUEUED:
+                    job.items[usn]['state'] = LOADING
+                    in_flight += 1
+                    self._executor.submit(self._load, job, usn)
+
+    def _load(self, job, usn):
+        try:
+            job.captchas[usn] = self.load_captcha(job.token(usn))
+            self._set(job, usn, READY)
+        except Exception as e:
+            self._retry_or_fail(job, usn, f"Captcha error: {e}")
+
+    def _retry_or_fail(self, job, usn, error):
+        job.captchas.pop(usn, None)
+        with self._lock:
+            attempts = job.items[usn]['attempts'] + 1
+        self._set(job, usn, QUEUED if attempts < MAX_ATTEMPTS else FAILED, error, count_attempt=True)
+        self._fill(job)
+
+    def captcha(self, job, usn):
+        return job.captchas.get(usn)
+
+    def solve(self, job, usn, captcha_text):
+        with self._lock:
+            if usn not in job.items or job.items[usn]['state'] != READY:
+                return False
+            job.items[usn]['state'] = SUBMITTING
+        self._executor.submit(self._submit, job, usn, captcha_text)
+        return True
+
+    def _submit(self, job, usn, captcha_text):
+        engine_name = job.captchas.pop(usn)[0]
+        try:
+            data, error = self.submit(engine_name, job.token(usn), usn, captcha_text, PhaseTimer())
+        except Exception as e:
+            data, error = None, f"System Error: {e}"
+        if error:
+            self._retry_or_fail(job, usn, error)
+        else:
+            self._set(job, usn, DONE)
+            self._fill(job)
+
+    def retry(self, job):
+        """Queue every failed USN again with a fresh attempt budget."""
+        with self._lock:
+            for usn in job.usns:
+                item = job.items[usn]
+                if item['state'] == FAILED:
+                    item.update(state=QUEUED, attempts=0, error=None)
+        self._save(job)
+        self._fill(job)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+/analysis Benchmark: Python loops vs MongoDB aggregation
+Seeds 1k / 10k / 100k synthetic students (bench/datagen.py, the same data
+the fake VTU serves) into a scratch database and times every analysis mode
+both ways. Run from the repo root:
+
+    MONGO_URI=mongodb://127.0.0.1:27017/ python bench/analysis_bench.py [1000 10000 100000]
+"""
+
+import os
+import sys
+import time
+import statistics
+from pymongo import MongoClient
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+from analysis import analysis_report
+from datagen import seed_collection
+
+MONGO_URI = os.environ.get('MONGO_URI', 'mongodb://127.0.0.1:27017/')
+BENCH_DB = os.environ.get('BENCH_DB', 'university_bench')
+SIZES = [1000, 10000, 100000]
+MODES = ['class_fcd', 'class_fc', 'class_sc', 'class_p', 'BCS502', 'overall']
+RUNS = 5
+
+
+# --- PREVIOUS IMPLEMENTATION (Python loops over whole documents) ---
+def python_report(students_col, subject_code):
+    stats = {'total': 0, 'pass': 0, 'fail': 0}
+    result_list = []
+    if subject_code.startswith('class_'):
+        students = list(students_col.find({}, {'_id': 0, 'usn': 1, 'name': 1, 'total_marks': 1, 'subjects': 1}))
+        class_type = subject_code.split('_')[1]
+        bands = {'fcd': (70, 1000, "Distinction"), 'fc': (60, 70, "First Class"),
+                 'sc': (50, 60, "Second Class"), 'p': (40, 50, "Pass Class")}
+        low, high, label = bands[class_type]
+        for s in students:
+            if any(sub['result'] != 'P' for sub in s['subjects']): continue
+            perc = (s.get('total_marks', 0) / 900) * 100
+            if low <= perc < high:
+                result_list.append({'usn': s['usn'], 'name': s['name'], 'marks': f"{perc:.2f}%", 'status': label})
+        result_list.sort(key=lambda x: x['usn'])
+        stats = {'total': len(result_list), 'pass': len(result_list), 'fail': 0}
+    elif subject_code != 'overall':
+        students = list(students_col.find({"subjects.code": subject_code}, {'_id': 0, 'usn': 1, 'name': 1, 'subjects': 1}))
+        stats['total'] = len(students)
+        for s in students:
+            sub = next((x for x in s['subjects'] if x['code'] == subject_code), None)
+            if sub['result'] == 'P':
+                stats['pass'] += 1
+            else:
+                stats['fail'] += 1
+                result_list.append({'usn': s['usn'], 'name': s['name'], 'marks': sub['total'], 'status': sub['result']})
+        result_list.sort(key=lambda x: x['usn'])
+    else:
+        students = list(students_col.find({}, {'_id': 0, 'usn': 1, 'name': 1, 'subjects': 1}))
+        stats['total'] = len(students)
+        for s in students:
+            failed = [f"{x['code']} ({x['total']})" for x in s['subjects'] if x['result'] != 'P']
+            if failed:
+                stats['fail'] += 1
+                result_list.append({'usn': s['usn'], 'name': s['name'], 'marks': ', '.join(failed), 'status': 'FAIL'})
+            else:
+                stats['pass'] += 1
+        result_list.sort(key=lambda x: x['usn'])
+    return stats, result_list
+
+
+def median_ms(fn, *args):
+    times = []
+    for _ in range(RUNS):
+        t = time.perf_counter()
+        out = fn(*args)
+        times.append((time.perf_counter() - t) * 1000)
+    return statistics.median(times), out
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or SIZES
+    col = MongoClient(MONGO_URI)[BENCH_DB]['students']
+
+    print(f"{'students':>9} {'mode':>10} {'python ms':>10} {'pipeline ms':>12} {'speedup':>8}")
+    for n in sizes:
+        seed_collection(col, n)
+        for mode in MODES:
+            py_ms, expected = median_ms(python_report, col, mode)
+            agg_ms, actual = median_ms(analysis_report, col, mode)
+            mark = "" if actual == expected else "  ❌ output differs"
+            print(f"{n:>9} {mode:>10} {py_ms:>10.1f} {agg_ms:>12.1f} {py_ms / agg_ms:>7.1f}x{mark}")
+    col.drop()
+
+
+if __name__ == "__main__":
+    main()
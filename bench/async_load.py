@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Concurrency load test: run_app (threads) vs async_app (event loop)
+Each virtual user loops GET /get_captcha -> POST /fetch_result against a
+running app that points at bench/fake_vtu.py, and the test reports
+completed exchanges per second plus p50/p99 latency.
+
+    python bench/fake_vtu.py --latency 0.5 &
+    VTU_URL=http://127.0.0.1:5999/index.php FETCH_ENGINE=http \\
+        gunicorn --workers 1 --threads 8 -b 127.0.0.1:5001 run_app:app &
+    VTU_URL=http://127.0.0.1:5999/index.php FETCH_ENGINE=http \\
+        hypercorn -b 127.0.0.1:5002 async_app:app &
+
+    python bench/async_load.py --target http://127.0.0.1:5001 --users 64 --duration 20
+    python bench/async_load.py --target http://127.0.0.1:5002 --users 64 --duration 20
+
+With 8 threads and 0.5s per VTU round trip the threaded app tops out near
+8 / (3 * 0.5) exchanges per second however many users wait; the async app
+keeps scaling with --users until the fake VTU or the CPU saturates.
+"""
+
+import time
+import asyncio
+import argparse
+import statistics
+import httpx
+
+CAPTCHA_TEXT = 'ABC123'
+
+
+def percentile(values, p):
+    if not values: return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+async def virtual_user(target, user, deadline, latencies, errors):
+    async with httpx.AsyncClient(base_url=target, timeout=120) as http:
+        n = 0
+        while time.monotonic() < deadline:
+            usn = f"1DB23CS{(user * 37 + n) % 1000:03d}"
+            n += 1
+            start = time.perf_counter()
+            try:
+                captcha = await http.get('/get_captcha')
+                if captcha.status_code != 200:
+                    errors.append(f"captcha {captcha.status_code}"); continue
+                resp = await http.post('/fetch_result', data={'usn': usn, 'captcha': CAPTCHA_TEXT, 'refresh': '1'})
+                body = resp.json()
+                if body.get('status') != 'success':
+                    errors.append(body.get('message')); continue
+            except httpx.HTTPError as e:
+                errors.append(type(e).__name__); continue
+            latencies.append(time.perf_counter() - start)
+
+
+async def run(target, users, duration):
+    latencies, errors = [], []
+    deadline = time.monotonic() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*(virtual_user(target, u, deadline, latencies, errors) for u in range(users)))
+    elapsed = time.perf_counter() - start
+    return latencies, errors, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Captcha + fetch load test")
+    parser.add_argument('--target', default='http://127.0.0.1:5001')
+    parser.add_argument('--users', type=int, nargs='+', default=[8, 32, 64])
+    parser.add_argument('--duration', type=float, default=20, help="seconds per user count")
+    args = parser.parse_args()
+
+    print(f"{'users':>6} {'done':>6} {'errors':>6} {'per sec':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for users in args.users:
+        latencies, errors, elapsed = asyncio.run(run(args.target, users, args.duration))
+        ms = [l * 1000 for l in latencies]
+        print(f"{users:>6} {len(ms):>6} {len(errors):>6} {len(ms) / elapsed:>8.1f} "
+              f"{percentile(ms, 50):>8.0f} {percentile(ms, 99):>8.0f}")
+        if errors:
+            print(f"       most common error: {statistics.mode(errors)}")
+
+
+if __name__ == "__main__":
+    main()
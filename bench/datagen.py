@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Synthetic student results for benchmarks and local development.
+
+    python bench/datagen.py 100000 --out students.jsonl.gz
+    MONGO_URI=mongodb://127.0.0.1:27017/ python bench/datagen.py 100000 --mongo university_bench
+
+Every student is derived from (seed, USN) alone, so the same USN always
+gets the same name and marks: the fake VTU renders a result page for any
+USN it is asked about, and the page parses back to exactly the document
+written here. Documents have the schema parse_result_page + record_student
+store (subjects, summary fields, class band).
+
+USNs are allocated roll number first, then branch, year and college,
+starting at 1DB23CS001, so the first 999 students are USNs the app accepts.
+"""
+
+import os
+import sys
+import gzip
+import json
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from result_parser import grade_result
+from students import EXAM_SESSION, ensure_student_indexes
+
+INDEX_PAGE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'selenium_debug.html')
+ANNOUNCED_ON = "2026-01-27"
+
+COLLEGES = ['1DB', '1RV', '1MS', '1BM', '1PE', '1NH', '1CR', '1SI', '1BI', '1DS', '1AY', '1RN', '1KS',
+            '1JS', '1CD', '1OX', '1EW', '1GA', '1VE', '1AM', '4SF', '4MT', '2SD', '3BR', '4NM']
+YEARS = ['23', '22', '24', '21']
+BRANCHES = ['CS', 'IS', 'AI', 'EC', 'ME', 'CV']
+ROLLS = 999
+MAX_STUDENTS = len(COLLEGES) * len(YEARS) * len(BRANCHES) * ROLLS
+
+# (code, name, kind); labs and projects are marked more generously than theory papers.
+SUBJECTS = [
+    ('BCS501', "SOFTWARE ENGINEERING &amp; PROJECT MANAGEMENT", 'theory'),
+    ('BCS502', "COMPUTER NETWORKS", 'theory'),
+    ('BCS503', "THEORY OF COMPUTATION", 'theory'),
+    ('BCSL504', "WEB TECHNOLOGY LAB", 'lab'),
+    ('BCS515C', "UNIX SYSTEM PROGRAMMING", 'theory'),
+    ('BCS586', "MINI PROJECT", 'lab'),
+    ('BRMK557', "RESEARCH METHODOLOGY AND IPR", 'theory'),
+    ('BESK508', "ENVIRONMENTAL STUDIES AND E-WASTE MANAGEMENT", 'theory'),
+]
+# (internal mean, external mean, spread) out of 50 each.
+MARKING = {'theory': (38, 31, 8), 'lab': (44, 38, 6)}
+ABSENT_RATE = 0.004
+SEMESTER = 5
+MIN_EXTERNAL = 18    # VTU needs 18/50 in the exam as well as 40/100 overall
+
+FIRST_NAMES = ['AARAV', 'ADITI', 'AKASH', 'ANANYA', 'ARJUN', 'ARSALAN', 'ASTITVA', 'BHAVANA', 'CHAITRA', 'DEEPAK',
+               'DIVYA', 'GANESH', 'HARSHA', 'ISHA', 'KARTHIK', 'KAVYA', 'KIRAN', 'LAKSHMI', 'MANOJ', 'MEGHANA',
+               'NAVEEN', 'NEHA', 'NIKHIL', 'POOJA', 'PRAJWAL', 'PRIYA', 'RAHUL', 'RAKSHITHA', 'ROHAN', 'SAHANA',
+               'SANJAY', 'SHREYA', 'SNEHA', 'SUHAS', 'TEJAS', 'VARUN', 'VIDYA', 'VINAY', 'YASHAS', 'ZOYA']
+LAST_NAMES = ['RAJ', 'KUMAR', 'SHARMA', 'REDDY', 'RAO', 'GOWDA', 'NAIK', 'HEGDE', 'SHETTY', 'PATIL', 'KHAN',
+              'IYER', 'BHAT', 'JOSHI', 'KULKARNI', 'MURTHY', 'PRASAD', 'S', 'M', 'N']
+
+
+def usn_for(i):
+    """The i-th synthetic USN (0-based)."""
+    if not 0 <= i < MAX_STUDENTS:
+        raise ValueError(f"At most {MAX_STUDENTS} synthetic students")
+    i, roll = divmod(i, ROLLS)
+    i, branch = divmod(i, len(BRANCHES))
+    college, year = divmod(i, len(YEARS))
+    return f"{COLLEGES[college]}{YEARS[year]}{BRANCHES[branch]}{roll + 1:03d}"
+
+
+def student_marks(usn, seed=42):
+    """(name, [(code, name, internal, external, result)]) for one USN, deterministic in (seed, usn)."""
+    rng = random.Random(f"{seed}:{usn}")
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+    ability = rng.gauss(0, 1)
+    rows = []
+    for code, subject_name, kind in SUBJECTS:
+        internal_mean, external_mean, spread = MARKING[kind]
+        internal = max(0, min(50, round(internal_mean + ability * spread * 0.6 + rng.gauss(0, 3))))
+        if rng.random() < ABSENT_RATE:
+            rows.append((code, subject_name, internal, 0, 'A'))
+            continue
+        external = max(0, min(50, round(external_mean + ability * spread + rng.gauss(0, spread * 0.6))))
+        passed = external >= MIN_EXTERNAL and internal + external >= 40
+        rows.append((code, subject_name, internal, external, 'P' if passed else 'F'))
+    return name, rows
+
+
+def make_student(usn, seed=42):
+    """The stored document for one USN, graded exactly as a scraped page would be."""
+    name, rows = student_marks(usn, seed)
+    subjects = [{'code': code, 'name': subject_name.replace('&amp;', '&'), 'total': str(internal + external),
+                 'result': result} for code, subject_name, internal, external, result in rows]
+    data = grade_result(usn, name, subjects)
+    data.update(exam_session=EXAM_SESSION, semester=SEMESTER)
+    return data
+
+
+def generate(n, seed=42, start=0):
+    for i in range(start, start + n):
+        yield make_student(usn_for(i), seed)
+
+
+def seed_collection(col, n, seed=42, batch_size=5000, drop=True):
+    """Fill `col` with n synthetic students and the app's indexes."""
+    if drop: col.drop()
+    batch = []
+    for doc in generate(n, seed):
+        batch.append(doc)
+        if len(batch) == batch_size:
+            col.insert_many(batch); batch = []
+    if batch: col.insert_many(batch)
+    ensure_student_indexes(col)
+
+
+# --- RESULT PAGES ---
+_PAGE_HEAD = None
+
+def _page_head():
+    global _PAGE_HEAD
+    if _PAGE_HEAD is None:
+        with open(INDEX_PAGE, encoding='utf-8') as f:
+            _PAGE_HEAD = f.read().split('<div class="row">\n    <div class="col-md-12">')[0]
+    return _PAGE_HEAD
+
+
+def _cell(text):
+    return f'\n        <div class="divTableCell">\n         {text}\n        </div>'
+
+
+def _row(cells):
+    return '\n       <div class="divTableRow">' + ''.join(_cell(c) for c in cells) + '\n       </div>'
+
+
+def render_result_page(usn, seed=42):
+    """A VTU result page for `usn`, laid out like selenium_debug.html / golden/result_pass.html."""
+    name, rows = student_marks(usn, seed)
+    table = [_row(f'<b>{h}</b>' for h in ("Subject Code", "Subject Name", "Internal Marks", "External Marks",
+                                          "Total", "Result", "Announced / Updated on"))]
+    for code, subject_name, internal, external, result in rows:
+        table.append(_row((code, subject_name, internal, external, internal + external, result, ANNOUNCED_ON)))
+    return _page_head() + f'''<div class="row">
+    <div class="col-md-12">
+     <table class="table" style="width:60%;">
+      <tr>
+       <td style="padding-left:0px;"><b>University Seat Number </b></td>
+       <td style="padding-left:15px;"><b> : {usn}</b></td>
+      </tr>
+      <tr>
+       <td style="padding-left:0px;"><b>Student Name</b></td>
+       <td style="padding-left:15px;"><b> :</b> {name}</td>
+      </tr>
+     </table>
+     <div style="text-align:center;padding:5px;"><b>Semester : {SEMESTER}</b></div>
+     <div class="divTable">
+      <div class="divTableBody">{''.join(table)}
+      </div>
+     </div>
+    </div>
+   </div>
+  </div>
+ </body>
+</html>
+'''
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic student results")
+    parser.add_argument('count', type=int, help=f"number of students (at most {MAX_STUDENTS})")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--out', help="write NDJSON here (.gz to compress)")
+    parser.add_argument('--mongo', metavar='DB', help="replace DB.students (MONGO_URI) instead")
+    args = parser.parse_args()
+
+    if args.mongo:
+        from pymongo import MongoClient
+        col = MongoClient(os.environ.get('MONGO_URI', 'mongodb://127.0.0.1:27017/'))[args.mongo]['students']
+        seed_collection(col, args.count, args.seed)
+        print(f"✅ Inserted {args.count} students into {args.mongo}.students")
+        return
+
+    opener = gzip.open if (args.out or '').endswith('.gz') else open
+    with (opener(args.out, 'wt', encoding='utf-8') if args.out else sys.stdout) as out:
+        for doc in generate(args.count, args.seed):
+            out.write(json.dumps(doc) + '\n')
+    if args.out:
+        print(f"✅ Wrote {args.count} students to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Fake VTU results site for load tests, built from the golden pages.
+
+    python bench/fake_vtu.py [--port 5999] [--latency 0.5] [--jitter 0.1] [--golden]
+
+Serves /index.php (form + Token + captcha link), the captcha image and
+/resultpage.php. Every captcha reads CAPTCHA_TEXT. A wrong captcha gets the
+"Invalid captcha code" alert page; a right one gets the result page
+bench/datagen.py renders for the submitted USN (golden/result_pass.html
+for every USN with --golden). Each response is delayed by --latency
+seconds (± --jitter) to stand in for VTU's response time. Point the app
+at it with VTU_URL=http://127.0.0.1:5999/index.php.
+"""
+
+import os
+import time
+import uuid
+import random
+import argparse
+import sys
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from datagen import render_result_page
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'golden')
+CAPTCHA_TEXT = 'ABC123'
+CAPTCHA_PNG = (b'\x89PNG\r\n\x1a\n\x00\x00\x00\rIHDR\x00\x00\x00\x01\x00\x00\x00\x01\x08\x06\x00\x00\x00\x1f'
+               b'\x15\xc4\x89\x00\x00\x00\rIDATx\x9cc\xf8\x0f\x00\x00\x01\x01\x00\x05\x18\xd8N\x00\x00\x00\x00IEND\xaeB`\x82')
+
+
+def golden(name):
+    with open(os.path.join(GOLDEN_DIR, name), 'rb') as f:
+        return f.read()
+
+
+class FakeVTU(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    latency = 0.0
+    jitter = 0.0
+    seed = None      # None: serve the golden result page for every USN
+    pages = {}
+    sessions = set()
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def _delay(self):
+        if self.latency or self.jitter:
+            time.sleep(max(0.0, self.latency + random.uniform(-self.jitter, self.jitter)))
+
+    def _session(self):
+        for part in self.headers.get('Cookie', '').split(';'):
+            name, _, value = part.strip().partition('=')
+            if name == 'PHPSESSID':
+                with self.lock:
+                    if value in self.sessions: return value
+        return None
+
+    def _send(self, body, content_type='text/html; charset=UTF-8', cookie=None):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        if cookie:
+            self.send_header('Set-Cookie', f"PHPSESSID={cookie}; path=/")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._delay()
+        path = self.path.split('?')[0]
+        if path.endswith('index.php'):
+            sid = self._session()
+            if sid is None:
+                sid = uuid.uuid4().hex
+                with self.lock:
+                    self.sessions.add(sid)
+            self._send(self.pages['index'], cookie=sid)
+        elif 'captcha' in path:
+            self._send(CAPTCHA_PNG, 'image/png')
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        form = parse_qs(self.rfile.read(length).decode('utf-8'))
+        self._delay()
+        if not self.path.split('?')[0].endswith('resultpage.php'):
+            self.send_error(404); return
+        ok = self._session() is not None and form.get('captchacode', [''])[0] == CAPTCHA_TEXT and form.get('Token')
+        if not ok:
+            self._send(self.pages['invalid'])
+        elif self.seed is None:
+            self._send(self.pages['result'])
+        else:
+            self._send(render_result_page(form.get('lns', [''])[0].strip().upper(), self.seed).encode('utf-8'))
+
+
+class FakeVTUServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def serve(port=5999, latency=0.0, jitter=0.0, seed=42):
+    """Bind the fake site (port 0 picks a free one); call serve_forever() on the result."""
+    FakeVTU.latency = latency
+    FakeVTU.jitter = jitter
+    FakeVTU.seed = seed
+    FakeVTU.pages = {'index': golden('index_page.html'), 'result': golden('result_pass.html'),
+                     'invalid': golden('invalid_captcha.html')}
+    return FakeVTUServer(('127.0.0.1', port), FakeVTU)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake VTU results site")
+    parser.add_argument('--port', type=int, default=5999)
+    parser.add_argument('--latency', type=float, default=0.5, help="seconds added to every response")
+    parser.add_argument('--jitter', type=float, default=0.0, help="random ± seconds on top of --latency")
+    parser.add_argument('--seed', type=int, default=42, help="datagen seed for the synthetic result pages")
+    parser.add_argument('--golden', action='store_true', help="serve golden/result_pass.html for every USN")
+    args = parser.parse_args()
+    server = serve(args.port, args.latency, args.jitter, None if args.golden else args.seed)
+    print(f"✅ Fake VTU on http://127.0.0.1:{args.port}/index.php (latency {args.latency}s)")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
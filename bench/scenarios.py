@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark scenarios for the parse, fetch, leaderboard and analysis paths
+Seeds a scratch database with bench/datagen.py students, starts
+bench/fake_vtu.py on a free port, points run_app at both and drives it
+in-process with the Flask test client from --concurrency threads. Each
+scenario reports completed operations per second and p50/p99 latency:
+
+    parse        parse_result_page on synthetic result pages (no app, no DB)
+    fetch        GET /get_captcha + POST /fetch_result through the HTTP engine
+    leaderboard  /leaderboard pages with mixed sorts, cursors and USN searches
+    analysis     /analysis for every class band, a subject and 'overall'
+
+    MONGO_URI=mongodb://127.0.0.1:27017/ python bench/scenarios.py --students 100000
+    python bench/scenarios.py --scenario parse --requests 20000
+
+--cold empties the response cache before every request so leaderboard and
+analysis numbers measure the views and pipelines rather than cache hits.
+bench/async_load.py covers the same fetch path over real sockets.
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import itertools
+import threading
+from collections import Counter
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+from datagen import usn_for, seed_collection, render_result_page, ROLLS
+from fake_vtu import serve, CAPTCHA_TEXT
+from result_parser import parse_result_page
+
+MONGO_URI = os.environ.get('MONGO_URI', 'mongodb://127.0.0.1:27017/')
+BENCH_DB = os.environ.get('BENCH_DB', 'university_bench')
+ANALYSIS_MODES = ['class_fcd', 'class_fc', 'class_sc', 'class_p', 'BCS502', 'overall']
+LEADERBOARD_SORTS = ['total_marks', 'sgpa', 'name']
+
+
+def percentile(values, p):
+    if not values: return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def run_load(op, requests, concurrency, make_client=lambda: None):
+    """Call op(client, i) for i in range(requests) from `concurrency` threads.
+
+    op returns None on success or an error string. Returns (latencies in
+    seconds, errors, elapsed seconds).
+    """
+    latencies, errors = [], []
+    counter = itertools.count()
+
+    def worker():
+        client = make_client()
+        while True:
+            i = next(counter)
+            if i >= requests: return
+            start = time.perf_counter()
+            try:
+                error = op(client, i)
+            except Exception as e:
+                error = type(e).__name__
+            if error: errors.append(error)
+            else: latencies.append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads: t.start()
+    for t in threads: t.join()
+    return latencies, errors, time.perf_counter() - start
+
+
+def report(name, latencies, errors, elapsed):
+    ms = [l * 1000 for l in latencies]
+    print(f"{name:>12} {len(ms):>7} {len(errors):>6} {len(ms) / elapsed:>9.1f} "
+          f"{percentile(ms, 50):>8.2f} {percentile(ms, 99):>8.2f}")
+    if errors:
+        print(f"{'':>12} most common error: {Counter(errors).most_common(1)[0][0]}")
+
+
+# --- SCENARIOS ---
+def scenario_parse(app, args):
+    pages = [(usn, render_result_page(usn, args.seed))
+             for usn in (usn_for(i) for i in range(min(args.students, args.requests)))]
+
+    def op(_, i):
+        usn, html = pages[i % len(pages)]
+        return None if parse_result_page(html, usn)['name'] != "Unknown" else 'unparsed'
+    # parse_result_page is pure Python; more threads only measure the GIL.
+    return run_load(op, args.requests, 1)
+
+
+def scenario_fetch(app, args):
+    # Only the first ROLLS USNs (1DB23CS001-999) pass validate_usn.
+    def op(client, i):
+        captcha = client.get('/get_captcha')
+        if captcha.status_code != 200: return f"captcha {captcha.status_code}"
+        # refresh=1 skips the result cache, so every request measures a real (fake-)VTU fetch.
+        form = {'usn': usn_for(i % ROLLS), 'captcha': CAPTCHA_TEXT, 'refresh': '1'}
+        body = client.post('/fetch_result', data=form).get_json()
+        return None if body['status'] == 'success' else body.get('message')
+    return run_load(op, args.requests, args.concurrency, app.app.test_client)
+
+
+def scenario_leaderboard(app, args):
+    pages = max(len(app.leaderboard) // app.LEADERBOARD_PAGE_SIZE, 1)
+
+    def op(client, i):
+        rng = random.Random(i)
+        params = {'sort': rng.choice(LEADERBOARD_SORTS), 'order': rng.choice(['desc', 'asc'])}
+        if rng.random() < 0.1:
+            params['q'] = usn_for(rng.randrange(args.students))[:rng.randint(3, 8)]
+        else:
+            # Most readers stay on the first few pages.
+            params['cursor'] = str(min(int(rng.expovariate(0.5)), pages - 1) * app.LEADERBOARD_PAGE_SIZE)
+        if args.cold: app.response_cache.bump()
+        body = client.get('/leaderboard', query_string=params).get_json()
+        return None if body['status'] == 'success' else body.get('message')
+    return run_load(op, args.requests, args.concurrency, app.app.test_client)
+
+
+def scenario_analysis(app, args):
+    def op(client, i):
+        if args.cold: app.response_cache.bump()
+        body = client.get('/analysis', query_string={'subject': ANALYSIS_MODES[i % len(ANALYSIS_MODES)]}).get_json()
+        return None if body['status'] == 'success' else body.get('message')
+    return run_load(op, args.requests, args.concurrency, app.app.test_client)
+
+
+SCENARIOS = {'parse': scenario_parse, 'fetch': scenario_fetch,
+             'leaderboard': scenario_leaderboard, 'analysis': scenario_analysis}
+
+
+# --- SETUP ---
+def start_app(args):
+    """Seed the bench DB, start the fake VTU and import run_app against both."""
+    from pymongo import MongoClient
+    start = time.perf_counter()
+    seed_collection(MongoClient(MONGO_URI)[args.db]['students'], args.students, args.seed)
+    print(f"🌱 Seeded {args.students} students into {args.db} in {time.perf_counter() - start:.1f}s")
+
+    vtu = serve(0, args.latency, 0.0, args.seed)
+    threading.Thread(target=vtu.serve_forever, daemon=True).start()
+    os.environ.update({'MONGO_URI': MONGO_URI, 'MONGO_DB': args.db, 'FETCH_ENGINE': 'http',
+                       'VTU_URL': f"http://127.0.0.1:{vtu.server_address[1]}/index.php"})
+
+    start = time.perf_counter()
+    import run_app
+    if not run_app.db_ready.wait(30):
+        raise SystemExit("❌ run_app could not connect to MongoDB")
+    while run_app.startup_phases['views'] != 'ready':
+        time.sleep(0.05)
+    print(f"📦 run_app imported and views loaded in {time.perf_counter() - start:.1f}s")
+    return run_app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline parse / fetch / leaderboard / analysis benchmarks")
+    parser.add_argument('--scenario', nargs='+', choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument('--students', type=int, default=10000, help="synthetic students to seed (10k-500k)")
+    parser.add_argument('--requests', type=int, default=2000, help="operations per scenario")
+    parser.add_argument('--concurrency', type=int, default=8, help="client threads (gunicorn runs 8)")
+    parser.add_argument('--latency', type=float, default=0.05, help="fake VTU seconds per response")
+    parser.add_argument('--cold', action='store_true', help="bypass the response cache")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--db', default=BENCH_DB, help="scratch database (dropped afterwards)")
+    parser.add_argument('--keep', action='store_true', help="keep the scratch database")
+    args = parser.parse_args()
+
+    app = start_app(args) if set(args.scenario) - {'parse'} else None
+    print(f"{'scenario':>12} {'done':>7} {'errors':>6} {'per sec':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    try:
+        for name in args.scenario:
+            report(name, *SCENARIOS[name](app, args))
+    finally:
+        if app is not None and not args.keep:
+            app.students_col.database.client.drop_database(args.db)
+
+
+if __name__ == "__main__":
+    main()
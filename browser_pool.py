@@ -0,0 +1,243 @@
+import os
+import time
+import tempfile
+import threading
+import subprocess
+from metrics import BROWSER_STARTS, BROWSER_RESTARTS
+
+# --- CONFIG ---
+POOL_SIZE = int(os.environ.get('BROWSER_POOL_SIZE', 4))
+IDLE_TIMEOUT = int(os.environ.get('BROWSER_IDLE_TIMEOUT', 180))
+LEASE_WAIT = int(os.environ.get('BROWSER_LEASE_WAIT', 30))
+REAP_INTERVAL = 15
+
+
+def kill_stale_drivers():
+    """Kill chromedriver processes left behind by a previous worker."""
+    try:
+        subprocess.run(["pkill", "-f", "chromedriver"], check=False)
+    except:
+        pass
+
+
+def create_driver():
+    # Selenium is imported on first use so the web app can start (and answer /health) without it.
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
+    print("🔵 Initializing Invisible Browser...")
+    chrome_options = Options()
+    chrome_options.add_argument("--headless=new")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--window-size=1920,1080")
+
+    prefs = {"profile.default_content_setting_values.popups": 1}
+    chrome_options.add_experimental_option("prefs", prefs)
+    chrome_options.add_argument("--disable-popup-blocking")
+
+    if os.environ.get('CHROME_BIN'):
+        chrome_options.binary_location = os.environ.get('CHROME_BIN')
+    else:
+        chrome_options.binary_location = "/usr/bin/chromium"
+
+    user_data_dir = tempfile.mkdtemp()
+    chrome_options.add_argument(f"--user-data-dir={user_data_dir}")
+
+    try:
+        driver = webdriver.Chrome(options=chrome_options)
+        print("✅ Browser Started Successfully")
+    except Exception as e:
+        print(f"❌ Browser Error: {e}")
+        chrome_options.binary_location = None
+        driver = webdriver.Chrome(options=chrome_options)
+    BROWSER_STARTS.inc()
+    return driver
+
+
+def quit_driver(driver):
+    try: driver.quit()
+    except: pass
+
+
+def is_healthy(driver):
+    try:
+        driver.current_url
+        return True
+    except:
+        return False
+
+
+class PoolExhausted(Exception):
+    pass
+
+
+class BrowserPool:
+    """Bounded pool of headless browsers, each leased to one client token.
+
+    A lease lives from /get_captcha until /fetch_result releases it (or until
+    it sits idle for `idle_timeout` seconds). Released browsers are kept warm
+    for reuse and quit once they have been idle for the same period.
+
+    The lock only guards the bookkeeping: browsers are taken out of it first,
+    and health checks, window cleanup and quitting run without it, so one
+    hung Chromium never blocks the other leases.
+    """
+
+    def __init__(self, max_size=POOL_SIZE, idle_timeout=IDLE_TIMEOUT, lease_wait=LEASE_WAIT):
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.lease_wait = lease_wait
+        self._cond = threading.Condition()
+        self._leases = {}   # token -> [driver, last_used]
+        self._idle = []     # [driver, released_at]
+        self._size = 0
+        self._reaper = None
+
+    def start_reaper(self):
+        if self._reaper is None:
+            self._reaper = threading.Thread(target=self._reap_loop, daemon=True)
+            self._reaper.start()
+
+    def _reap_loop(self):
+        while True:
+            time.sleep(REAP_INTERVAL)
+            try: self.reclaim_idle()
+            except Exception as e: print(f"❌ Browser pool reaper error: {e}")
+
+    def lease(self, token):
+        """Return the browser leased to `token`, leasing a new one if needed."""
+        deadline = time.monotonic() + self.lease_wait
+        while True:
+            driver = expired = None
+            with self._cond:
+                entry = self._leases.get(token)
+                if entry is not None:
+                    entry[1] = time.monotonic()
+                    return entry[0]
+                if self._idle:
+                    driver = self._idle.pop()[0]
+                elif self._size < self.max_size:
+                    self._size += 1
+                    break
+                else:
+                    now = time.monotonic()
+                    expired = self._expire_locked(now)
+                    if not any(expired):
+                        remaining = deadline - now
+                        if remaining <= 0:
+                            raise PoolExhausted("All browser sessions are busy")
+                        # Wake up when a release frees a browser or the oldest lease can be reclaimed.
+                        oldest = min(last_used for _, last_used in self._leases.values()) if self._leases else now
+                        self._cond.wait(min(remaining, REAP_INTERVAL, oldest + self.idle_timeout - now))
+                        continue
+
+            if expired is not None:
+                # Whoever reclaimed a browser gets it first, so waiting callers are not starved.
+                for driver in self._recycle(*expired, keep=1):
+                    return self._assign(token, driver)
+            elif is_healthy(driver):
+                return self._assign(token, driver)
+            else:
+                self._recycle([driver], [])
+
+        # Slot reserved; start the browser outside the lock.
+        try:
+            driver = create_driver()
+        except Exception:
+            with self._cond:
+                self._size -= 1
+                self._cond.notify()
+            raise
+        return self._assign(token, driver)
+
+    def _assign(self, token, driver):
+        """Lease `driver` to `token`, unless a concurrent lease() for the same token won; then idle it."""
+        with self._cond:
+            entry = self._leases.setdefault(token, [driver, time.monotonic()])
+            if entry[0] is not driver:
+                self._idle.append([driver, time.monotonic()])
+                self._cond.notify()
+            return entry[0]
+
+    def get(self, token):
+        """Return the browser already leased to `token`, or None."""
+        with self._cond:
+            entry = self._leases.get(token)
+            if entry is None: return None
+            entry[1] = time.monotonic()
+            return entry[0]
+
+    def release(self, token):
+        with self._cond:
+            entry = self._leases.pop(token, None)
+        if entry is None: return
+        self._recycle([entry[0]], [])
+
+    def discard(self, token):
+        """Quit the browser leased to `token` (e.g. after a crash)."""
+        with self._cond:
+            entry = self._leases.pop(token, None)
+            if entry is None: return
+            self._size -= 1
+            self._cond.notify()
+        BROWSER_RESTARTS.inc()
+        quit_driver(entry[0])
+
+    def reclaim_idle(self):
+        with self._cond:
+            expired = self._expire_locked(time.monotonic())
+        self._recycle(*expired)
+
+    def _expire_locked(self, now):
+        """Take leases and idle browsers unused for `idle_timeout` out of the pool.
+
+        Returns (released, stale) for _recycle(); both still count towards the pool size until then.
+        """
+        released = []
+        for token, (driver, last_used) in list(self._leases.items()):
+            if now - last_used > self.idle_timeout:
+                del self._leases[token]
+                released.append(driver)
+        stale = [driver for driver, released_at in self._idle if now - released_at > self.idle_timeout]
+        self._idle = [entry for entry in self._idle if now - entry[1] <= self.idle_timeout]
+        return released, stale
+
+    def _recycle(self, released, stale, keep=0):
+        """Idle the healthy `released` browsers and quit the dead ones and the `stale` idle ones.
+
+        Called without the lock: every step here talks to a browser. Up to `keep`
+        healthy browsers are returned to the caller instead of being idled.
+        """
+        healthy = []
+        for driver in released:
+            if is_healthy(driver):
+                _close_extra_windows(driver)
+                healthy.append(driver)
+            else:
+                BROWSER_RESTARTS.inc()
+                quit_driver(driver)
+        for driver in stale:
+            quit_driver(driver)
+        kept, healthy = healthy[:keep], healthy[keep:]
+        with self._cond:
+            now = time.monotonic()
+            self._idle.extend([driver, now] for driver in healthy)
+            self._size -= len(released) - len(kept) - len(healthy) + len(stale)
+            self._cond.notify_all()
+        return kept
+
+    def stats(self):
+        with self._cond:
+            return {'size': self._size, 'leased': len(self._leases),
+                    'idle': len(self._idle), 'max_size': self.max_size}
+
+
+def _close_extra_windows(driver):
+    try:
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+    except: pass
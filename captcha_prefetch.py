@@ -0,0 +1,118 @@
+import os
+import time
+import uuid
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+# --- CONFIG ---
+PREFETCH_SIZE = int(os.environ.get('CAPTCHA_PREFETCH', 4))
+# Must stay under the engines' idle timeouts (HTTP_SESSION_IDLE_TIMEOUT / BROWSER_IDLE_TIMEOUT, 180s).
+PREFETCH_MAX_AGE = int(os.environ.get('CAPTCHA_PREFETCH_MAX_AGE', 120))
+# Stop refilling after this long without a /get_captcha, so an idle app does not keep polling VTU.
+PREFETCH_IDLE = int(os.environ.get('CAPTCHA_PREFETCH_IDLE', 600))
+CHECK_INTERVAL = 5
+MAX_BACKOFF = 60
+
+
+class CaptchaPrefetcher:
+    """Keeps `size` captchas loaded ahead of time, each in its own engine session.
+
+    `load_captcha(token)` returns (engine name, image, content type);
+    `release(engine name, token)` frees a session that was never handed out.
+    take() hands over the oldest ready captcha together with its token, so
+    the client can submit against that session directly. Captchas older
+    than `max_age` are released and replaced before VTU can expire them.
+    """
+
+    def __init__(self, load_captcha, release, size=PREFETCH_SIZE, max_age=PREFETCH_MAX_AGE, idle=PREFETCH_IDLE):
+        self.load_captcha = load_captcha
+        self.release = release
+        self.size = size
+        self.max_age = max_age
+        self.idle = idle
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._ready = deque()     # (token, engine name, image, content type, loaded_at), oldest first
+        self._loading = 0
+        self._last_take = time.monotonic()
+        self._backoff = 0
+        self._retry_at = 0.0
+        self._executor = None
+        self.hits = 0
+        self.misses = 0
+
+    def start(self):
+        """Start the refill thread (once); a no-op when prefetching is disabled."""
+        with self._lock:
+            if self._executor is not None or self.size <= 0: return
+            self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix='captcha-prefetch')
+        threading.Thread(target=self._run, name='captcha-prefetch', daemon=True).start()
+
+    def take(self):
+        """The oldest fresh captcha as (token, engine name, image, content type), or None."""
+        now = time.monotonic()
+        entry = None
+        with self._lock:
+            self._last_take = now
+            while self._ready:
+                candidate = self._ready.popleft()
+                if now - candidate[4] <= self.max_age:
+                    entry = candidate
+                    break
+                self._discard(candidate)
+            if entry is None: self.misses += 1
+            else: self.hits += 1
+        self._wake.set()
+        return entry[:4] if entry else None
+
+    def stats(self):
+        with self._lock:
+            return {'size': self.size, 'ready': len(self._ready), 'loading': self._loading,
+                    'hits': self.hits, 'misses': self.misses}
+
+    # --- REFILL ---
+    def _discard(self, entry):
+        try: self.release(entry[1], entry[0])
+        except Exception as e: print(f"⚠️ Could not release prefetched captcha: {e}")
+
+    def _run(self):
+        while True:
+            self._expire()
+            self._fill()
+            self._wake.wait(CHECK_INTERVAL)
+            self._wake.clear()
+
+    def _expire(self):
+        now = time.monotonic()
+        with self._lock:
+            stale = []
+            while self._ready and now - self._ready[0][4] > self.max_age:
+                stale.append(self._ready.popleft())
+        for entry in stale:
+            self._discard(entry)
+
+    def _fill(self):
+        now = time.monotonic()
+        with self._lock:
+            if now < self._retry_at or now - self._last_take > self.idle: return
+            missing = self.size - len(self._ready) - self._loading
+            self._loading += max(missing, 0)
+        for _ in range(missing):
+            self._executor.submit(self._load)
+
+    def _load(self):
+        token = uuid.uuid4().hex
+        try:
+            name, image, content_type = self.load_captcha(token)
+        except Exception as e:
+            with self._lock:
+                self._loading -= 1
+                self._backoff = min(max(self._backoff * 2, 1), MAX_BACKOFF)
+                self._retry_at = time.monotonic() + self._backoff
+            print(f"⚠️ Captcha prefetch failed, retrying in {self._backoff}s: {e}")
+            return
+        with self._lock:
+            self._loading -= 1
+            self._backoff = 0
+            self._ready.append((token, name, image, content_type, time.monotonic()))
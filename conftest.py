@@ -0,0 +1,102 @@
+"""
+Shared pytest fixtures.
+
+Tests that need MongoDB run against TEST_MONGO_URI (a local server by
+default) in a throwaway database, and are skipped when no server answers:
+
+    TEST_MONGO_URI=mongodb://127.0.0.1:27017/ pytest
+"""
+
+import os
+import tempfile
+import pytest
+import pymongo
+from pymongo.errors import PyMongoError
+from grading import class_band
+from students import EXAM_SESSION
+
+TEST_MONGO_URI = os.environ.get('TEST_MONGO_URI', 'mongodb://127.0.0.1:27017/')
+TEST_MONGO_DB = 'college_rank_test'
+# A connection diagnostic for deployments (python test_mongodb.py), not a test.
+collect_ignore = ['test_mongodb.py']
+
+# run_app and its modules read their configuration at import time.
+os.environ.update({
+    'MONGO_URI': TEST_MONGO_URI,
+    'MONGO_DB': TEST_MONGO_DB,
+    'PAGE_ARCHIVE': 'local',
+    'PAGE_ARCHIVE_DIR': tempfile.mkdtemp(prefix='page_archive_'),
+    'CAPTCHA_PREFETCH': '0',
+    'SUBMIT_TOKEN': 'test-token',
+})
+
+
+# --- IN-MEMORY VIEWS ---
+class FakeStudents:
+    """The students_col.find() the in-memory views call from load()."""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection=None):
+        return [dict(d) for d in self.docs if all(d.get(k) == v for k, v in query.items())]
+
+
+def make_result(usn, total_marks, semester=5, session=EXAM_SESSION, name='A', sgpa_float=None):
+    """A stored result with the summary fields the views read."""
+    percentage = total_marks / 9
+    sgpa_float = round(total_marks / 90, 2) if sgpa_float is None else sgpa_float
+    return {'usn': usn, 'exam_session': session, 'semester': semester, 'name': name, 'total_marks': total_marks,
+            'sgpa': f"{sgpa_float:.2f}", 'sgpa_float': sgpa_float, 'percentage': f"{percentage:.2f}%",
+            'percentage_float': percentage, 'class_band': class_band(percentage, 0)}
+
+
+@pytest.fixture
+def result():
+    """make_result(usn, total_marks, semester=5, session=EXAM_SESSION, name='A', sgpa_float=None)."""
+    return make_result
+
+
+@pytest.fixture
+def students():
+    """FakeStudents(docs): a collection to load() the in-memory views from."""
+    return FakeStudents
+
+
+# --- MONGODB ---
+@pytest.fixture
+def db():
+    """An empty test database."""
+    client = pymongo.MongoClient(TEST_MONGO_URI, serverSelectionTimeoutMS=1000)
+    try:
+        client.admin.command('ping')
+    except PyMongoError:
+        pytest.skip(f"no MongoDB at {TEST_MONGO_URI}")
+    client.drop_database(TEST_MONGO_DB)
+    yield client[TEST_MONGO_DB]
+    client.drop_database(TEST_MONGO_DB)
+
+
+@pytest.fixture
+def app(db, monkeypatch):
+    """run_app connected to the empty test database, with fresh in-memory views."""
+    import run_app
+    from leaderboard import Leaderboard
+    from distribution import Distribution
+    from rank_service import RankService
+    from result_cache import ResultCache
+    from live_feed import LiveFeed
+
+    if not run_app.db_ready.wait(10):
+        pytest.skip("run_app could not connect to the test database")
+    run_app.ensure_indexes()
+    run_app.page_archive.ensure_indexes()
+    for name, view in (('leaderboard', Leaderboard()), ('distribution', Distribution()),
+                       ('rank_service', RankService()), ('result_cache', ResultCache()), ('live_feed', LiveFeed())):
+        monkeypatch.setattr(run_app, name, view)
+    # Loaded up front, as on startup, so every stored result updates them and publishes its delta.
+    for view in (run_app.leaderboard, run_app.distribution, run_app.rank_service):
+        view.load(run_app.students_col)
+    # The routes are bound to the app's response cache; a new version drops what earlier tests cached.
+    run_app.response_cache.bump()
+    return run_app
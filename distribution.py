@@ -0,0 +1,85 @@
+import threading
+from grading import CLASS_BANDS
+from students import EXAM_SESSION, in_session, superseded
+
+BANDS = [band for _, band in CLASS_BANDS] + ['fail']
+PERCENTAGE_BIN_WIDTH = 10   # 0-10%, 10-20%, ... 90-100%
+SGPA_BIN_WIDTH = 1          # 0-1, 1-2, ... 9-10
+HISTOGRAM_BINS = 10
+
+
+def _bin(value, width):
+    try:
+        return min(max(int(float(value) // width), 0), HISTOGRAM_BINS - 1)
+    except (TypeError, ValueError):
+        return 0
+
+
+class Distribution:
+    """Class-band counts and percentage / SGPA histograms over every student in one exam session.
+
+    Loaded once from Mongo, then each upsert moves the student from its old
+    buckets to its new ones, so snapshot() never touches the database. Each
+    USN is counted once, with its latest semester in the session; results
+    without a class band (summary-only uploads) are not counted.
+    """
+
+    def __init__(self, session=EXAM_SESSION):
+        self.session = session
+        self._lock = threading.Lock()
+        self._entries = {}    # usn -> (band, percentage bin, sgpa bin)
+        self._semesters = {}  # usn -> semester of that entry
+        self._bands = dict.fromkeys(BANDS, 0)
+        self._percentage = [0] * HISTOGRAM_BINS
+        self._sgpa = [0] * HISTOGRAM_BINS
+        self.loaded = False
+
+    @staticmethod
+    def _entry(student):
+        band = student.get('class_band')
+        if band is None: return None   # summary-only upload: not graded, so not counted
+        return (band if band in BANDS else 'fail',
+                _bin(student.get('percentage_float', 0), PERCENTAGE_BIN_WIDTH),
+                _bin(student.get('sgpa_float', 0), SGPA_BIN_WIDTH))
+
+    def _count(self, entry, delta):
+        band, pct_bin, sgpa_bin = entry
+        self._bands[band] += delta
+        self._percentage[pct_bin] += delta
+        self._sgpa[sgpa_bin] += delta
+
+    def load(self, students_col):
+        with self._lock:
+            if self.loaded: return
+            projection = {'_id': 0, 'usn': 1, 'semester': 1, 'class_band': 1, 'percentage_float': 1, 'sgpa_float': 1}
+            for student in students_col.find({'exam_session': self.session}, projection):
+                if 'usn' in student: self._set(student)
+            self.loaded = True
+            print(f"✅ Distribution loaded ({len(self._entries)} students)")
+
+    def upsert(self, student):
+        with self._lock:
+            # Not loaded yet: the next load() reads this student from Mongo.
+            if not self.loaded or not in_session(student, self.session): return
+            self._set(student)
+
+    def _set(self, student):
+        if superseded(student, self._semesters): return
+        old = self._entries.pop(student['usn'], None)
+        if old is not None: self._count(old, -1)
+        self._semesters[student['usn']] = student.get('semester')
+        entry = self._entry(student)
+        if entry is None: return
+        self._entries[student['usn']] = entry
+        self._count(entry, 1)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'total': len(self._entries),
+                'bands': dict(self._bands),
+                'percentage_histogram': [{'from': i * PERCENTAGE_BIN_WIDTH, 'to': (i + 1) * PERCENTAGE_BIN_WIDTH, 'count': n}
+                                         for i, n in enumerate(self._percentage)],
+                'sgpa_histogram': [{'from': i * SGPA_BIN_WIDTH, 'to': (i + 1) * SGPA_BIN_WIDTH, 'count': n}
+                                   for i, n in enumerate(self._sgpa)],
+            }
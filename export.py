@@ -0,0 +1,102 @@
+import io
+import csv
+import asyncio
+import tempfile
+from flask import Response
+
+# --- CONFIG ---
+EXPORT_CHUNK_ROWS = 500          # CSV rows per response chunk
+FILE_CHUNK_BYTES = 64 * 1024     # XLSX bytes per response chunk
+LEADERBOARD_COLUMNS = ('rank', 'usn', 'name', 'total_marks', 'sgpa', 'percentage')
+ANALYSIS_COLUMNS = ('usn', 'name', 'marks', 'status')
+FORMULA_PREFIXES = ('=', '+', '-', '@')
+
+# XLSX needs the optional `xlsxwriter` package; CSV always works.
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+
+def cell(value):
+    """A CSV value that spreadsheets will not run as a formula (names come from uploads too).
+
+    Text starting with = + - or @ gets a leading apostrophe; numbers, including
+    negative ones, are left alone. XLSX cells need no prefix: xlsx_chunks turns
+    off xlsxwriter's formula detection instead.
+    """
+    if isinstance(value, str) and value[:1] in FORMULA_PREFIXES:
+        try:
+            float(value)
+        except ValueError:
+            return "'" + value
+    return value
+
+
+def export_columns(columns, fields=None):
+    """`columns` narrowed to the comma-separated `fields` (same parameter as /leaderboard), in column order."""
+    if not fields: return columns
+    wanted = set(fields.split(','))
+    return tuple(c for c in columns if c in wanted) or columns
+
+
+def csv_chunks(columns, rows, name=None):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    for i, row in enumerate(rows, start=1):
+        writer.writerow([cell(row.get(c, '')) for c in columns])
+        if i % EXPORT_CHUNK_ROWS == 0:
+            yield buf.getvalue()
+            buf.seek(0); buf.truncate()
+    yield buf.getvalue()
+
+
+def xlsx_chunks(columns, rows, name='Sheet1'):
+    """One worksheet written in xlsxwriter's constant_memory mode (each row is flushed to
+    disk as it is written), then streamed back from the temporary file."""
+    with tempfile.TemporaryFile() as f:
+        # Text is always written as text: never as a formula or a hyperlink.
+        workbook = xlsxwriter.Workbook(f, {'constant_memory': True, 'strings_to_numbers': True,
+                                           'strings_to_formulas': False, 'strings_to_urls': False})
+        sheet = workbook.add_worksheet(name[:31])
+        sheet.write_row(0, 0, columns, workbook.add_format({'bold': True}))
+        for i, row in enumerate(rows, start=1):
+            sheet.write_row(i, 0, [row.get(c, '') for c in columns])
+        workbook.close()
+        f.seek(0)
+        while True:
+            chunk = f.read(FILE_CHUNK_BYTES)
+            if not chunk: break
+            yield chunk
+
+
+EXPORT_FORMATS = {'csv': ('text/csv; charset=utf-8', csv_chunks)}
+if xlsxwriter is not None:
+    EXPORT_FORMATS['xlsx'] = ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', xlsx_chunks)
+
+
+def export_chunks(fmt, columns, rows, name):
+    content_type, writer = EXPORT_FORMATS[fmt]
+    headers = {'Content-Disposition': f'attachment; filename="{name}.{fmt}"', 'Cache-Control': 'no-store'}
+    return content_type, headers, writer(columns, rows, name)
+
+
+def export_response(fmt, columns, rows, name):
+    """A chunked download of `rows` (an iterator of dicts, e.g. over a Mongo cursor)."""
+    content_type, headers, chunks = export_chunks(fmt, columns, rows, name)
+    return Response(chunks, content_type=content_type, headers=headers)
+
+
+def async_export_response(fmt, columns, rows, name):
+    """export_response() for Quart (async_app): the blocking writer runs on a worker thread, a chunk at a time."""
+    from quart import Response as AsyncResponse
+
+    content_type, headers, chunks = export_chunks(fmt, columns, rows, name)
+
+    async def stream():
+        while True:
+            chunk = await asyncio.to_thread(next, chunks, None)
+            if chunk is None: break
+            yield chunk
+    return AsyncResponse(stream(), content_type=content_type, headers=headers)
@@ -0,0 +1,142 @@
+import os
+import json
+from bisect import bisect_right
+from functools import lru_cache
+
+# --- CONFIG ---
+CREDITS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'credits')
+DEFAULT_SCHEME = os.environ.get('GRADING_SCHEME', '2022_cs_5')
+# Credit tables are named <scheme year>_<branch>_<semester>, e.g. 2022_cs_5.
+SCHEME_YEAR = os.environ.get('GRADING_SCHEME_YEAR', '2022')
+
+# Grade point for marks out of 100: below GRADE_CUTOFFS[0] is 0, then one
+# step up at every cutoff (40 -> 4, 50 -> 5, 55 -> 6, ... 90 -> 10).
+GRADE_CUTOFFS = [40, 50, 55, 60, 70, 80, 90]
+GRADE_POINTS = [0, 4, 5, 6, 7, 8, 9, 10]
+
+# (minimum percentage, band) for students who passed every subject.
+CLASS_BANDS = [(70, 'fcd'), (60, 'fc'), (50, 'sc'), (40, 'p')]
+CLASS_LABELS = {'fcd': "First Class with Distinction", 'fc': "First Class", 'sc': "Second Class",
+                'p': "Pass Class", 'fail': "Fail"}
+
+
+def grade_point(marks):
+    try:
+        m = int(marks)
+    except (TypeError, ValueError):
+        return 0
+    if m < 0 or m > 100: return 0
+    return GRADE_POINTS[bisect_right(GRADE_CUTOFFS, m)]
+
+
+def class_band(percentage, failed_count):
+    if failed_count: return 'fail'
+    for cutoff, band in CLASS_BANDS:
+        if percentage >= cutoff: return band
+    return 'fail'
+
+
+class GradingScheme:
+    """Subject credits for one scheme / branch / semester (credits/<name>.json)."""
+
+    def __init__(self, name, credits, max_marks=900, semester=None):
+        self.name = name
+        self.max_marks = max_marks
+        self.semester = semester
+        self._table = {code.upper(): c for code, c in credits.items()}
+        self._resolved = dict(self._table)   # every code seen so far -> credits
+
+    def credits(self, sub_code):
+        code = sub_code.upper().strip()
+        found = self._resolved.get(code)
+        if found is None:
+            # Decorated codes ("BCS501 (R)") take the first table code they contain.
+            found = next((c for table_code, c in self._table.items() if table_code in code), 0)
+            self._resolved[code] = found
+        return found
+
+
+@lru_cache(maxsize=None)
+def load_scheme(name=None):
+    name = name or DEFAULT_SCHEME
+    with open(os.path.join(CREDITS_DIR, f"{name}.json"), encoding='utf-8') as f:
+        table = json.load(f)
+    return GradingScheme(name, table['credits'], table.get('max_marks', 900), table.get('semester'))
+
+
+def scheme_name_for(usn, semester):
+    """The credit table for a student's branch and semester if there is one, else GRADING_SCHEME."""
+    return _scheme_name(usn[5:7].lower(), semester)
+
+
+@lru_cache(maxsize=None)
+def _scheme_name(branch, semester):
+    if semester is not None and branch:
+        name = f"{SCHEME_YEAR}_{branch}_{semester}"
+        if os.path.exists(os.path.join(CREDITS_DIR, f"{name}.json")): return name
+    return DEFAULT_SCHEME
+
+
+def _marks_array(np, values):
+    try:
+        return np.fromiter(map(int, values), dtype=np.int64, count=len(values))
+    except (TypeError, ValueError):
+        def to_int(v):
+            try: return int(v)
+            except (TypeError, ValueError): return 0
+        return np.fromiter(map(to_int, values), dtype=np.int64, count=len(values))
+
+
+def grade_batch(docs, scheme=None):
+    """Grade many students at once. `docs` is a list of {'subjects': [...]}.
+
+    Returns a dict of NumPy arrays, one entry per doc: total_marks,
+    sgpa_float, percentage_float, failed_count, has_credits, class_band and
+    class_result. Matches grade_result() for every stored student.
+    """
+    import numpy as np   # only the batch path needs NumPy
+
+    scheme = scheme or load_scheme()
+    n = len(docs)
+    counts = np.fromiter((len(d.get('subjects') or []) for d in docs), dtype=np.int64, count=n)
+    student = np.repeat(np.arange(n), counts)
+    subjects = [sub for d in docs for sub in (d.get('subjects') or [])]
+    m = len(subjects)
+
+    # Credits are looked up once per distinct subject code, then gathered.
+    code_ids = {}
+    code_idx = np.fromiter((code_ids.setdefault(sub['code'], len(code_ids)) for sub in subjects),
+                           dtype=np.int64, count=m)
+    credits = np.array([scheme.credits(c) for c in code_ids] or [0], dtype=np.int64)[code_idx]
+    marks = _marks_array(np, [sub['total'] for sub in subjects])
+    failed = np.fromiter((sub['result'] != 'P' for sub in subjects), dtype=bool, count=m)
+
+    points = np.array(GRADE_POINTS, dtype=np.int64)[np.searchsorted(GRADE_CUTOFFS, marks, side='right')]
+    points[(marks < 0) | (marks > 100)] = 0
+
+    credit_sum = np.bincount(student, weights=credits, minlength=n)
+    gp_sum = np.bincount(student, weights=credits * points, minlength=n)
+    total_marks = np.bincount(student, weights=marks, minlength=n).astype(np.int64)
+    failed_count = np.bincount(student, weights=failed, minlength=n).astype(np.int64)
+
+    has_credits = credit_sum > 0
+    sgpa = np.divide(gp_sum, credit_sum, out=np.zeros(n), where=has_credits)
+    percentage = (total_marks / scheme.max_marks) * 100
+
+    # Same bands as class_band(); index 0 ('fail') is below the lowest cutoff.
+    ascending = [cutoff for cutoff, _ in reversed(CLASS_BANDS)]
+    bands = np.array(['fail'] + [b for _, b in reversed(CLASS_BANDS)], dtype=object)
+    labels = np.array([CLASS_LABELS[b] for b in bands], dtype=object)
+    band_idx = np.searchsorted(ascending, percentage, side='right')
+    band_idx[failed_count > 0] = 0
+    # class_result counts as 0% when no subject carried credits, and is "N/A" with no subjects.
+    result_idx = np.searchsorted(ascending, np.where(has_credits, percentage, 0.0), side='right')
+    result_idx[failed_count > 0] = 0
+    class_result = labels[result_idx]
+    class_result[counts == 0] = "N/A"
+    band = bands[band_idx]
+    band[counts == 0] = None
+
+    return {'total_marks': total_marks, 'sgpa_float': sgpa, 'percentage_float': percentage,
+            'failed_count': failed_count, 'has_credits': has_credits,
+            'class_band': band, 'class_result': class_result}
@@ -0,0 +1,165 @@
+import os
+import hmac
+import json
+import zlib
+from pymongo import UpdateOne
+from grading import load_scheme, scheme_name_for
+from result_parser import grade_result, summarize_result
+from students import result_key
+
+MAX_SUBMIT_RECORDS = 1000
+MAX_BODY_BYTES = 16 * 1024 * 1024
+# Uploads need X-Submit-Token to match SUBMIT_TOKEN; SUBMIT_OPEN=1 accepts any client instead.
+SUBMIT_TOKEN = os.environ.get('SUBMIT_TOKEN')
+SUBMIT_OPEN = os.environ.get('SUBMIT_OPEN') == '1'
+SUBJECT_FIELDS = ('code', 'name', 'total', 'result')
+# VTU subject results: pass, fail, absent, withheld, not eligible (X / NE).
+SUBJECT_RESULTS = ('P', 'F', 'A', 'W', 'X', 'NE')
+
+
+class SubmissionError(Exception):
+    pass
+
+
+def submit_denied(token):
+    """Why an upload sending X-Submit-Token `token` is refused, or None if it may proceed."""
+    if SUBMIT_OPEN: return None
+    if not SUBMIT_TOKEN: return "Uploads are disabled: SUBMIT_TOKEN is not set"
+    if not hmac.compare_digest((token or '').encode(), SUBMIT_TOKEN.encode()):
+        return "Invalid submit token"
+    return None
+
+
+def decompress_body(body, content_encoding):
+    if content_encoding != 'gzip':
+        return body
+    inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    try:
+        data = inflater.decompress(body, MAX_BODY_BYTES)
+    except zlib.error as e:
+        raise SubmissionError(f"Invalid gzip body: {e}")
+    if inflater.unconsumed_tail:
+        raise SubmissionError("Decompressed body too large")
+    return data
+
+
+def parse_submission(body, content_type, content_encoding=None):
+    """Decode a JSON object, a JSON array or NDJSON (one object per line) into a list of records.
+
+    Bodies sent with Content-Encoding: gzip are inflated first.
+    """
+    try:
+        text = decompress_body(body, content_encoding).decode('utf-8')
+    except UnicodeDecodeError:
+        raise SubmissionError("Body is not UTF-8")
+    try:
+        if 'ndjson' in (content_type or ''):
+            records = [json.loads(line) for line in text.splitlines() if line.strip()]
+        else:
+            records = json.loads(text)
+    except ValueError as e:
+        raise SubmissionError(f"Invalid JSON: {e}")
+    if isinstance(records, dict):
+        records = [records]
+    if not isinstance(records, list):
+        raise SubmissionError("Expected a JSON object, an array or NDJSON")
+    if len(records) > MAX_SUBMIT_RECORDS:
+        raise SubmissionError(f"At most {MAX_SUBMIT_RECORDS} results per request")
+    return records
+
+
+def normalize_record(raw, validate_usn):
+    """Validate one submitted result and rebuild the stored fields from its subjects.
+
+    Returns (student_data, None) or (None, error message). Client-sent
+    SGPA / percentage / class values are ignored and recomputed.
+    """
+    if not isinstance(raw, dict):
+        return None, "Result must be an object"
+    usn = str(raw.get('usn', '')).strip().upper()
+    error = validate_usn(usn)
+    if error:
+        return None, error
+    name = str(raw.get('name', '')).strip()
+    if not name or name == "Unknown":
+        return None, "Missing student name"
+    keys, error = session_keys(raw)
+    if error:
+        return None, error
+    scheme = load_scheme(scheme_name_for(usn, keys.get('semester')))
+
+    subjects = raw.get('subjects')
+    if subjects is None:
+        # Summary-only upload (older local_scraper): name and total marks.
+        try:
+            total_marks = int(raw.get('total_marks'))
+        except (TypeError, ValueError):
+            return None, "Missing subjects or total_marks"
+        if not 0 <= total_marks <= scheme.max_marks:
+            return None, f"total_marks must be between 0 and {scheme.max_marks}"
+        data = grade_result(usn, name, [], scheme)
+        data['total_marks'] = total_marks
+        data['percentage'] = "{:.2f}%".format((total_marks / scheme.max_marks) * 100)
+        return dict(summarize_result(data, scheme), **keys), None
+
+    if not isinstance(subjects, list) or not subjects:
+        return None, "subjects must be a non-empty list"
+    cleaned = []
+    for sub in subjects:
+        if not isinstance(sub, dict) or any(k not in sub for k in SUBJECT_FIELDS):
+            return None, f"Each subject needs {', '.join(SUBJECT_FIELDS)}"
+        sub = {k: str(sub[k]).strip() for k in SUBJECT_FIELDS}
+        sub['result'] = sub['result'].upper()
+        # grade_result() silently drops subjects whose total is not a number.
+        if not sub['total'].isdigit():
+            return None, f"{sub['code']}: total must be a whole number"
+        if sub['result'] not in SUBJECT_RESULTS:
+            return None, f"{sub['code']}: result must be one of {', '.join(SUBJECT_RESULTS)}"
+        cleaned.append(sub)
+    return dict(grade_result(usn, name, cleaned, scheme), **keys), None
+
+
+def session_keys(raw):
+    """The optional exam_session / semester of a submitted result; the server fills in missing ones."""
+    keys = {}
+    if raw.get('exam_session') is not None:
+        keys['exam_session'] = str(raw['exam_session']).strip()
+        if not keys['exam_session']:
+            return None, "exam_session must not be empty"
+    if raw.get('semester') is not None:
+        try:
+            keys['semester'] = int(raw['semester'])
+        except (TypeError, ValueError):
+            return None, "semester must be a number"
+        if not 1 <= keys['semester'] <= 8:
+            return None, "semester must be between 1 and 8"
+    return keys, None
+
+
+# --- STORAGE ---
+def is_summary(student):
+    """A summary-only upload: name and total marks, no subjects to grade."""
+    return not student.get('subjects')
+
+
+def upsert_op(student, extra):
+    """The UpdateOne that stores one result (plus `extra` fields such as fetched_at).
+
+    A summary-only upload never overwrites a graded record: it only updates
+    the name of an existing one, and stores its summary fields when new.
+    """
+    key = result_key(student)
+    doc = {**student, **extra}
+    if not is_summary(student):
+        return UpdateOne(key, {'$set': doc}, upsert=True)
+    on_insert = {k: v for k, v in doc.items() if k != 'name' and k not in key}
+    return UpdateOne(key, {'$set': {'name': doc['name']}, '$setOnInsert': on_insert}, upsert=True)
+
+
+def stored_versions(students_col, students):
+    """`students` with each summary-only upload replaced by the record actually stored for it."""
+    summaries = [result_key(s) for s in students if is_summary(s)]
+    if not summaries: return students
+    stored = {tuple(result_key(doc).values()): doc
+              for doc in students_col.find({'$or': summaries}, {'_id': 0, 'fetched_at': 0, 'page_digest': 0, 'source': 0})}
+    return [stored.get(tuple(result_key(s).values()), s) for s in students]
@@ -0,0 +1,214 @@
+import re
+import bisect
+import threading
+from grading import load_scheme
+from students import EXAM_SESSION, in_session, superseded
+
+LEADERBOARD_FIELDS = ('usn', 'name', 'total_marks', 'sgpa', 'sgpa_float', 'percentage')
+
+
+def leaderboard_row(student):
+    row = {k: student[k] for k in LEADERBOARD_FIELDS if k in student}
+    if 'percentage' not in row:
+        marks = row.get('total_marks', 0)
+        row['percentage'] = "{:.2f}%".format((marks / load_scheme().max_marks) * 100)
+    return row
+
+
+class Leaderboard:
+    """Rank order of every student in one exam session, loaded once from Mongo and kept current on each upsert.
+
+    Two sorted key lists (by total marks and by SGPA, best first, USN breaking
+    ties) are maintained with bisect, so ranks and sorted pages are served
+    without scanning or re-sorting the collection. There is one row per USN:
+    if the session holds results for two semesters of a student, the later
+    semester is ranked.
+    """
+
+    def __init__(self, session=EXAM_SESSION):
+        self.session = session
+        self._lock = threading.RLock()
+        self._rows = {}       # usn -> leaderboard row
+        self._semesters = {}  # usn -> semester of that row
+        self._by_marks = []   # (-total_marks, usn)
+        self._by_sgpa = []    # (-sgpa_float, usn)
+        self._by_usn = []     # usn, for prefix search
+        self._by_name = []    # (NAME WORD, usn), for prefix search
+        self.loaded = False
+
+    @staticmethod
+    def _marks_key(row):
+        return (-row.get('total_marks', 0), row['usn'])
+
+    @staticmethod
+    def _sgpa_key(row):
+        return (-row.get('sgpa_float', 0.0), row['usn'])
+
+    @staticmethod
+    def _name_keys(row):
+        words = str(row.get('name', '')).upper().split()
+        return sorted({(w, row['usn']) for w in words})
+
+    def load(self, students_col):
+        with self._lock:
+            if self.loaded: return
+            projection = {'_id': 0}
+            projection.update({k: 1 for k in LEADERBOARD_FIELDS}, semester=1)
+            self._rows, self._semesters = {}, {}
+            for student in students_col.find({'exam_session': self.session}, projection):
+                if 'usn' in student and not superseded(student, self._semesters):
+                    self._rows[student['usn']] = leaderboard_row(student)
+                    self._semesters[student['usn']] = student.get('semester')
+            self._by_marks = sorted(self._marks_key(r) for r in self._rows.values())
+            self._by_sgpa = sorted(self._sgpa_key(r) for r in self._rows.values())
+            self._by_usn = sorted(self._rows)
+            self._by_name = sorted(k for r in self._rows.values() for k in self._name_keys(r))
+            self.loaded = True
+            print(f"✅ Leaderboard loaded ({len(self._rows)} students)")
+
+    def upsert(self, student):
+        """Add or update one student. Returns the rank_delta() for live clients, or None if not tracked."""
+        with self._lock:
+            # Not loaded yet: the next load() reads this student from Mongo.
+            if not self.loaded or not in_session(student, self.session): return None
+            if superseded(student, self._semesters): return None
+            self._semesters[student['usn']] = student.get('semester')
+            old = self._rows.get(student['usn'])
+            row = leaderboard_row(dict(old or {}, **student))
+            old_rank = None
+            if old is not None:
+                old_rank = bisect.bisect_left(self._by_marks, self._marks_key(old)) + 1
+                self._remove_key(self._by_marks, self._marks_key(old))
+                self._remove_key(self._by_sgpa, self._sgpa_key(old))
+                for key in self._name_keys(old):
+                    self._remove_key(self._by_name, key)
+            else:
+                bisect.insort(self._by_usn, row['usn'])
+            self._rows[row['usn']] = row
+            bisect.insort(self._by_marks, self._marks_key(row))
+            bisect.insort(self._by_sgpa, self._sgpa_key(row))
+            for key in self._name_keys(row):
+                bisect.insort(self._by_name, key)
+            rank = bisect.bisect_left(self._by_marks, self._marks_key(row)) + 1
+            return rank_delta(row, old_rank, rank, len(self._rows))
+
+    @staticmethod
+    def _remove_key(keys, key):
+        i = bisect.bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            del keys[i]
+
+    def rank_of(self, usn):
+        with self._lock:
+            row = self._rows.get(usn)
+            if row is None: return None
+            return bisect.bisect_left(self._by_marks, self._marks_key(row)) + 1
+
+    def __len__(self):
+        return len(self._rows)
+
+    def search(self, prefix):
+        """USNs whose USN, or any word of whose name, starts with `prefix`."""
+        prefix = prefix.strip().upper()
+        with self._lock:
+            i = bisect.bisect_left(self._by_usn, prefix)
+            matches = set()
+            while i < len(self._by_usn) and self._by_usn[i].startswith(prefix):
+                matches.add(self._by_usn[i]); i += 1
+            i = bisect.bisect_left(self._by_name, (prefix,))
+            while i < len(self._by_name) and self._by_name[i][0].startswith(prefix):
+                matches.add(self._by_name[i][1]); i += 1
+            return matches
+
+    def page(self, sort_by='total_marks', order='desc', offset=0, limit=None, prefix=None):
+        """One page of rows (with 'rank') in /leaderboard order, plus the total row count."""
+        with self._lock:
+            if sort_by == 'sgpa':
+                keys, key_fn, best_first = self._by_sgpa, self._sgpa_key, order == 'desc'
+            else:
+                best_first = order == 'desc' or sort_by not in ('total_marks', 'rank')
+                keys, key_fn = self._by_marks, self._marks_key
+
+            if prefix:
+                keys = sorted(key_fn(self._rows[usn]) for usn in self.search(prefix))
+            total = len(keys)
+            stop = total if limit is None else min(total, offset + limit)
+
+            result = []
+            for i in range(offset, stop):
+                key = keys[i] if best_first else keys[total - 1 - i]
+                row = dict(self._rows[key[1]])
+                if keys is self._by_marks:
+                    row['rank'] = (i if best_first else total - 1 - i) + 1
+                else:
+                    row['rank'] = bisect.bisect_left(self._by_marks, self._marks_key(row)) + 1
+                result.append(row)
+            return result, total
+
+
+def rank_delta(row, old_rank, rank, total):
+    """One student's move on the leaderboard, as pushed to live clients.
+
+    `shifted` lists the other students whose rank changed, as ranges of
+    their previous ranks [from, to] that moved by `by`.
+    """
+    if old_rank is None:
+        shifted = [{'from': rank, 'to': total - 1, 'by': 1}] if rank < total else []
+    elif rank < old_rank:
+        shifted = [{'from': rank, 'to': old_rank - 1, 'by': 1}]
+    elif rank > old_rank:
+        shifted = [{'from': old_rank + 1, 'to': rank, 'by': -1}]
+    else:
+        shifted = []
+    return {'student': dict(row, rank=rank), 'old_rank': old_rank, 'rank': rank, 'total': total, 'shifted': shifted}
+
+
+def session_page(students_col, session, sort_by='total_marks', order='desc', offset=0, limit=50, prefix=None):
+    """Leaderboard.page() for another exam session, read from the (exam_session, ...) indexes."""
+    total = students_col.count_documents(leaderboard_query(session, prefix))
+    return list(session_rows(students_col, session, sort_by, order, prefix, offset, limit, total)), total
+
+
+def leaderboard_query(session, prefix=None):
+    query = {'exam_session': session}
+    if prefix:
+        pattern = re.escape(prefix.strip().upper())
+        query['$or'] = [{'usn': {'$regex': f"^{pattern}"}}, {'name': {'$regex': f"(^|\\s){pattern}", '$options': 'i'}}]
+    return query
+
+
+def session_rows(students_col, session, sort_by='total_marks', order='desc', prefix=None, offset=0, limit=0,
+                 total=None, rank_of=None):
+    """Rows (with 'rank') in /leaderboard order, streamed from a Mongo cursor.
+
+    Every stored result is listed, so a USN with results for two semesters
+    of the session appears twice (Leaderboard keeps only the later one).
+    Ranks are by total marks over the whole session. They come from the
+    cursor position when that is the sort order, otherwise from `rank_of`
+    (e.g. Leaderboard.rank_of) or one indexed count per row.
+    """
+    query = leaderboard_query(session, prefix)
+    if sort_by == 'sgpa':
+        field, best_first = 'sgpa_float', order == 'desc'
+    else:
+        field, best_first = 'total_marks', order == 'desc' or sort_by not in ('total_marks', 'rank')
+    direction = -1 if best_first else 1
+    positional = field == 'total_marks' and not prefix
+    if positional and not best_first and total is None:
+        total = students_col.count_documents(query)
+
+    projection = {'_id': 0}
+    projection.update({k: 1 for k in LEADERBOARD_FIELDS})
+    cursor = students_col.find(query, projection).sort([(field, direction), ('usn', -direction)]).skip(offset)
+    if limit: cursor = cursor.limit(limit)
+    for i, student in enumerate(cursor, start=offset):
+        row = leaderboard_row(student)
+        if positional:
+            row['rank'] = (i if best_first else total - 1 - i) + 1
+        elif rank_of is not None:
+            row['rank'] = rank_of(row['usn'])
+        else:
+            marks = row.get('total_marks', 0)
+            row['rank'] = students_col.count_documents({'exam_session': session, '$or': [
+                {'total_marks': {'$gt': marks}}, {'total_marks': marks, 'usn': {'$lt': row['usn']}}]}) + 1
+        yield row
@@ -0,0 +1,135 @@
+import os
+import json
+import time
+import asyncio
+import threading
+from collections import deque
+
+# --- CONFIG ---
+# Deltas kept for clients that reconnect with Last-Event-ID; older gaps get a 'resync'.
+LIVE_BACKLOG = int(os.environ.get('LIVE_BACKLOG', 1000))
+# Each open stream holds one of run_app's worker threads (gunicorn --threads 8);
+# clients turned away poll /leaderboard/updates instead.
+LIVE_MAX_STREAMS = int(os.environ.get('LIVE_MAX_STREAMS', 4))
+# Streams end after this long and EventSource reconnects, so a thread is never held for good.
+LIVE_STREAM_SECONDS = int(os.environ.get('LIVE_STREAM_SECONDS', 300))
+KEEPALIVE_SECONDS = 15
+RETRY_MS = 3000
+
+
+class LiveFeed:
+    """Leaderboard deltas (leaderboard.rank_delta) broadcast to live clients.
+
+    publish() appends each delta to a bounded backlog under an increasing
+    id. Readers ask for everything after the last id they saw, blocking
+    (wait) or awaiting (async_wait) until something new arrives; None means
+    they fell behind the backlog and should refetch /leaderboard.
+    """
+
+    def __init__(self, backlog=LIVE_BACKLOG, max_streams=LIVE_MAX_STREAMS):
+        self.max_streams = max_streams
+        self.last_id = 0
+        self.streams = 0
+        self._cond = threading.Condition()
+        self._events = deque(maxlen=backlog)   # (id, JSON data)
+        self._async_waiters = set()            # (event loop, asyncio.Event)
+
+    def publish(self, delta):
+        with self._cond:
+            self.last_id += 1
+            self._events.append((self.last_id, json.dumps(delta)))
+            self._cond.notify_all()
+            waiters = list(self._async_waiters)
+        for loop, event in waiters:
+            loop.call_soon_threadsafe(event.set)
+
+    def _since(self, last_id):
+        if last_id == self.last_id: return []
+        # Ahead of us (the app restarted) or behind the backlog: the client must resync.
+        if last_id > self.last_id or not self._events or last_id + 1 < self._events[0][0]:
+            return None
+        return [e for e in self._events if e[0] > last_id]
+
+    def since(self, last_id):
+        """[(id, data)] published after `last_id`, or None if the client has to resync."""
+        with self._cond:
+            return self._since(last_id)
+
+    def wait(self, last_id, timeout):
+        """since(), blocking up to `timeout` seconds for something new."""
+        with self._cond:
+            self._cond.wait_for(lambda: self.last_id != last_id, timeout)
+            return self._since(last_id)
+
+    async def async_wait(self, last_id, timeout):
+        """wait() for asyncio (async_app), without holding a thread."""
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._cond:
+            if self.last_id != last_id: return self._since(last_id)
+            self._async_waiters.add(waiter)
+        try:
+            await asyncio.wait_for(waiter[1].wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            with self._cond:
+                self._async_waiters.discard(waiter)
+        return self.since(last_id)
+
+    def open_stream(self):
+        """Claim one of the `max_streams` stream slots; False when all are taken."""
+        with self._cond:
+            if self.streams >= self.max_streams: return False
+            self.streams += 1
+            return True
+
+    def close_stream(self):
+        with self._cond:
+            self.streams -= 1
+
+    def stats(self):
+        with self._cond:
+            return {'last_id': self.last_id, 'backlog': len(self._events), 'streams': self.streams,
+                    'max_streams': self.max_streams, 'async_waiters': len(self._async_waiters)}
+
+
+# --- SERVER-SENT EVENTS ---
+def sse_message(event_id, event, data):
+    return f"id: {event_id}\nevent: {event}\ndata: {data}\n\n"
+
+
+def sse_messages(feed, last_id, events):
+    """(messages, new last_id) for the result of since() / wait()."""
+    if events is None:
+        last_id = feed.last_id
+        return [sse_message(last_id, 'resync', '{}')], last_id
+    if not events:
+        return [": keepalive\n\n"], last_id
+    return [sse_message(event_id, 'delta', data) for event_id, data in events], events[-1][0]
+
+
+def sse_stream(feed, last_id, duration=LIVE_STREAM_SECONDS):
+    """The /leaderboard/stream body from `last_id` on, ending after `duration` seconds."""
+    yield f"retry: {RETRY_MS}\n\n"
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        messages, last_id = sse_messages(feed, last_id, feed.wait(last_id, KEEPALIVE_SECONDS))
+        yield from messages
+
+
+async def async_sse_stream(feed, last_id, duration=LIVE_STREAM_SECONDS):
+    """sse_stream() for async_app."""
+    yield f"retry: {RETRY_MS}\n\n".encode()
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        messages, last_id = sse_messages(feed, last_id, await feed.async_wait(last_id, KEEPALIVE_SECONDS))
+        for message in messages:
+            yield message.encode()
+
+
+def start_id(feed, value):
+    """Where a stream or poll starts: the client's Last-Event-ID / ?since=, else now."""
+    try:
+        return int(value) if value not in (None, '') else feed.last_id
+    except ValueError:
+        return feed.last_id
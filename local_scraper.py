@@ -1,15 +1,38 @@
+import os
+import gzip
+import json
 import time
+import queue
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
 from bs4 import BeautifulSoup
+from batch_jobs import parse_usn_range
+from result_detector import PhaseTimer, wait_for_result
+from result_parser import parse_result_page
+from students import EXAM_SESSION
+from vtu_http import VTUHttpEngine
 
 # ==============================
 # CONFIG
 # ==============================
 CLOUD_URL = "https://college-rank-list-with-sgpa.onrender.com/submit_result"
-VTU_URL = "https://results.vtu.ac.in/D25J26Ecbcs/index.php"
+VTU_URL = os.environ.get("VTU_URL", f"https://results.vtu.ac.in/{EXAM_SESSION}/index.php")
+SUBMIT_TOKEN = os.environ.get("SUBMIT_TOKEN")
+
+# Batch mode
+JOURNAL_FILE = "scrape_journal.jsonl"
+CAPTCHA_DIR = "captchas"
+UPLOAD_BATCH = 25
+MAX_ATTEMPTS = 3
 
 
 # ==============================
@@ -78,10 +101,13 @@ def main():
     print("\n🌐 Uploading to cloud server...")
 
     try:
+        headers = {"Content-Type": "application/json"}
+        if SUBMIT_TOKEN:
+            headers["X-Submit-Token"] = SUBMIT_TOKEN
         resp = requests.post(
             CLOUD_URL,
             json=result,
-            headers={"Content-Type": "application/json"},
+            headers=headers,
             timeout=20
         )
 
@@ -99,5 +125,303 @@ def main():
     driver.quit()
 
 
+# ==============================
+# BATCH MODE
+# ==============================
+class Journal:
+    """Append-only JSONL log of per-USN progress, so a crashed run can resume.
+
+    Events: fetched (with the parsed result), uploaded, failed.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.fetched = {}
+        self.uploaded = set()
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line after a crash
+                    if entry["event"] == "fetched":
+                        self.fetched[entry["usn"]] = entry["result"]
+                    elif entry["event"] == "uploaded":
+                        self.uploaded.add(entry["usn"])
+        self.file = open(path, "a")
+
+    def record(self, event, usn, **extra):
+        with self.lock:
+            self.file.write(json.dumps(dict(event=event, usn=usn, **extra)) + "\n")
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            if event == "fetched":
+                self.fetched[usn] = extra["result"]
+            elif event == "uploaded":
+                self.uploaded.add(usn)
+
+    def pending_uploads(self):
+        return [r for usn, r in self.fetched.items() if usn not in self.uploaded]
+
+
+class Uploader:
+    """Uploads results in gzip-compressed NDJSON batches over one pooled session.
+
+    Transient failures (connection errors, 429 and 5xx) are retried with
+    exponential backoff; uploads are idempotent upserts on the server.
+    """
+
+    def __init__(self, url, journal, batch_size=UPLOAD_BATCH):
+        self.url = url
+        self.journal = journal
+        self.batch_size = batch_size
+        self.buffer = []
+        self.lock = threading.Lock()
+        self.http = requests.Session()
+        retry = Retry(total=6, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504],
+                      allowed_methods=frozenset(["POST"]))
+        adapter = HTTPAdapter(max_retries=retry, pool_maxsize=2)
+        self.http.mount("https://", adapter)
+        self.http.mount("http://", adapter)
+        self.http.headers["Content-Type"] = "application/x-ndjson"
+        self.http.headers["Content-Encoding"] = "gzip"
+        if SUBMIT_TOKEN:
+            self.http.headers["X-Submit-Token"] = SUBMIT_TOKEN
+        # One sender thread keeps uploads off the scraping threads.
+        self.sender = ThreadPoolExecutor(max_workers=1)
+
+    def add(self, result):
+        with self.lock:
+            self.buffer.append(result)
+            if len(self.buffer) < self.batch_size: return
+            batch, self.buffer = self.buffer, []
+        self.sender.submit(self._send, batch)
+
+    def close(self):
+        with self.lock:
+            batch, self.buffer = self.buffer, []
+        if batch:
+            self.sender.submit(self._send, batch)
+        self.sender.shutdown(wait=True)
+
+    def _send(self, batch):
+        body = gzip.compress("\n".join(json.dumps(r) for r in batch).encode("utf-8"))
+        try:
+            resp = self.http.post(self.url, data=body, timeout=60)
+            reply = resp.json()
+        except Exception as e:
+            print(f"\n❌ Upload of {len(batch)} results failed: {e} (kept in journal, rerun to retry)")
+            return
+        if resp.status_code != 200 or reply.get("status") != "success":
+            reason = reply.get("message") or f"{len(reply.get('errors', []))} results rejected"
+            print(f"\n❌ Upload of {len(batch)} results refused ({resp.status_code}): {reason} "
+                  f"(kept in journal, rerun to retry)")
+            return
+        rejected = {err.get("usn") for err in reply.get("errors", [])}
+        for result in batch:
+            if result["usn"] not in rejected:
+                self.journal.record("uploaded", result["usn"])
+        print(f"\n🌐 Uploaded {reply.get('accepted', 0)} results ({len(rejected)} rejected)")
+
+
+def result_for_upload(html, usn):
+    """Subject-level result for /submit_result; the server recomputes SGPA and class."""
+    data = parse_result_page(html, usn)
+    if data["name"] == "Unknown":
+        return None
+    result = {"usn": usn, "name": data["name"], "total_marks": data["total_marks"],
+              "exam_session": EXAM_SESSION, "semester": data["semester"]}
+    if data["subjects"]:
+        result["subjects"] = data["subjects"]
+    return result
+
+
+class VisibleBrowserEngine:
+    """Same interface as vtu_http.VTUHttpEngine, backed by N visible Chrome windows."""
+
+    def __init__(self, size):
+        self.free = queue.Queue()
+        self.leased = {}
+        for _ in range(size):
+            options = Options()
+            options.add_argument("--disable-popup-blocking")
+            self.free.put(webdriver.Chrome(options=options))
+
+    def get_captcha(self, token):
+        driver = self.leased.get(token) or self.free.get()
+        self.leased[token] = driver
+        driver.get(VTU_URL)
+        driver.execute_script("document.title = arguments[0];", token)
+        img = WebDriverWait(driver, 15).until(
+            EC.presence_of_element_located((By.XPATH, "//img[contains(@src, 'captcha')]")))
+        return img.screenshot_as_png, "image/png"
+
+    def submit(self, token, usn, captcha_text, timer):
+        driver = self.leased.get(token)
+        if driver is None:
+            return ("expired", None)
+        driver.find_element(By.NAME, "lns").send_keys(usn)
+        driver.find_element(By.NAME, "captchacode").send_keys(captcha_text)
+        handles_before = len(driver.window_handles)
+        driver.find_element(By.XPATH, "//input[@type='submit']").click()
+        outcome, alert_text = wait_for_result(driver, handles_before)
+        if outcome == "page":
+            return ("page", driver.page_source)
+        return (outcome, alert_text)
+
+    def release(self, token):
+        driver = self.leased.pop(token, None)
+        if driver is None: return
+        try:
+            for handle in driver.window_handles[1:]:
+                driver.switch_to.window(handle)
+                driver.close()
+            driver.switch_to.window(driver.window_handles[0])
+        except Exception:
+            pass
+        self.free.put(driver)
+
+    def quit(self):
+        for driver in list(self.leased.values()) + list(self.free.queue):
+            try: driver.quit()
+            except Exception: pass
+
+
+def read_usns(path):
+    usns = []
+    with open(path) as f:
+        for line in f:
+            line = line.split("#")[0].strip()
+            if line:
+                usns.extend(parse_usn_range(line))
+    return list(dict.fromkeys(usns))
+
+
+def run_batch(args):
+    journal = Journal(args.journal)
+    uploader = Uploader(args.url, journal, args.upload_batch)
+    for result in journal.pending_uploads():
+        uploader.add(result)
+
+    todo = [u for u in read_usns(args.batch) if u not in journal.fetched]
+    already = len(journal.fetched)
+    print(f"🔵 {len(todo)} USNs to fetch ({len(journal.fetched)} already in {args.journal})")
+    if not todo:
+        uploader.close()
+        return
+
+    if args.engine == "http":
+        engine = VTUHttpEngine()
+    else:
+        engine = VisibleBrowserEngine(args.workers)
+    os.makedirs(CAPTCHA_DIR, exist_ok=True)
+
+    pool = ThreadPoolExecutor(max_workers=args.workers * 2)
+    attempts = {usn: 0 for usn in todo}
+    pending = list(todo)
+    pending_lock = threading.Lock()   # pending and attempts are shared with the submit threads
+    prefetched = {}   # usn -> future of captcha image (main thread only)
+    submits = []
+
+    def top_up():
+        # Keep `workers` captchas loading ahead of the operator.
+        with pending_lock:
+            ahead = list(pending)
+        for usn in ahead:
+            if len(prefetched) >= args.workers: break
+            if usn not in prefetched:
+                prefetched[usn] = pool.submit(engine.get_captcha, usn)
+
+    def next_usn():
+        with pending_lock:
+            return pending.pop(0) if pending else None
+
+    def requeue(usn):
+        with pending_lock:
+            pending.append(usn)
+
+    def retry_or_fail(usn, reason):
+        with pending_lock:
+            attempts[usn] += 1
+            retry = attempts[usn] < MAX_ATTEMPTS
+            if retry: pending.append(usn)
+        if retry:
+            print(f"\n⚠️ {usn}: {reason} - queued again")
+        else:
+            print(f"\n❌ {usn}: {reason} - giving up")
+            journal.record("failed", usn, error=str(reason))
+
+    def submit(usn, captcha):
+        try:
+            outcome, payload = engine.submit(usn, usn, captcha, PhaseTimer())
+        except Exception as e:
+            outcome, payload = "error", str(e)
+        finally:
+            engine.release(usn)
+        result = result_for_upload(payload, usn) if outcome == "page" else None
+        if result is None:
+            retry_or_fail(usn, payload if outcome in ("alert", "error") else outcome)
+            return
+        journal.record("fetched", usn, result=result)
+        uploader.add(result)
+        print(f"\n✅ {usn}: {result['name']} ({result['total_marks']})")
+
+    try:
+        while True:
+            # Checked before taking from pending: a submit that finished has already re-queued its USN.
+            idle = all(f.done() for f in submits)
+            top_up()
+            usn = next_usn()
+            if usn is None:
+                if idle: break
+                time.sleep(0.2)
+                continue
+            # A USN re-queued by a submit thread after top_up() has no captcha loading yet.
+            captcha_future = prefetched.pop(usn, None) or pool.submit(engine.get_captcha, usn)
+            try:
+                image, _ = captcha_future.result()
+            except Exception as e:
+                # A captcha that failed to load still holds its browser window / HTTP session.
+                try:
+                    engine.release(usn)
+                finally:
+                    retry_or_fail(usn, f"captcha error {e}")
+                continue
+            top_up()
+            path = os.path.join(CAPTCHA_DIR, f"{usn}.png")
+            with open(path, "wb") as f:
+                f.write(image)
+            captcha = input(f"[{len(journal.fetched) - already}/{len(todo)}] {usn} captcha ({path}): ").strip()
+            if not captcha:
+                requeue(usn)
+                engine.release(usn)
+                continue
+            submits.append(pool.submit(submit, usn, captcha))
+    except KeyboardInterrupt:
+        print("\n🛑 Stopping; progress is saved in the journal.")
+    finally:
+        pool.shutdown(wait=True)
+        uploader.close()
+        if hasattr(engine, "quit"):
+            engine.quit()
+
+
+def cli():
+    parser = argparse.ArgumentParser(description="Fetch VTU results locally and upload them to the rank list server.")
+    parser.add_argument("--batch", metavar="FILE", help="file of USNs or ranges (1DB23CS001-120), one per line")
+    parser.add_argument("--workers", type=int, default=4, help="captchas loaded ahead / browser windows (default 4)")
+    parser.add_argument("--engine", choices=["http", "browser"], default="http")
+    parser.add_argument("--journal", default=JOURNAL_FILE, help=f"progress journal (default {JOURNAL_FILE})")
+    parser.add_argument("--upload-batch", type=int, default=UPLOAD_BATCH, help="results per upload request")
+    parser.add_argument("--url", default=CLOUD_URL, help="submit_result endpoint")
+    args = parser.parse_args()
+    if args.batch:
+        run_batch(args)
+    else:
+        main()
+
+
 if __name__ == "__main__":
-    main()
+    cli()
@@ -0,0 +1,142 @@
+import math
+import threading
+from bisect import bisect_left
+
+# Seconds; VTU round trips range from tens of milliseconds (HTTP engine) to tens of seconds (Chromium).
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values):
+    if not names: return ''
+    return '{' + ','.join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + '}'
+
+
+def _number(n):
+    """Integers as integers, anything else at full float precision (`:g` keeps only six digits)."""
+    if isinstance(n, int): return str(int(n))
+    n = float(n)
+    if math.isnan(n): return 'NaN'
+    if math.isinf(n): return '+Inf' if n > 0 else '-Inf'
+    return repr(n)
+
+
+class Counter:
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.label_names = name, help, labels
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for values, n in sorted(self._values.items()):
+                lines.append(f"{self.name}{_labels(self.label_names, values)} {_number(n)}")
+        return lines
+
+
+class Histogram:
+    """Fixed-bucket histogram; observe() is one bisect and three additions under a lock."""
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.label_names = name, help, labels
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._series = {}   # label values -> [per-bucket counts (+Inf last), sum, count]
+
+    def observe(self, value, *label_values):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        names = self.label_names + ('le',)
+        with self._lock:
+            for values, (counts, total, n) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ('+Inf',), counts):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_labels(names, values + (bound,))} {cumulative}")
+                lines.append(f"{self.name}_sum{_labels(self.label_names, values)} {_number(total)}")
+                lines.append(f"{self.name}_count{_labels(self.label_names, values)} {n}")
+        return lines
+
+
+class Gauge:
+    """Read at scrape time: `read()` returns a number, or {label values tuple: number}."""
+
+    def __init__(self, name, help, read, labels=()):
+        self.name, self.help, self.read, self.label_names = name, help, read, labels
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        try:
+            value = self.read()
+        except Exception:
+            return lines
+        if not isinstance(value, dict):
+            value = {(): value}
+        for values, n in sorted(value.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, values)} {_number(n)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+PHASE_SECONDS = REGISTRY.register(Histogram(
+    'vtu_phase_seconds', "Time spent in each phase of a request.", ('route', 'phase')))
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'http_request_duration_seconds', "Request latency by endpoint.", ('endpoint',)))
+REQUESTS = REGISTRY.register(Counter(
+    'http_requests_total', "Requests by endpoint and status code.", ('endpoint', 'status')))
+VTU_OUTCOMES = REGISTRY.register(Counter(
+    'vtu_fetch_total', "Result fetches by engine and outcome (success, alert, timeout, expired, unparsed, error).",
+    ('engine', 'outcome')))
+CAPTCHA_LOADS = REGISTRY.register(Counter(
+    'vtu_captcha_loads_total', "Captcha loads by engine and outcome.", ('engine', 'outcome')))
+BROWSER_STARTS = REGISTRY.register(Counter(
+    'browser_starts_total', "Headless Chromium processes started."))
+BROWSER_RESTARTS = REGISTRY.register(Counter(
+    'browser_restarts_total', "Browsers quit because they crashed or stopped responding."))
+
+
+def observe_phases(route, timings):
+    """Feed a PhaseTimer's millisecond timings into vtu_phase_seconds."""
+    for phase, ms in timings.items():
+        PHASE_SECONDS.observe(ms / 1000, route, phase)
+
+
+def gauge(name, help, read, labels=()):
+    return REGISTRY.register(Gauge(name, help, read, labels))
+
+
+def render():
+    return REGISTRY.render()
@@ -0,0 +1,154 @@
+import os
+import re
+import gzip
+import hashlib
+from datetime import datetime, timezone
+from pymongo import UpdateOne
+from students import EXAM_SESSION, LEGACY_SESSION
+
+# --- CONFIG ---
+# 'gridfs' (the app's MongoDB), 'local' (a directory) or 'off'. GridFS by default:
+# a local directory is lost with the container on hosts with ephemeral disks.
+ARCHIVE_BACKEND = os.environ.get('PAGE_ARCHIVE', 'gridfs')
+ARCHIVE_DIR = os.environ.get('PAGE_ARCHIVE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'archive'))
+GRIDFS_BUCKET = 'raw_pages'
+INDEX_COLLECTION = 'raw_pages_index'
+ZSTD_LEVEL = 10
+
+
+# --- COMPRESSION ---
+# zstd when the optional `zstandard` package is installed, gzip otherwise.
+# Both stay readable: the codec is part of each stored name.
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+DEFAULT_CODEC = 'zst' if zstandard is not None else 'gz'
+
+
+def compress(data, codec=DEFAULT_CODEC):
+    if codec == 'zst':
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    return gzip.compress(data, mtime=0)
+
+
+def decompress(blob, codec):
+    if codec == 'zst':
+        if zstandard is None:
+            raise RuntimeError("Page was archived with zstd; pip install zstandard to read it")
+        return zstandard.ZstdDecompressor().decompress(blob)
+    return gzip.decompress(blob)
+
+
+def page_digest(html_bytes):
+    return hashlib.sha256(html_bytes).hexdigest()
+
+
+# --- STORES ---
+class LocalStore:
+    """Compressed pages as <root>/ab/cd/<sha256>.html.<codec>."""
+
+    def __init__(self, root=ARCHIVE_DIR):
+        self.root = root
+
+    def _path(self, digest, codec):
+        return os.path.join(self.root, digest[:2], digest[2:4], f"{digest}.html.{codec}")
+
+    def put(self, digest, codec, blob):
+        path = self._path(digest, codec)
+        if os.path.exists(path): return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(blob)
+        os.replace(tmp, path)
+
+    def get(self, digest, codec):
+        with open(self._path(digest, codec), 'rb') as f:
+            return f.read()
+
+
+class GridFSStore:
+    """Compressed pages in a GridFS bucket, one file per digest + codec."""
+
+    def __init__(self, db, bucket=GRIDFS_BUCKET):
+        import gridfs
+        self.fs = gridfs.GridFS(db, collection=bucket)
+
+    def put(self, digest, codec, blob):
+        name = f"{digest}.html.{codec}"
+        if self.fs.exists(name): return
+        self.fs.put(blob, _id=name, filename=name)
+
+    def get(self, digest, codec):
+        return self.fs.get(f"{digest}.html.{codec}").read()
+
+
+def open_store(db, backend=ARCHIVE_BACKEND):
+    if backend == 'gridfs': return GridFSStore(db)
+    if backend == 'local': return LocalStore()
+    return None
+
+
+def open_archive(db, backend=ARCHIVE_BACKEND):
+    """The PageArchive for a (pymongo) database, or None when archiving is off."""
+    store = open_store(db, backend)
+    if store is None:
+        print("📦 Page archive: off")
+        return None
+    print(f"📦 Page archive: {ARCHIVE_DIR}" if backend == 'local' else f"📦 Page archive: GridFS bucket '{GRIDFS_BUCKET}'")
+    archive = PageArchive(store, db[INDEX_COLLECTION])
+    archive.ensure_indexes()
+    return archive
+
+
+class PageArchive:
+    """Content-addressed archive of every fetched VTU result page.
+
+    Page bodies go to `store` once per distinct SHA-256; the index
+    collection maps each (usn, digest) to the exam session it came from,
+    when it was fetched and whether it parsed, which is what reparse.py walks.
+    """
+
+    def __init__(self, store, index_col, codec=DEFAULT_CODEC):
+        self.store = store
+        self.index_col = index_col
+        self.codec = codec
+
+    def ensure_indexes(self):
+        self.index_col.create_index([('usn', 1), ('digest', 1)], unique=True)
+        self.index_col.create_index([('usn', 1), ('fetched_at', -1)])
+
+    def put(self, usn, html, parsed, exam_session=EXAM_SESSION):
+        data = html.encode('utf-8') if isinstance(html, str) else html
+        digest = page_digest(data)
+        self.store.put(digest, self.codec, compress(data, self.codec))
+        self.index_col.update_one(
+            {'usn': usn, 'digest': digest},
+            {'$set': {'fetched_at': datetime.now(timezone.utc), 'parsed': parsed, 'exam_session': exam_session},
+             '$setOnInsert': {'codec': self.codec, 'raw_bytes': len(data)}},
+            upsert=True)
+        return digest
+
+    def get(self, digest, codec):
+        return decompress(self.store.get(digest, codec), codec).decode('utf-8')
+
+    def latest_pages(self, usn_prefix=None):
+        """The newest archived page per USN and exam session as index docs, in USN order (streamed)."""
+        query = {'usn': {'$regex': f"^{re.escape(usn_prefix)}"}} if usn_prefix else {}
+        last_usn, sessions = None, set()
+        cursor = self.index_col.find(query, {'_id': 0}).sort([('usn', 1), ('fetched_at', -1)])
+        for entry in cursor:
+            # Pages archived before sessions were recorded all came from the legacy results page.
+            entry.setdefault('exam_session', LEGACY_SESSION)
+            if entry['usn'] != last_usn:
+                last_usn, sessions = entry['usn'], set()
+            if entry['exam_session'] in sessions: continue
+            sessions.add(entry['exam_session'])
+            yield entry
+
+    def mark_parsed(self, entries):
+        if not entries: return
+        self.index_col.bulk_write([UpdateOne({'usn': e['usn'], 'digest': e['digest']}, {'$set': {'parsed': True}})
+                                   for e in entries], ordered=False)
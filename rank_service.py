@@ -0,0 +1,116 @@
+import bisect
+import threading
+from grading import load_scheme
+from students import EXAM_SESSION, in_session, superseded
+
+# Rank groups derived from the USN (1DB23CS042): the whole university, the
+# college (1DB) and the college + batch + branch (1DB23CS).
+RANK_GROUPS = {'uni_rank': lambda usn: '', 'coll_rank': lambda usn: usn[:3], 'branch_rank': lambda usn: usn[:7]}
+
+
+class FenwickTree:
+    """Counts per integer score in [0, size), with O(log n) updates and prefix sums."""
+
+    def __init__(self, size):
+        self.size = size
+        self.total = 0
+        self._tree = [0] * (size + 1)
+
+    def add(self, score, delta):
+        self.total += delta
+        i = score + 1
+        while i <= self.size:
+            self._tree[i] += delta
+            i += i & -i
+
+    def count_upto(self, score):
+        """Number of entries with a score <= `score`."""
+        n = 0
+        i = min(score + 1, self.size)
+        while i > 0:
+            n += self._tree[i]
+            i -= i & -i
+        return n
+
+
+class RankService:
+    """University, college and branch rank by total marks within one exam session, without querying Mongo.
+
+    One Fenwick tree per rank group counts students per total_marks value;
+    a student's rank is 1 + the number of students in its group with more
+    marks + the number with the same marks and a lower USN. That is the
+    /leaderboard order (Leaderboard.page), so a student has one rank
+    everywhere. Each USN is ranked once, with its latest semester in the
+    session.
+    """
+
+    def __init__(self, max_score=None, session=EXAM_SESSION):
+        self.session = session
+        self.max_score = max_score or load_scheme().max_marks
+        self._lock = threading.Lock()
+        self._scores = {}      # usn -> score
+        self._semesters = {}   # usn -> semester of that score
+        self._trees = {}       # (rank name, USN prefix) -> FenwickTree
+        self._ties = {}        # (rank name, USN prefix) -> {score: sorted USNs with that score}
+        self.loaded = False
+
+    def _score(self, total_marks):
+        try:
+            return min(max(int(total_marks), 0), self.max_score)
+        except (TypeError, ValueError):
+            return 0
+
+    def _tree(self, name, usn):
+        key = (name, RANK_GROUPS[name](usn))
+        tree = self._trees.get(key)
+        if tree is None:
+            tree = self._trees[key] = FenwickTree(self.max_score + 1)
+        return tree
+
+    def _tied(self, name, usn, score):
+        return self._ties.setdefault((name, RANK_GROUPS[name](usn)), {}).setdefault(score, [])
+
+    def _set(self, usn, score):
+        old = self._scores.get(usn)
+        if old == score: return
+        for name in RANK_GROUPS:
+            tree = self._tree(name, usn)
+            if old is not None:
+                tree.add(old, -1)
+                tied = self._tied(name, usn, old)
+                del tied[bisect.bisect_left(tied, usn)]
+            tree.add(score, 1)
+            bisect.insort(self._tied(name, usn, score), usn)
+        self._scores[usn] = score
+
+    def load(self, students_col):
+        with self._lock:
+            if self.loaded: return
+            projection = {'_id': 0, 'usn': 1, 'semester': 1, 'total_marks': 1}
+            for student in students_col.find({'exam_session': self.session}, projection):
+                if 'usn' in student and not superseded(student, self._semesters):
+                    self._semesters[student['usn']] = student.get('semester')
+                    self._set(student['usn'], self._score(student.get('total_marks', 0)))
+            self.loaded = True
+            print(f"✅ Rank service loaded ({len(self._scores)} students)")
+
+    def upsert(self, student):
+        with self._lock:
+            # Not loaded yet: the next load() reads this student from Mongo.
+            if not self.loaded or not in_session(student, self.session): return
+            if superseded(student, self._semesters): return
+            self._semesters[student['usn']] = student.get('semester')
+            if 'total_marks' not in student and student['usn'] in self._scores: return
+            self._set(student['usn'], self._score(student.get('total_marks', 0)))
+
+    def ranks(self, usn):
+        """{'uni_rank', 'coll_rank', 'branch_rank'} for a stored student, or None."""
+        with self._lock:
+            score = self._scores.get(usn)
+            if score is None: return None
+            ranks = {}
+            for name in RANK_GROUPS:
+                tree = self._tree(name, usn)
+                ahead = tree.total - tree.count_upto(score) + bisect.bisect_left(self._tied(name, usn, score), usn)
+                ranks[name] = ahead + 1
+            return ranks
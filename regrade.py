@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Regrade every stored student after a credit-table change (credits/*.json).
+
+    MONGO_URI=... python regrade.py [--scheme 2022_cs_5] [--session D25J26Ecbcs] [--dry-run]
+
+Students are graded in one NumPy pass (grading.grade_batch) per credit
+table: the one for each result's branch and semester, or `--scheme` for
+all of them. Only documents whose SGPA, percentage or class changed are
+written back, together with their transcripts' CGPA. Summary-only uploads
+(no subjects) are left alone. Restart the web app afterwards so its
+in-memory leaderboard picks up the new SGPAs.
+"""
+
+import os
+import time
+import argparse
+from collections import defaultdict
+from pymongo import MongoClient, UpdateOne
+from grading import grade_batch, load_scheme, scheme_name_for
+from transcripts import record_transcripts
+
+MONGO_URI = os.environ.get('MONGO_URI', 'mongodb://127.0.0.1:27017/')
+MONGO_DB = os.environ.get('MONGO_DB', 'university_db')
+BATCH_SIZE = 1000
+GRADED_FIELDS = ('total_marks', 'sgpa', 'sgpa_float', 'percentage', 'percentage_float',
+                 'failed_count', 'class_band', 'class_result')
+
+
+def regraded(docs, scheme):
+    """(doc, fields) for the docs whose stored grade fields differ from a fresh grading."""
+    graded = grade_batch(docs, scheme)
+    changed = []
+    for i, doc in enumerate(docs):
+        has_credits = bool(graded['has_credits'][i])
+        sgpa = float(graded['sgpa_float'][i])
+        percentage = float(graded['percentage_float'][i])
+        fields = {
+            'total_marks': int(graded['total_marks'][i]),
+            'sgpa': "{:.2f}".format(sgpa) if has_credits else "0.00",
+            'sgpa_float': sgpa,
+            'percentage': "{:.2f}%".format(percentage) if has_credits else "0.00%",
+            'percentage_float': percentage,
+            'failed_count': int(graded['failed_count'][i]),
+            'class_band': graded['class_band'][i],
+            'class_result': graded['class_result'][i],
+        }
+        if any(doc.get(k) != fields[k] for k in GRADED_FIELDS):
+            changed.append((doc, fields))
+    return changed
+
+
+def regrade(students_col, transcripts_col, scheme=None, session=None, dry_run=False):
+    query = {'subjects.0': {'$exists': True}}
+    if session: query['exam_session'] = session
+    projection = {'_id': 1, 'usn': 1, 'exam_session': 1, 'semester': 1, 'subjects': 1, **{k: 1 for k in GRADED_FIELDS}}
+    groups = defaultdict(list)
+    for doc in students_col.find(query, projection):
+        groups[scheme.name if scheme else scheme_name_for(doc['usn'], doc.get('semester'))].append(doc)
+
+    start = time.perf_counter()
+    changed = []
+    for name, docs in groups.items():
+        changed.extend(regraded(docs, load_scheme(name)))
+    total = sum(len(docs) for docs in groups.values())
+    print(f"⏱️ Graded {total} students with {len(groups)} credit tables in "
+          f"{(time.perf_counter() - start) * 1000:.0f}ms, {len(changed)} changed")
+    if dry_run or not changed: return 0
+
+    cgpa = record_transcripts(transcripts_col, [dict(doc, **fields) for doc, fields in changed])
+    ops = [UpdateOne({'_id': doc['_id']}, {'$set': {**fields, **cgpa.get(doc['usn'], {})}}) for doc, fields in changed]
+    updated = 0
+    for i in range(0, len(ops), BATCH_SIZE):
+        updated += students_col.bulk_write(ops[i:i + BATCH_SIZE], ordered=False).modified_count
+    return updated
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regrade stored students from the credit tables")
+    parser.add_argument('--scheme', default=None,
+                        help="credit table name under credits/ (default: per branch and semester)")
+    parser.add_argument('--session', default=None, help="only results from this exam session, e.g. D25J26Ecbcs")
+    parser.add_argument('--dry-run', action='store_true', help="only report how many students would change")
+    args = parser.parse_args()
+
+    scheme = load_scheme(args.scheme) if args.scheme else None
+    print("🔄 Connecting to MongoDB...")
+    db = MongoClient(MONGO_URI, serverSelectionTimeoutMS=10000)[MONGO_DB]
+    updated = regrade(db['students'], db['transcripts'], scheme, args.session, args.dry_run)
+    print(f"✅ Regraded {updated} students")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Rebuild stored students from the raw page archive (page_archive.py), without VTU.
+
+    MONGO_URI=... python reparse.py [--scheme 2022_cs_5] [--workers 4] [--prefix 1DB23CS] [--dry-run]
+
+Streams the newest archived page of every USN and exam session through a
+process pool that re-runs parse_result_page and the grading engine, then
+upserts the results (and their transcripts' CGPA) in bulk. Pages that
+failed to parse when they were fetched are retried too, so a parser fix
+recovers them. A result stored from some other source after its latest
+page was archived (e.g. a /submit_result upload) is left alone. Restart the web app
+afterwards so its in-memory views pick up the changes.
+"""
+
+import os
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pymongo import MongoClient, UpdateOne
+from grading import load_scheme
+from result_parser import parse_result_page
+from students import result_key
+from transcripts import record_transcripts
+from page_archive import ARCHIVE_BACKEND, INDEX_COLLECTION, PageArchive, open_store
+
+MONGO_URI = os.environ.get('MONGO_URI', 'mongodb://127.0.0.1:27017/')
+MONGO_DB = os.environ.get('MONGO_DB', 'university_db')
+CHUNK_SIZE = 200
+
+
+# --- WORKERS ---
+_archive = None
+_scheme = None
+
+def init_worker(backend, scheme_name):
+    global _archive, _scheme
+    db = MongoClient(MONGO_URI)[MONGO_DB] if backend == 'gridfs' else None
+    _archive = PageArchive(open_store(db, backend), None)
+    # No --scheme: each page is graded with the credit table for its branch and semester.
+    _scheme = load_scheme(scheme_name) if scheme_name else None
+
+
+def parse_chunk(entries):
+    """Parse and grade a chunk of archived pages. Returns ([(entry, student_data)], [(entry, error)])."""
+    parsed, failed = [], []
+    for entry in entries:
+        try:
+            student_data = parse_result_page(_archive.get(entry['digest'], entry['codec']), entry['usn'], _scheme)
+        except Exception as e:
+            failed.append((entry, str(e))); continue
+        if student_data['name'] == "Unknown":
+            failed.append((entry, "Could not parse result.")); continue
+        student_data['exam_session'] = entry['exam_session']
+        parsed.append((entry, student_data))
+    return parsed, failed
+
+
+# --- DRIVER ---
+def chunks(iterable, size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk; chunk = []
+    if chunk: yield chunk
+
+
+def store_parsed(parsed, students_col, transcripts_col, archive, dry_run):
+    """Upsert re-parsed students unless a newer record is already stored. Returns the number written."""
+    projection = {'_id': 0, 'usn': 1, 'exam_session': 1, 'semester': 1, 'fetched_at': 1, 'page_digest': 1}
+    stored = {tuple(result_key(doc).values()): doc for doc in students_col.find(
+        {'usn': {'$in': [entry['usn'] for entry, _ in parsed]}}, projection)}
+    writes, newly_parsed = [], []
+    for entry, student_data in parsed:
+        current = stored.get(tuple(result_key(student_data).values()))
+        # A record parsed from this very page is always rewritten; anything else only if it is older.
+        if (current is not None and current.get('page_digest') != entry['digest']
+                and current.get('fetched_at') is not None and current['fetched_at'] > entry['fetched_at']):
+            continue
+        writes.append((entry, student_data))
+        if not entry.get('parsed'): newly_parsed.append(entry)
+    if dry_run or not writes: return len(writes)
+    cgpa = record_transcripts(transcripts_col, [student_data for _, student_data in writes])
+    students_col.bulk_write([
+        UpdateOne(result_key(student_data), {'$set': {**student_data, **cgpa.get(entry['usn'], {}),
+                                                      'fetched_at': entry['fetched_at'], 'page_digest': entry['digest'],
+                                                      'source': 'vtu'}},
+                     upsert=True)
+        for entry, student_data in writes], ordered=False)
+    archive.mark_parsed(newly_parsed)
+    return len(writes)
+
+
+def reparse(db, backend, scheme_name=None, workers=None, prefix=None, dry_run=False):
+    archive = PageArchive(open_store(db, backend), db[INDEX_COLLECTION])
+    students_col, transcripts_col = db['students'], db['transcripts']
+    workers = workers or os.cpu_count() or 1
+    totals = {'pages': 0, 'written': 0, 'failed': 0}
+    failures = []
+
+    def collect(future):
+        parsed, failed = future.result()
+        totals['pages'] += len(parsed) + len(failed)
+        totals['failed'] += len(failed)
+        totals['written'] += store_parsed(parsed, students_col, transcripts_col, archive, dry_run) if parsed else 0
+        failures.extend(failed[:max(0, 5 - len(failures))])
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers, initializer=init_worker, initargs=(backend, scheme_name)) as pool:
+        pending = set()
+        for chunk in chunks(archive.latest_pages(prefix), CHUNK_SIZE):
+            pending.add(pool.submit(parse_chunk, chunk))
+            # Keep a bounded number of chunks in flight so the archive is streamed, not loaded.
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done: collect(future)
+        for future in pending: collect(future)
+
+    print(f"⏱️ Re-parsed {totals['pages']} pages in {time.perf_counter() - start:.1f}s with {workers} workers")
+    for entry, error in failures:
+        print(f"❌ {entry['usn']} ({entry['digest'][:12]}): {error}")
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-parse archived VTU result pages into the students collection")
+    parser.add_argument('--scheme', default=None,
+                        help="credit table name under credits/ (default: per branch and semester)")
+    parser.add_argument('--backend', default=ARCHIVE_BACKEND, choices=['local', 'gridfs'],
+                        help="archive backend (default: PAGE_ARCHIVE)")
+    parser.add_argument('--workers', type=int, default=None, help="parser processes (default: CPU count)")
+    parser.add_argument('--prefix', default=None, help="only USNs starting with this, e.g. 1DB23CS")
+    parser.add_argument('--dry-run', action='store_true', help="parse everything but write nothing")
+    args = parser.parse_args()
+
+    print("🔄 Connecting to MongoDB...")
+    db = MongoClient(MONGO_URI, serverSelectionTimeoutMS=10000)[MONGO_DB]
+    totals = reparse(db, args.backend, args.scheme, args.workers, args.prefix, args.dry_run)
+    verb = "Would write" if args.dry_run else "Wrote"
+    print(f"✅ {verb} {totals['written']} students; {totals['failed']} pages could not be parsed")
+
+
+if __name__ == "__main__":
+    main()
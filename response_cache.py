@@ -0,0 +1,123 @@
+import os
+import time
+import hashlib
+import threading
+from functools import wraps
+from collections import OrderedDict
+from flask import request, Response
+
+# --- CONFIG ---
+CACHE_SIZE = int(os.environ.get('RESPONSE_CACHE_SIZE', 256))
+CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 60))
+
+
+class ResponseCache:
+    """LRU + TTL cache of serialized JSON responses.
+
+    Every entry remembers the data version it was built from; bump() (called
+    on each student upsert) makes all older entries misses.
+    """
+
+    def __init__(self, max_entries=CACHE_SIZE, ttl=CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (version, expires_at, body, etag)
+
+    def bump(self):
+        with self._lock:
+            self.version += 1
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] != self.version or entry[1] < time.monotonic()):
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, version, body):
+        etag = hashlib.sha1(body).hexdigest()[:20]
+        entry = (version, time.monotonic() + self.ttl, body, etag)
+        with self._lock:
+            if version != self.version: return entry   # data changed while building it
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'max_entries': self.max_entries, 'version': self.version,
+                    'hits': self.hits, 'misses': self.misses}
+
+
+def cache_key(req=request):
+    args = sorted((k, v.strip()) for k, v in req.args.items(multi=True) if v.strip())
+    return (req.path, tuple(args))
+
+
+def cached_json(cache):
+    """Serve a JSON view from `cache`, with ETag / If-None-Match support.
+
+    Only successful responses ({'status': 'success'}) are cached.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            key = cache_key()
+            entry = cache.get(key)
+            if entry is None:
+                version = cache.version
+                resp = view(*args, **kwargs)
+                if resp.status_code != 200 or (resp.get_json(silent=True) or {}).get('status') != 'success':
+                    return resp
+                entry = cache.put(key, version, resp.get_data())
+
+            etag = entry[3]
+            if request.if_none_match.contains(etag):
+                resp = Response(status=304)
+            else:
+                resp = Response(entry[2], mimetype='application/json')
+            resp.set_etag(etag)
+            resp.headers['Cache-Control'] = 'no-cache'
+            return resp
+        return wrapper
+    return decorator
+
+
+def async_cached_json(cache):
+    """cached_json() for Quart views (async_app)."""
+    from quart import request as async_request, Response as AsyncResponse
+
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(*args, **kwargs):
+            key = cache_key(async_request)
+            entry = cache.get(key)
+            if entry is None:
+                version = cache.version
+                resp = await view(*args, **kwargs)
+                if resp.status_code != 200 or ((await resp.get_json(silent=True)) or {}).get('status') != 'success':
+                    return resp
+                entry = cache.put(key, version, await resp.get_data())
+
+            etag = entry[3]
+            if async_request.if_none_match.contains(etag):
+                resp = AsyncResponse(b'', status=304)
+            else:
+                resp = AsyncResponse(entry[2], mimetype='application/json')
+            resp.set_etag(etag)
+            resp.headers['Cache-Control'] = 'no-cache'
+            return resp
+        return wrapper
+    return decorator
@@ -0,0 +1,99 @@
+import os
+import time
+import threading
+from datetime import datetime, timezone
+from collections import OrderedDict
+from students import EXAM_SESSION, in_session
+
+# --- CONFIG ---
+RESULT_CACHE_SIZE = int(os.environ.get('RESULT_CACHE_SIZE', 4096))
+# Stored results fetched less than this many seconds ago are served without asking VTU (0 turns this off).
+RESULT_FRESH_FOR = int(os.environ.get('RESULT_FRESH_FOR', 6 * 3600))
+# Also serve older results immediately, re-fetching them from VTU in the background
+# with the captcha the client just solved (picks up revaluation changes).
+RESULT_REVALIDATE = os.environ.get('RESULT_REVALIDATE', '1') == '1'
+
+
+def fetched_timestamp(value):
+    """Epoch seconds for a stored `fetched_at` (pymongo returns naive UTC datetimes), or None."""
+    if not isinstance(value, datetime): return None
+    if value.tzinfo is None: value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def fetched_iso(timestamp):
+    if timestamp is None: return None
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec='seconds')
+
+
+class ResultCache:
+    """USN -> (stored result, fetched_at) LRU over one exam session of the students collection.
+
+    lookup() answers from memory, falling back to one indexed find_one;
+    put() is called on every VTU fetch so entries never lag behind our own
+    writes, and discard() on every upload. Only results fetched from VTU
+    (source 'vtu') are served: uploads and records stored before `source`
+    existed are fetched again.
+    """
+
+    def __init__(self, max_entries=RESULT_CACHE_SIZE, fresh_for=RESULT_FRESH_FOR, session=EXAM_SESSION):
+        self.session = session
+        self.max_entries = max_entries
+        self.fresh_for = fresh_for
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # usn -> (student data, fetched_at epoch seconds or None)
+        self._refreshing = set()
+
+    def lookup(self, usn, students_col):
+        """(student data, fetched_at) for `usn`, or None if it was never stored."""
+        with self._lock:
+            entry = self._entries.get(usn)
+            if entry is not None:
+                self.hits += 1
+                self._entries.move_to_end(usn)
+                return entry
+            self.misses += 1
+        doc = students_col.find_one({'usn': usn, 'exam_session': self.session}, {'_id': 0, 'page_digest': 0},
+                                    sort=[('semester', -1)])
+        if doc is None or doc.pop('source', None) != 'vtu': return None
+        fetched_at = fetched_timestamp(doc.pop('fetched_at', None))
+        return self.put(doc, fetched_at)
+
+    def put(self, student_data, fetched_at):
+        entry = (student_data, fetched_at)
+        if not in_session(student_data, self.session): return entry
+        with self._lock:
+            current = self._entries.get(student_data['usn'])
+            if current is not None and (current[1] or 0) > (fetched_at or 0):
+                return current   # a newer fetch landed first
+            self._entries[student_data['usn']] = entry
+            self._entries.move_to_end(student_data['usn'])
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def discard(self, usn):
+        with self._lock:
+            self._entries.pop(usn, None)
+
+    def is_fresh(self, fetched_at, now=None):
+        if fetched_at is None: return False
+        return (now or time.time()) - fetched_at < self.fresh_for
+
+    def begin_refresh(self, usn):
+        """Claim the background re-fetch of `usn`; False if one is already running."""
+        with self._lock:
+            if usn in self._refreshing: return False
+            self._refreshing.add(usn)
+            return True
+
+    def end_refresh(self, usn):
+        with self._lock:
+            self._refreshing.discard(usn)
+
+    def stats(self):
+        with self._lock:
+            return {'entries': len(self._entries), 'max_entries': self.max_entries, 'hits': self.hits,
+                    'misses': self.misses, 'refreshing': len(self._refreshing)}
@@ -0,0 +1,87 @@
+import time
+
+RESULT_TIMEOUT = 15
+POLL_INTERVAL = 0.1
+
+
+class PhaseTimer:
+    """Records how long each named phase of a request took, in milliseconds."""
+
+    def __init__(self):
+        self.timings = {}
+        self._last = time.perf_counter()
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.timings[phase] = round((now - self._last) * 1000, 1)
+        self._last = now
+
+
+class ResultReady:
+    """Wait condition that fires on the first of: VTU alert, new result window, result DOM."""
+
+    def __init__(self, handles_before):
+        self.handles_before = handles_before
+
+    def __call__(self, driver):
+        from selenium.common.exceptions import NoAlertPresentException
+        from selenium.webdriver.common.by import By
+        try:
+            return ('alert', driver.switch_to.alert)
+        except NoAlertPresentException:
+            pass
+
+        handles = driver.window_handles
+        if len(handles) > self.handles_before:
+            return ('window', handles[-1])
+
+        if driver.find_elements(By.XPATH, "//*[contains(text(), 'Student Name')]"):
+            return ('page', None)
+        return False
+
+
+def wait_for_result(driver, handles_before, timeout=RESULT_TIMEOUT, timer=None):
+    """Block until VTU answers the submit.
+
+    Returns ('alert', text), ('page', None) once the result is loaded in the
+    current window, or ('timeout', None). With a PhaseTimer, marks 'wait'
+    (until VTU answered) and 'window' (loading a new result window).
+    """
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    deadline = time.monotonic() + timeout
+    try:
+        kind, payload = WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(ResultReady(handles_before))
+    except TimeoutException:
+        if timer: timer.mark('wait')
+        return ('timeout', None)
+    if timer: timer.mark('wait')
+
+    if kind == 'alert':
+        txt = payload.text
+        payload.accept()
+        return ('alert', txt)
+
+    if kind == 'window':
+        driver.switch_to.window(payload)
+        remaining = max(deadline - time.monotonic(), POLL_INTERVAL)
+        try:
+            WebDriverWait(driver, remaining, poll_frequency=POLL_INTERVAL).until(
+                lambda d: d.execute_script("return document.readyState") == 'complete')
+        except TimeoutException:
+            return ('timeout', None)
+        finally:
+            if timer: timer.mark('window')
+    return ('page', None)
+
+
+def wait_for_image(driver, img, timeout=5):
+    """Wait until an <img> element has finished decoding."""
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.support.ui import WebDriverWait
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=POLL_INTERVAL).until(
+            lambda d: d.execute_script("return arguments[0].complete && arguments[0].naturalWidth > 0", img))
+    except TimeoutException:
+        pass
@@ -0,0 +1,227 @@
+from html.parser import HTMLParser
+from grading import CLASS_LABELS, class_band, grade_point, load_scheme, scheme_name_for
+
+# Text inside these tags is not page text (BeautifulSoup's stripped_strings skips it too).
+SKIP_TEXT_TAGS = {'script', 'style', 'template'}
+VOID_TAGS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen', 'link',
+    'menuitem', 'meta', 'param', 'source', 'track', 'wbr', 'basefont', 'bgsound',
+    'command', 'frame', 'image', 'isindex', 'nextid', 'spacer',
+}
+ASCII_SPACES = '\x20\x0a\x09\x0c\x0d'
+
+
+class _Cell:
+    __slots__ = ('parts',)
+
+    def __init__(self):
+        self.parts = []
+
+    @property
+    def text(self):
+        return ''.join(self.parts)
+
+
+class ResultPageScanner(HTMLParser):
+    """Single-pass tokenizer for a VTU result page.
+
+    Collects the student name (the text after the "Student Name" label), the
+    semester heading ("Semester : 5") and the cells of every div.divTableRow
+    while the page streams through, without building a document tree.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.name = None
+        self.semester = None
+        self.rows = []
+        self._buf = []
+        self._skip = 0
+        self._stack = []         # open elements: (tag, row or None, cell or None)
+        self._open_rows = []     # cell lists of the currently open rows
+        self._open_cells = []
+        self._window = []        # last three stripped strings, for the name lookup
+
+    # --- TEXT ---
+    def handle_data(self, data):
+        if not self._skip:
+            self._buf.append(data)
+
+    def _flush(self):
+        if not self._buf: return
+        text = ''.join(self._buf)
+        self._buf = []
+        if not text.strip(ASCII_SPACES):
+            # Same whitespace collapsing as BeautifulSoup.
+            text = '\n' if '\n' in text else ' '
+        for cell in self._open_cells:
+            cell.parts.append(text)
+        stripped = text.strip()
+        if stripped.startswith('Semester'):
+            self._check_semester(stripped)
+        if stripped and self.name is None:
+            self._push_string(stripped)
+
+    def _check_semester(self, text):
+        # Backlog papers are listed under earlier semesters' headings; the page belongs to the latest.
+        value = text.partition(':')[2].strip()
+        if value.isdigit():
+            self.semester = max(self.semester or 0, int(value))
+
+    def _push_string(self, text):
+        self._window.append(text)
+        if len(self._window) > 3:
+            self._window.pop(0)
+        if len(self._window) == 3:
+            self._check_name(self._window[0], self._window[1], self._window[2])
+
+    def _check_name(self, label, first, second):
+        if "Student Name" not in label: return
+        if second is not None and len(second) > 2 and ":" not in second:
+            self.name = second.strip()
+        elif first is not None and len(first) > 3:
+            self.name = first.replace(":", "").strip()
+
+    # --- TAGS ---
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        if tag in VOID_TAGS: return
+        if tag in SKIP_TEXT_TAGS:
+            self._skip += 1
+            self._stack.append((tag, None, None))
+            return
+
+        row = cell = None
+        if tag == 'div':
+            classes = ()
+            for key, value in attrs:
+                if key == 'class' and value:
+                    classes = value.split()
+            if 'divTableCell' in classes:
+                cell = _Cell()
+                for open_row in self._open_rows:
+                    open_row.append(cell)
+                self._open_cells.append(cell)
+            if 'divTableRow' in classes:
+                row = []
+                self.rows.append(row)
+                self._open_rows.append(row)
+        self._stack.append((tag, row, cell))
+
+    def handle_endtag(self, tag):
+        self._flush()
+        # Like BeautifulSoup: close everything up to the most recent matching
+        # open tag, and ignore end tags that match nothing.
+        for i in range(len(self._stack) - 1, -1, -1):
+            if self._stack[i][0] == tag: break
+        else:
+            return
+        while len(self._stack) > i:
+            name, row, cell = self._stack.pop()
+            if name in SKIP_TEXT_TAGS: self._skip -= 1
+            if row is not None: self._open_rows.pop()
+            if cell is not None: self._open_cells.pop()
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self.handle_endtag(tag)
+
+    def handle_comment(self, data):
+        self._flush()
+
+    def handle_decl(self, decl):
+        self._flush()
+
+    def handle_pi(self, data):
+        self._flush()
+
+    def unknown_decl(self, data):
+        self._flush()
+        if data.startswith('CDATA['):
+            self._buf.append(data[len('CDATA['):])
+            self._flush()
+
+    def close(self):
+        super().close()
+        self._flush()
+        # Labels too close to the end of the page to have two strings after them.
+        pending = self._window[1:] if len(self._window) == 3 else self._window
+        for i, label in enumerate(pending):
+            if self.name is not None: break
+            rest = pending[i + 1:] + [None, None]
+            self._check_name(label, rest[0], rest[1])
+
+
+def scan_result_page(html):
+    """Return (name or None, [[cell text, ...] per divTableRow], semester or None) from one pass over `html`."""
+    scanner = ResultPageScanner()
+    scanner.feed(html)
+    scanner.close()
+    return scanner.name, [[cell.text for cell in row] for row in scanner.rows], scanner.semester
+
+
+# --- SUMMARY FIELDS ---
+def summarize_result(data, scheme=None):
+    """Add the numeric fields the read endpoints filter on, so they never re-derive them.
+
+    A result without subjects (a summary-only upload) gets no class band:
+    there is nothing to say whether it passed.
+    """
+    scheme = scheme or load_scheme()
+    subjects = data.get('subjects') or []
+    data['percentage_float'] = (data.get('total_marks', 0) / scheme.max_marks) * 100
+    data['failed_codes'] = [sub['code'] for sub in subjects if sub.get('result') != 'P']
+    data['failed_count'] = len(data['failed_codes'])
+    data['class_band'] = class_band(data['percentage_float'], data['failed_count']) if subjects else None
+    return data
+
+def grade_result(usn, name, subjects, scheme=None):
+    """Totals, SGPA, percentage and class for a list of {'code', 'name', 'total', 'result'} subjects."""
+    scheme = scheme or load_scheme()
+    data = {
+        'usn': usn, 'name': name, 'sgpa': "0.00", 'sgpa_float': 0.0, 
+        'percentage': "0.00%", 'total_marks': 0, 'class_result': "N/A", 
+        'subjects': []
+    }
+    try:
+        total_credits = 0; total_gp = 0; running_total_marks = 0 
+        
+        for sub in subjects:
+            try:
+                code = sub['code']
+                marks = sub['total']
+                credits = scheme.credits(code)
+                gp = grade_point(marks)
+                if credits > 0: total_credits += credits; total_gp += (credits * gp)
+                running_total_marks += int(marks)
+                data['subjects'].append({'code': code, 'name': sub['name'], 'total': marks, 'result': sub['result']})
+            except: continue
+        
+        data['total_marks'] = running_total_marks
+        
+        perc_val = 0.0
+        if total_credits > 0:
+            sgpa_val = total_gp / total_credits
+            data['sgpa'] = "{:.2f}".format(sgpa_val)
+            data['sgpa_float'] = float(sgpa_val)
+            perc_val = (running_total_marks / scheme.max_marks) * 100
+            data['percentage'] = "{:.2f}%".format(perc_val)
+        
+        # --- CALCULATE CLASS ---
+        if len(data['subjects']) > 0:
+            failed = sum(1 for sub in data['subjects'] if sub['result'] != 'P')
+            data['class_result'] = CLASS_LABELS[class_band(perc_val, failed)]
+
+    except Exception as e: print(e)
+    return summarize_result(data, scheme)
+
+def parse_result_page(html, usn, scheme=None):
+    """Parse and grade a result page, with the credit table for the page's semester unless `scheme` is given."""
+    name, div_rows, semester = scan_result_page(html)
+    subjects = [{'code': cells[0].strip(), 'name': cells[1].strip(), 'total': cells[4].strip(), 'result': cells[5].strip()}
+                for cells in div_rows if len(cells) >= 6]
+    scheme = scheme or load_scheme(scheme_name_for(usn, semester))
+    data = grade_result(usn, name if name is not None else "Unknown", subjects, scheme)
+    data['semester'] = semester if semester is not None else scheme.semester
+    return data
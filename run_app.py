@@ -1,41 +1,70 @@
 import os
+import sys
 import time
-import tempfile
-import subprocess
-from flask import Flask, render_template, request, jsonify
-from bs4 import BeautifulSoup
+import uuid
+import threading
+from datetime import datetime, timezone
+import json
+from flask import Flask, Response, render_template, request, jsonify, session, g
 from pymongo import MongoClient
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-
-# --- CLEANUP ---
-try:
-    subprocess.run(["pkill", "-f", "chromedriver"], check=False)
-except: 
-    pass
+from browser_pool import PoolExhausted
+from result_detector import PhaseTimer
+from result_parser import parse_result_page
+from leaderboard import Leaderboard, session_page, session_rows
+from distribution import Distribution
+from rank_service import RankService
+from analysis import analysis_report, analysis_rows
+from response_cache import ResponseCache, cached_json
+from result_cache import ResultCache, RESULT_REVALIDATE, fetched_iso
+from page_archive import open_archive
+from live_feed import LiveFeed, sse_stream, start_id
+from export import ANALYSIS_COLUMNS, EXPORT_FORMATS, LEADERBOARD_COLUMNS, export_columns, export_response
+from batch_jobs import BatchManager, parse_usn_range
+from captcha_prefetch import CaptchaPrefetcher
+from metrics import CAPTCHA_LOADS, VTU_OUTCOMES, REQUESTS, REQUEST_SECONDS, gauge, observe_phases, render as render_metrics
+from ingest import MAX_BODY_BYTES, SubmissionError, parse_submission, normalize_record, stored_versions, submit_denied, upsert_op
+from students import EXAM_SESSION, ensure_student_indexes, result_key, stamp_session, validate_usn
+from transcripts import record_transcripts
+from vtu_http import VTUHttpEngine
+from vtu_selenium import SeleniumEngine
 
 app = Flask(__name__)
 app.secret_key = 'vtu_final_secret'
+# Compressed /submit_result bodies are capped here; ingest caps them again once inflated.
+app.config['MAX_CONTENT_LENGTH'] = MAX_BODY_BYTES
 
 # --- DATABASE CONNECTION ---
 MONGO_URI = os.environ.get('MONGO_URI', 'mongodb://127.0.0.1:27017/')
+MONGO_DB = os.environ.get('MONGO_DB', 'university_db')
+DB_RETRY_MAX = int(os.environ.get('DB_RETRY_MAX', 60))
+DB_REQUEST_WAIT = float(os.environ.get('DB_REQUEST_WAIT', 5))
 
+client = None
 db = None
 students_col = None
+page_archive = None
 db_connected = False
+db_ready = threading.Event()
+# Startup phases reported on /health; the app serves while these finish in the background.
+startup_phases = {'database': 'pending', 'views': 'pending'}
 
 def connect_db():
-    global db, students_col, db_connected
+    global client, db, students_col, page_archive, db_connected
     try:
         print("🔄 Connecting to MongoDB...")
-        client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=10000)
+        # One client for every attempt: it keeps reconnecting on its own, and a new one per retry would leak.
+        if client is None:
+            client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=10000)
         client.admin.command('ping')
-        db = client['university_db']
+        db = client[MONGO_DB]
         students_col = db['students']
+        ensure_indexes()
+        try:
+            page_archive = open_archive(db)
+        except Exception as e:
+            print(f"⚠️ Page archive disabled: {str(e)}")
         db_connected = True
+        db_ready.set()
         print("✅ Database Connected Successfully!")
         return True
     except Exception as e:
@@ -43,40 +72,111 @@ def connect_db():
         print(f"❌ DATABASE CONNECTION FAILED: {str(e)}")
         return False
 
-connect_db()
-
-# --- BROWSER INITIALIZATION ---
-driver = None
-
-def init_driver():
-    global driver
-    if driver is None:
-        print("🔵 Initializing Invisible Browser...")
-        chrome_options = Options()
-        chrome_options.add_argument("--headless=new")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--window-size=1920,1080")
-        
-        prefs = {"profile.default_content_setting_values.popups": 1}
-        chrome_options.add_experimental_option("prefs", prefs)
-        chrome_options.add_argument("--disable-popup-blocking")
-        
-        if os.environ.get('CHROME_BIN'):
-            chrome_options.binary_location = os.environ.get('CHROME_BIN')
-        else:
-            chrome_options.binary_location = "/usr/bin/chromium"
-        
-        user_data_dir = tempfile.mkdtemp()
-        chrome_options.add_argument(f"--user-data-dir={user_data_dir}")
-        
-        try:
-            driver = webdriver.Chrome(options=chrome_options)
-            print("✅ Browser Started Successfully")
-        except Exception as e:
-            print(f"❌ Browser Error: {e}")
-            chrome_options.binary_location = None
-            driver = webdriver.Chrome(options=chrome_options)
+def ensure_indexes():
+    try:
+        ensure_student_indexes(students_col)
+    except Exception as e:
+        print(f"⚠️ Could not create indexes: {str(e)}")
+
+def require_db(timeout=DB_REQUEST_WAIT):
+    """Wait briefly for the background connection instead of opening another one."""
+    db_ready.wait(timeout)
+    return db_connected
+
+def connect_in_background():
+    """Connect with exponential backoff, then load the in-memory views."""
+    delay = 1
+    attempt = 1
+    while True:
+        startup_phases['database'] = 'connecting' if attempt == 1 else f'retrying (attempt {attempt})'
+        if connect_db(): break
+        time.sleep(delay)
+        delay = min(delay * 2, DB_RETRY_MAX)
+        attempt += 1
+    startup_phases['database'] = 'ready'
+
+    startup_phases['views'] = 'loading'
+    try:
+        for view in (leaderboard, distribution, rank_service):
+            view.load(students_col)
+        startup_phases['views'] = 'ready'
+    except Exception as e:
+        startup_phases['views'] = 'pending'   # loaded on first use instead
+        print(f"⚠️ Could not preload views: {str(e)}")
+
+# --- LEADERBOARD ---
+LEADERBOARD_PAGE_SIZE = 50
+LEADERBOARD_MAX_PAGE = 500
+leaderboard = Leaderboard()
+distribution = Distribution()
+rank_service = RankService()
+response_cache = ResponseCache()
+result_cache = ResultCache()
+live_feed = LiveFeed()
+
+def record_student(student_data, page_digest=None):
+    """Store a result fetched from VTU; `page_digest` is its archived page, which lets reparse.py rewrite it."""
+    stamp_session(student_data)
+    student_data.update(record_transcripts(db['transcripts'], [student_data]).get(student_data['usn'], {}))
+    fetched_at = datetime.now(timezone.utc)
+    students_col.update_one(result_key(student_data),
+                            {'$set': {**student_data, 'fetched_at': fetched_at, 'page_digest': page_digest,
+                                      'source': 'vtu'}}, upsert=True)
+    delta = leaderboard.upsert(student_data)
+    distribution.upsert(student_data)
+    rank_service.upsert(student_data)
+    result_cache.put(student_data, fetched_at.timestamp())
+    response_cache.bump()
+    if delta: live_feed.publish(delta)
+
+def record_students(students):
+    """Upsert many uploaded results in one unordered bulk write."""
+    if not students: return None
+    for s in students:
+        stamp_session(s)
+    cgpa = record_transcripts(db['transcripts'], students)
+    for s in students:
+        s.update(cgpa.get(s['usn'], {}))
+    extra = {'fetched_at': datetime.now(timezone.utc), 'page_digest': None, 'source': 'upload'}
+    result = students_col.bulk_write([upsert_op(s, extra) for s in students], ordered=False)
+    # Summary-only uploads did not replace graded records; the views follow what was stored.
+    students = stored_versions(students_col, students)
+    deltas = []
+    for s in students:
+        deltas.append(leaderboard.upsert(s))
+        distribution.upsert(s)
+        rank_service.upsert(s)
+        result_cache.discard(s['usn'])
+    response_cache.bump()
+    for delta in deltas:
+        if delta: live_feed.publish(delta)
+    return result
+
+threading.Thread(target=connect_in_background, name='db-connect', daemon=True).start()
+
+# --- FETCH ENGINES ---
+# 'http' talks to VTU with plain requests, 'selenium' drives headless Chromium,
+# 'auto' uses http and only falls back to Chromium when it fails.
+FETCH_ENGINE = os.environ.get('FETCH_ENGINE', 'auto')
+engines = {'http': VTUHttpEngine(), 'selenium': SeleniumEngine()}
+
+def engine_order():
+    if FETCH_ENGINE == 'auto':
+        return ['http', 'selenium']
+    return [FETCH_ENGINE]
+
+def client_token():
+    token = session.get('browser_token')
+    if token is None:
+        token = uuid.uuid4().hex
+        session['browser_token'] = token
+    return token
+
+# Warm captcha sessions handed to /get_captcha; load_captcha is defined with the routes below.
+captcha_prefetcher = CaptchaPrefetcher(
+    load_captcha=lambda token: load_captcha(token),
+    release=lambda name, token: engines[name].release(token),
+)
 
 # --- ROUTES ---
 
@@ -86,328 +186,441 @@ def home():
 
 @app.route('/get_captcha')
 def get_captcha():
-    global driver
+    timer = PhaseTimer()
+    captcha_prefetcher.start()
+    prefetched = captcha_prefetcher.take()
+    timer.mark('prefetch')
+    if prefetched is not None:
+        # Hand over a warm session: the client now submits against the prefetched token.
+        token, name, image, content_type = prefetched
+        old_engine = engines.get(session.get('engine'))
+        if old_engine is not None and session.get('browser_token'):
+            old_engine.release(session['browser_token'])
+        session['browser_token'] = token
+        session['engine'] = name
+        observe_phases('get_captcha', timer.timings)
+        return image, 200, {'Content-Type': content_type}
+
+    token = client_token()
     try:
-        if driver is None: init_driver()
-        try:
-            driver.get("https://results.vtu.ac.in/D25J26Ecbcs/index.php")
-        except:
-            if driver: 
-                try: driver.quit()
-                except: pass
-            driver = None
-            init_driver()
-            driver.get("https://results.vtu.ac.in/D25J26Ecbcs/index.php")
-
-        wait = WebDriverWait(driver, 15)
-        captcha_img = wait.until(EC.presence_of_element_located((By.XPATH, "//img[contains(@src, 'captcha')]")))
-        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", captcha_img)
-        time.sleep(0.5)
-        return captcha_img.screenshot_as_png, 200, {'Content-Type': 'image/png'}
+        name, image, content_type = load_captcha(token)
+        session['engine'] = name
+        return image, 200, {'Content-Type': content_type}
+    except PoolExhausted:
+        return "Server Busy", 503
     except Exception as e:
         return "Browser Error", 500
+    finally:
+        timer.mark('load')
+        observe_phases('get_captcha', timer.timings)
 
 @app.route('/leaderboard')
+@cached_json(response_cache)
 def get_leaderboard():
     global students_col, db_connected
-    if not db_connected: connect_db()
+    require_db()
     
     sort_by = request.args.get('sort', 'total_marks')
     order = request.args.get('order', 'desc')
+    prefix = request.args.get('q', '').strip()
+    fields = request.args.get('fields')
+    exam_session = request.args.get('session', EXAM_SESSION)
+
+    try:
+        limit = min(max(int(request.args.get('limit', LEADERBOARD_PAGE_SIZE)), 1), LEADERBOARD_MAX_PAGE)
+        offset = max(int(request.args.get('cursor') or 0), 0)
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'Invalid limit or cursor'})
 
+    timer = PhaseTimer()
     try:
-        all_students = list(students_col.find(
-            {}, 
-            {'_id': 0, 'usn': 1, 'name': 1, 'total_marks': 1, 'sgpa': 1, 'sgpa_float': 1, 'percentage': 1}
-        ))
-        
-        all_students.sort(key=lambda x: x.get('total_marks', 0), reverse=True)
-        for index, student in enumerate(all_students):
-            student['rank'] = index + 1
-            if 'percentage' not in student: 
-                marks = student.get('total_marks', 0)
-                student['percentage'] = "{:.2f}%".format((marks / 900) * 100)
-
-        reverse_order = True if order == 'desc' else False
-        
-        if sort_by == 'sgpa':
-            all_students.sort(key=lambda x: x.get('sgpa_float', 0.0), reverse=reverse_order)
-        elif sort_by == 'total_marks':
-            all_students.sort(key=lambda x: x.get('total_marks', 0), reverse=reverse_order)
-        elif sort_by == 'rank':
-            all_students.sort(key=lambda x: x.get('rank', 9999), reverse=not reverse_order)
-
-        return jsonify({'status': 'success', 'data': all_students})
+        if exam_session == leaderboard.session:
+            leaderboard.load(students_col)
+            timer.mark('load')
+            rows, total = leaderboard.page(sort_by, order, offset, limit, prefix)
+        else:
+            # Past sessions are not kept in memory; page them straight off the (exam_session, ...) indexes.
+            rows, total = session_page(students_col, exam_session, sort_by, order, offset, limit, prefix)
+        if fields:
+            wanted = set(fields.split(','))
+            rows = [{k: v for k, v in row.items() if k in wanted} for row in rows]
+        timer.mark('page')
+        next_offset = offset + len(rows)
+        next_cursor = str(next_offset) if next_offset < total else None
+        return jsonify({'status': 'success', 'data': rows, 'total': total, 'next_cursor': next_cursor})
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)})
+    finally:
+        observe_phases('leaderboard', timer.timings)
 
 @app.route('/analysis')
+@cached_json(response_cache)
 def get_analysis():
     global students_col, db_connected
-    if not db_connected: connect_db()
+    require_db()
     
-    subject_code = request.args.get('subject')
-    stats = {'total': 0, 'pass': 0, 'fail': 0}
-    result_list = []
+    subject_code = request.args.get('subject', 'overall')
+    exam_session = request.args.get('session', EXAM_SESSION)
 
+    timer = PhaseTimer()
     try:
-        if subject_code.startswith('class_'):
-            # --- CLASS EQUIVALENCE LOGIC (LIST FILTER) ---
-            students = list(students_col.find({}, {'_id': 0, 'usn': 1, 'name': 1, 'total_marks': 1, 'subjects': 1}))
-            class_type = subject_code.split('_')[1]
-            
-            for s in students:
-                has_failed = any(sub['result'] != 'P' for sub in s['subjects'])
-                if has_failed: continue 
-
-                try:
-                    perc = (s.get('total_marks', 0) / 900) * 100
-                except: perc = 0
-                
-                match = False
-                status_label = ""
-                
-                if class_type == 'fcd' and perc >= 70:
-                    match = True; status_label = "Distinction"
-                elif class_type == 'fc' and 60 <= perc < 70:
-                    match = True; status_label = "First Class"
-                elif class_type == 'sc' and 50 <= perc < 60:
-                    match = True; status_label = "Second Class"
-                elif class_type == 'p' and 40 <= perc < 50:
-                    match = True; status_label = "Pass Class"
-
-                if match:
-                    result_list.append({
-                        'usn': s['usn'], 'name': s['name'],
-                        'marks': f"{perc:.2f}%", 'status': status_label
-                    })
-            
-            # Sort by USN
-            result_list.sort(key=lambda x: x['usn'])
-            
-            stats['total'] = len(result_list)
-            stats['pass'] = len(result_list)
-            stats['fail'] = 0
-
-        elif subject_code and subject_code != 'overall':
-            # --- SPECIFIC SUBJECT FAILURE ---
-            query = {"subjects.code": subject_code}
-            students = list(students_col.find(query, {'_id': 0, 'usn': 1, 'name': 1, 'subjects': 1}))
-            stats['total'] = len(students)
-            
-            for s in students:
-                subject_data = next((sub for sub in s['subjects'] if sub['code'] == subject_code), None)
-                if subject_data:
-                    if subject_data['result'] == 'P':
-                        stats['pass'] += 1
-                    else:
-                        stats['fail'] += 1
-                        result_list.append({
-                            'usn': s['usn'], 'name': s['name'],
-                            'marks': subject_data['total'], 'status': subject_data['result']
-                        })
-            
-            # Sort by USN
-            result_list.sort(key=lambda x: x['usn'])
-            
-        else:
-            # --- OVERALL FAILURES ---
-            students = list(students_col.find({}, {'_id': 0, 'usn': 1, 'name': 1, 'subjects': 1}))
-            stats['total'] = len(students)
-            
-            for s in students:
-                has_failed = False
-                failed_subjects = []
-                for sub in s['subjects']:
-                    if sub['result'] != 'P':
-                        has_failed = True
-                        failed_subjects.append(f"{sub['code']} ({sub['total']})")
-                
-                if has_failed:
-                    stats['fail'] += 1
-                    result_list.append({
-                        'usn': s['usn'], 'name': s['name'],
-                        'marks': ', '.join(failed_subjects), 'status': 'FAIL'
-                    })
-                else:
-                    stats['pass'] += 1
-            
-            # Sort by USN
-            result_list.sort(key=lambda x: x['usn'])
-
+        stats, result_list = analysis_report(students_col, subject_code, exam_session)
+        timer.mark('query')
         return jsonify({'status': 'success', 'stats': stats, 'data': result_list})
     
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)})
+    finally:
+        observe_phases('analysis', timer.timings)
+
+@app.route('/stats/distribution')
+def get_distribution():
+    global students_col, db_connected
+    require_db()
+
+    try:
+        distribution.load(students_col)
+        return jsonify({'status': 'success', **distribution.snapshot()})
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': str(e)})
+
+# --- LIVE UPDATES ---
+# Every stored result is pushed to open leaderboards as a delta (the student, their new
+# rank and the rank ranges that shifted) instead of clients refetching the list.
+
+@app.route('/leaderboard/stream')
+def leaderboard_stream():
+    if not live_feed.open_stream():
+        return jsonify({'status': 'error', 'message': 'Too many live clients, poll /leaderboard/updates'}), 503
+    last_id = start_id(live_feed, request.headers.get('Last-Event-ID') or request.args.get('since'))
+    resp = Response(sse_stream(live_feed, last_id), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    resp.call_on_close(live_feed.close_stream)
+    return resp
+
+@app.route('/leaderboard/updates')
+def leaderboard_updates():
+    """Deltas after ?since= without holding a connection open (fallback for /leaderboard/stream)."""
+    last_id = start_id(live_feed, request.args.get('since'))
+    events = live_feed.since(last_id)
+    if events is None:
+        return jsonify({'status': 'success', 'resync': True, 'last_id': live_feed.last_id, 'events': []})
+    return jsonify({'status': 'success', 'resync': False, 'last_id': events[-1][0] if events else last_id,
+                    'events': [dict(json.loads(data), id=event_id) for event_id, data in events]})
+
+# --- EXPORT ---
+# Spreadsheet downloads of /leaderboard and /analysis with the same query parameters
+# (plus format=csv|xlsx), streamed from a Mongo cursor so memory stays flat.
+
+def export_format():
+    fmt = request.args.get('format', 'csv')
+    return fmt if fmt in EXPORT_FORMATS else None
+
+@app.route('/export/leaderboard')
+def export_leaderboard():
+    if not require_db():
+        return jsonify({'status': 'error', 'message': 'Database not connected'}), 503
+    fmt = export_format()
+    if fmt is None:
+        return jsonify({'status': 'error', 'message': f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+
+    sort_by = request.args.get('sort', 'total_marks')
+    order = request.args.get('order', 'desc')
+    prefix = request.args.get('q', '').strip()
+    exam_session = request.args.get('session', EXAM_SESSION)
+    columns = export_columns(LEADERBOARD_COLUMNS, request.args.get('fields'))
+
+    rank_of = None
+    if exam_session == leaderboard.session:
+        leaderboard.load(students_col)
+        rank_of = leaderboard.rank_of
+    rows = session_rows(students_col, exam_session, sort_by, order, prefix, rank_of=rank_of)
+    return export_response(fmt, columns, rows, f"leaderboard_{exam_session}")
+
+@app.route('/export/analysis')
+def export_analysis():
+    if not require_db():
+        return jsonify({'status': 'error', 'message': 'Database not connected'}), 503
+    fmt = export_format()
+    if fmt is None:
+        return jsonify({'status': 'error', 'message': f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+
+    subject_code = request.args.get('subject', 'overall')
+    exam_session = request.args.get('session', EXAM_SESSION)
+    rows = analysis_rows(students_col, subject_code, exam_session)
+    return export_response(fmt, ANALYSIS_COLUMNS, rows, f"analysis_{exam_session}_{subject_code}")
+
+def load_captcha(token):
+    """Load a fresh captcha for `token`, trying each configured engine. Returns (engine name, image, content type)."""
+    last_error = None
+    for name in engine_order():
+        try:
+            image, content_type = engines[name].get_captcha(token)
+            CAPTCHA_LOADS.inc(name, 'success')
+            return name, image, content_type
+        except PoolExhausted:
+            CAPTCHA_LOADS.inc(name, 'busy')
+            raise
+        except Exception as e:
+            CAPTCHA_LOADS.inc(name, 'error')
+            print(f"❌ {name} engine could not load captcha: {e}")
+            last_error = e
+    raise last_error or RuntimeError("No fetch engine configured")
+
+def archive_page(usn, html, parsed):
+    """Keep the raw result page so it can be re-parsed later (reparse.py) without VTU. Returns its digest."""
+    if page_archive is None: return None
+    try:
+        return page_archive.put(usn, html, parsed, EXAM_SESSION)
+    except Exception as e:
+        print(f"⚠️ Could not archive page for {usn}: {str(e)}")
+        return None
+
+def scrape_result(engine, token, usn, captcha_text, timer):
+    """Submit a solved captcha and store the parsed result. Returns (student_data, None) or (None, error message)."""
+    outcome = 'error'
+    try:
+        outcome, payload = engine.submit(token, usn, captcha_text, timer)
+        if outcome == 'expired':
+            return None, 'Session expired. Reload Captcha.'
+        if outcome == 'alert':
+            return None, f"VTU Says: {payload}"
+        if outcome == 'timeout':
+            return None, 'Result Window did not open. Reload Captcha.'
+
+        student_data = parse_result_page(payload, usn)
+        timer.mark('parse')
+        digest = archive_page(usn, payload, student_data['name'] != "Unknown")
+        timer.mark('archive')
+        if student_data['name'] == "Unknown":
+            outcome = 'unparsed'
+            return None, 'Could not parse result.'
+
+        outcome = 'error'   # until the upsert succeeds
+        if db_connected:
+            record_student(student_data, digest)
+            timer.mark('upsert')
+        outcome = 'success'
+        return student_data, None
+    finally:
+        VTU_OUTCOMES.inc(engine.name, outcome)
+        engine.release(token)
+
+def revalidate_result(engine, token, usn, captcha_text):
+    """Re-fetch a stale stored result in the background with the captcha the client already solved."""
+    try:
+        _, error = scrape_result(engine, token, usn, captcha_text, PhaseTimer())
+        if error: print(f"⚠️ Background refresh of {usn} failed: {error}")
+    except Exception as e:
+        print(f"⚠️ Background refresh of {usn} failed: {e}")
+    finally:
+        result_cache.end_refresh(usn)
+
+def result_response(student_data, fetched_at, timer, cached=False, stale=False, refreshing=False):
+    ranks = None
+    if db_connected:
+        rank_service.load(students_col)
+        ranks = rank_service.ranks(student_data['usn'])
+    if ranks is None:
+        ranks = {'uni_rank': "N/A", 'coll_rank': "N/A", 'branch_rank': "N/A"}
+    timer.mark('rank')
+    print(f"⏱️ {student_data['usn']} timings (ms): {timer.timings}")
+
+    return jsonify({'status': 'success', 'data': student_data, 'ranks': ranks, 'fetched_at': fetched_iso(fetched_at),
+                    'cached': cached, 'stale': stale, 'refreshing': refreshing, 'timings': timer.timings})
 
 @app.route('/fetch_result', methods=['POST'])
 def fetch_result():
     global students_col, db_connected
-    if not db_connected: connect_db()
+    require_db()
     
     usn = request.form['usn'].strip().upper()
     captcha_text = request.form['captcha'].strip()
     
-    if not (usn.startswith('1DB23CS') or usn.startswith('1DB24CS')):
-        return jsonify({'status': 'error', 'message': 'Invalid USN! Only 1DB23CS... allowed'})
-    
-    if len(usn) != 10:
-        return jsonify({'status': 'error', 'message': 'Invalid USN Length'})
+    error = validate_usn(usn)
+    if error:
+        return jsonify({'status': 'error', 'message': error})
     
+    token = client_token()
+    engine = engines.get(session.get('engine'))
+
+    timer = PhaseTimer()
     try:
-        if not driver: init_driver()
-        if "results.vtu.ac.in" not in driver.current_url:
-            driver.get("https://results.vtu.ac.in/D25J26Ecbcs/index.php")
-        
-        wait = WebDriverWait(driver, 15)
-        
-        wait.until(EC.presence_of_element_located((By.NAME, "lns"))).send_keys(usn)
-        wait.until(EC.presence_of_element_located((By.NAME, "captchacode"))).send_keys(captcha_text)
-        
-        submit_btn = wait.until(EC.element_to_be_clickable((By.XPATH, "//input[@type='submit']")))
-        driver.execute_script("arguments[0].click();", submit_btn)
-        
-        time.sleep(2)
-        try:
-            WebDriverWait(driver, 3).until(EC.alert_is_present())
-            alert = driver.switch_to.alert
-            txt = alert.text
-            alert.accept()
-            return jsonify({'status': 'error', 'message': f"VTU Says: {txt}"})
-        except: pass
-
-        result_found = False
-        try:
-            for i in range(10):
-                if len(driver.window_handles) > 1:
-                    driver.switch_to.window(driver.window_handles[-1])
-                    result_found = True
-                    break
-                time.sleep(1)
-        except: pass
-        
-        if not result_found:
-            soup_check = BeautifulSoup(driver.page_source, 'html.parser')
-            if "Student Name" in soup_check.get_text():
-                result_found = True
-            else:
-                return jsonify({'status': 'error', 'message': 'Result Window did not open. Reload Captcha.'})
-
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-        student_data = parse_result_page(soup, usn)
-        
-        if student_data['name'] != "Unknown":
-            if db_connected:
-                students_col.update_one({'usn': usn}, {'$set': student_data}, upsert=True)
-                my_total = student_data.get('total_marks', 0)
-                uni_rank = students_col.count_documents({'total_marks': {'$gt': my_total}}) + 1
-            else:
-                uni_rank = "N/A"
-
-            if len(driver.window_handles) > 1:
-                driver.close()
-                driver.switch_to.window(driver.window_handles[0])
-            
-            return jsonify({'status': 'success', 'data': student_data, 'ranks': {'uni_rank': uni_rank, 'coll_rank': "N/A"}})
-        else:
-            if len(driver.window_handles) > 1:
-                driver.close()
-                driver.switch_to.window(driver.window_handles[0])
-            return jsonify({'status': 'error', 'message': 'Could not parse result.'})
+        # Serve a stored result when it is fresh enough (or, with RESULT_REVALIDATE, serve it
+        # and refresh it in the background); refresh=1 always goes to VTU.
+        cached = None
+        if db_connected and request.form.get('refresh') != '1':
+            cached = result_cache.lookup(usn, students_col)
+            timer.mark('cache')
+        if cached is not None:
+            student_data, fetched_at = cached
+            fresh = result_cache.is_fresh(fetched_at)
+            if fresh or (RESULT_REVALIDATE and engine is not None):
+                refreshing = not fresh and result_cache.begin_refresh(usn)
+                if refreshing:
+                    # The refresh owns this VTU session now; the next /get_captcha starts a new one.
+                    session.pop('browser_token', None)
+                    threading.Thread(target=revalidate_result, args=(engine, token, usn, captcha_text),
+                                     name=f'refresh-{usn}', daemon=True).start()
+                elif engine is not None:
+                    engine.release(token)
+                return result_response(student_data, fetched_at, timer, cached=True, stale=not fresh,
+                                       refreshing=refreshing)
+
+        if engine is None:
+            return jsonify({'status': 'error', 'message': 'Session expired. Reload Captcha.'})
+        student_data, error = scrape_result(engine, token, usn, captcha_text, timer)
+        if error:
+            return jsonify({'status': 'error', 'message': error, 'timings': timer.timings})
+        return result_response(student_data, time.time(), timer)
 
     except Exception as e:
         return jsonify({'status': 'error', 'message': f'System Error: {str(e)}'})
+    finally:
+        observe_phases('fetch_result', timer.timings)
+
+# --- INGESTION ---
+@app.route('/submit_result', methods=['POST'])
+def submit_result():
+    global students_col, db_connected
+    require_db()
+    if not db_connected:
+        return jsonify({'status': 'error', 'message': 'Database not connected'}), 503
+    denied = submit_denied(request.headers.get('X-Submit-Token'))
+    if denied:
+        return jsonify({'status': 'error', 'message': denied}), 403
 
-# --- HELPERS ---
-def get_credits_2022_cs_5th(sub_code):
-    code = sub_code.upper().strip()
-    if "BCS501" in code: return 3  
-    if "BCS502" in code: return 4  
-    if "BCS503" in code: return 4  
-    if "BCSL504" in code: return 1 
-    if "BCS515" in code or "BCS505" in code: return 3 
-    if "BCS586" in code: return 2  
-    if "BRMK557" in code: return 3 
-    if "BESK508" in code or "BCS508" in code: return 1 
-    return 0 
-
-def calculate_grade_point(marks):
     try:
-        m = int(marks)
-        if 90 <= m <= 100: return 10
-        if 80 <= m < 90: return 9
-        if 70 <= m < 80: return 8
-        if 60 <= m < 70: return 7
-        if 55 <= m < 60: return 6
-        if 50 <= m < 55: return 5
-        if 40 <= m < 50: return 4
-        return 0 
-    except: return 0
-
-def parse_result_page(soup, usn):
-    data = {
-        'usn': usn, 'name': "Unknown", 'sgpa': "0.00", 'sgpa_float': 0.0, 
-        'percentage': "0.00%", 'total_marks': 0, 'class_result': "N/A", 
-        'subjects': []
-    }
+        records = parse_submission(request.get_data(), request.content_type, request.content_encoding)
+    except SubmissionError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    students, errors = {}, []
+    for index, raw in enumerate(records):
+        student_data, error = normalize_record(raw, validate_usn)
+        if error:
+            errors.append({'index': index, 'usn': raw.get('usn') if isinstance(raw, dict) else None, 'message': error})
+        else:
+            # Last one wins within a request, per result: two semesters of a USN are both kept.
+            students[tuple(result_key(stamp_session(student_data)).values())] = student_data
+
+    try:
+        result = record_students(list(students.values()))
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': f'System Error: {str(e)}'}), 500
+
+    # 400 when no record could be stored, so a rejected upload is never mistaken for a stored one.
+    return jsonify({
+        'status': 'success' if students else 'error',
+        'accepted': len(students),
+        'upserted': result.upserted_count if result else 0,
+        'modified': result.modified_count if result else 0,
+        'errors': errors,
+    }), 200 if students else 400
+
+# --- BATCH FETCH ---
+batch_manager = BatchManager(
+    load_captcha=load_captcha,
+    submit=lambda name, token, usn, captcha, timer: scrape_result(engines[name], token, usn, captcha, timer),
+    jobs_col=lambda: db['batch_jobs'] if db_connected else None,
+)
+
+@app.route('/batch')
+def batch_page():
+    return render_template('batch.html')
+
+@app.route('/batch/jobs', methods=['POST'])
+def create_batch():
+    require_db()
     try:
-        all_text = list(soup.stripped_strings)
-        for i, text in enumerate(all_text):
-            if "Student Name" in text:
-                if i+2 < len(all_text) and len(all_text[i+2]) > 2 and ":" not in all_text[i+2]:
-                    data['name'] = all_text[i+2].strip()
-                    break
-                elif i+1 < len(all_text) and len(all_text[i+1]) > 3:
-                    data['name'] = all_text[i+1].replace(":", "").strip()
-                    break
-        
-        div_rows = soup.find_all('div', class_='divTableRow')
-        total_credits = 0; total_gp = 0; running_total_marks = 0 
-        
-        for row in div_rows:
-            cells = row.find_all('div', class_='divTableCell')
-            if len(cells) >= 6:
-                try:
-                    code = cells[0].text.strip()
-                    marks = cells[4].text.strip()
-                    credits = get_credits_2022_cs_5th(code)
-                    gp = calculate_grade_point(marks)
-                    if credits > 0: total_credits += credits; total_gp += (credits * gp)
-                    running_total_marks += int(marks)
-                    data['subjects'].append({'code': code, 'name': cells[1].text.strip(), 'total': marks, 'result': cells[5].text.strip()})
-                except: continue
-        
-        data['total_marks'] = running_total_marks
-        
-        perc_val = 0.0
-        if total_credits > 0:
-            sgpa_val = total_gp / total_credits
-            data['sgpa'] = "{:.2f}".format(sgpa_val)
-            data['sgpa_float'] = float(sgpa_val)
-            perc_val = (running_total_marks / 900) * 100
-            data['percentage'] = "{:.2f}%".format(perc_val)
-        
-        # --- CALCULATE CLASS ---
-        has_failed = False
-        if len(data['subjects']) > 0:
-            for sub in data['subjects']:
-                if sub['result'] != 'P': has_failed = True; break
-            
-            if has_failed:
-                data['class_result'] = "Fail"
-            else:
-                if perc_val >= 70: data['class_result'] = "First Class with Distinction"
-                elif 60 <= perc_val < 70: data['class_result'] = "First Class"
-                elif 50 <= perc_val < 60: data['class_result'] = "Second Class"
-                elif 40 <= perc_val < 50: data['class_result'] = "Pass Class"
-                else: data['class_result'] = "Fail"
-
-    except Exception as e: print(e)
-    return data
+        usns = parse_usn_range(request.form.get('range', ''))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)})
+    if not usns:
+        return jsonify({'status': 'error', 'message': 'Enter a USN range like 1DB23CS001-120'})
+    for usn in usns:
+        error = validate_usn(usn)
+        if error:
+            return jsonify({'status': 'error', 'message': f"{usn}: {error}"})
+    job = batch_manager.create(usns)
+    return jsonify({'status': 'success', 'job': job.progress()})
+
+@app.route('/batch/jobs/<job_id>')
+def batch_progress(job_id):
+    job = batch_manager.get(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Unknown batch job'}), 404
+    return jsonify({'status': 'success', 'job': job.progress()})
+
+@app.route('/batch/jobs/<job_id>/captcha/<usn>')
+def batch_captcha(job_id, usn):
+    job = batch_manager.get(job_id)
+    captcha = batch_manager.captcha(job, usn) if job else None
+    if captcha is None:
+        return "Captcha not ready", 404
+    return captcha[1], 200, {'Content-Type': captcha[2]}
+
+@app.route('/batch/jobs/<job_id>/solve', methods=['POST'])
+def batch_solve(job_id):
+    job = batch_manager.get(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Unknown batch job'}), 404
+    usn = request.form['usn'].strip().upper()
+    if not batch_manager.solve(job, usn, request.form['captcha'].strip()):
+        return jsonify({'status': 'error', 'message': f"{usn} has no captcha waiting"})
+    return jsonify({'status': 'success'})
+
+@app.route('/batch/jobs/<job_id>/retry', methods=['POST'])
+def batch_retry(job_id):
+    job = batch_manager.get(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Unknown batch job'}), 404
+    batch_manager.retry(job)
+    return jsonify({'status': 'success', 'job': job.progress()})
+
+# --- METRICS ---
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    endpoint = request.endpoint or 'unmatched'
+    if 'request_start' in g:
+        REQUEST_SECONDS.observe(time.perf_counter() - g.request_start, endpoint)
+    REQUESTS.inc(endpoint, str(response.status_code))
+    return response
+
+def browser_pool_gauge():
+    stats = engines['selenium'].pool_stats()
+    if stats is None: return {}
+    return {('leased',): stats['leased'], ('idle',): stats['idle'], ('max',): stats['max_size']}
+
+gauge('mongodb_connected', "1 once the MongoDB connection is up.", lambda: int(db_connected))
+gauge('browser_pool_browsers', "Headless browsers by state (empty until Chromium is first used).",
+      browser_pool_gauge, ('state',))
+gauge('http_engine_sessions', "Open VTU sessions held by the HTTP engine.", lambda: engines['http'].session_count())
+gauge('captcha_prefetch', "Captcha prefetch queue.",
+      lambda: {(k,): v for k, v in captcha_prefetcher.stats().items()}, ('stat',))
+gauge('response_cache', "Leaderboard / analysis response cache.",
+      lambda: {(k,): v for k, v in response_cache.stats().items()}, ('stat',))
+gauge('result_cache', "USN-keyed stored result cache used by /fetch_result.",
+      lambda: {(k,): v for k, v in result_cache.stats().items()}, ('stat',))
+gauge('leaderboard_students', "Students in the in-memory leaderboard.", lambda: len(leaderboard))
+gauge('live_feed', "Live leaderboard feed (/leaderboard/stream).",
+      lambda: {(k,): v for k, v in live_feed.stats().items()}, ('stat',))
+
+@app.route('/metrics')
+def metrics_endpoint():
+    return render_metrics(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
 
 @app.route('/health')
 def health_check():
-    return jsonify({'status': 'healthy', 'database_connected': db_connected})
+    phases = dict(startup_phases)
+    phases['selenium'] = 'loaded' if 'selenium' in sys.modules else 'deferred'
+    ready = phases['database'] == 'ready' and phases['views'] == 'ready'
+    return jsonify({'status': 'healthy', 'ready': ready, 'database_connected': db_connected, 'phases': phases,
+                    'captcha_prefetch': captcha_prefetcher.stats()})
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5001))
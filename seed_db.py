@@ -1,25 +1,22 @@
+import argparse
 from pymongo import MongoClient
-import random
+from bench.datagen import seed_collection
 
-# Connect to MongoDB
-client = MongoClient('mongodb://127.0.0.1:27017/')
-db = client['university_db']
-students_col = db['students']
+# Usage: python seed_db.py [count] [--uri URI] [--db NAME]  (synthetic students, same schema the app writes)
+# The students collection is dropped first, so the server is never taken from MONGO_URI:
+# seeding anything but the local one needs an explicit --uri.
+LOCAL_URI = 'mongodb://127.0.0.1:27017/'
 
-# Clear old data
-students_col.delete_many({})
+parser = argparse.ArgumentParser(description="Replace the students collection with synthetic students")
+parser.add_argument('count', type=int, nargs='?', default=1000)
+parser.add_argument('--uri', default=LOCAL_URI, help=f"MongoDB to seed (default: {LOCAL_URI})")
+parser.add_argument('--db', default='university_db', help="database name (default: university_db)")
+args = parser.parse_args()
 
-# Generate 50 Dummy Students
-dummy_data = []
-for i in range(1, 51):
-    usn = f"1RV21CS{str(i).zfill(3)}"
-    sgpa = round(random.uniform(5.0, 10.0), 2)
-    dummy_data.append({
-        'usn': usn,
-        'name': f"Student {i}",
-        'sgpa': sgpa,
-        'college_code': "RV"
-    })
+# Connect to MongoDB
+client = MongoClient(args.uri)
+students_col = client[args.db]['students']
 
-students_col.insert_many(dummy_data)
-print(f"✅ Successfully inserted {len(dummy_data)} dummy students!")
+# Clear old data and insert realistic students (subjects, SGPA, class band), with the app's indexes
+seed_collection(students_col, args.count)
+print(f"✅ Successfully inserted {args.count} dummy students!")
@@ -0,0 +1,72 @@
+# Shared by run_app and async_app: the result key, USN validation and the indexes the read paths rely on.
+import os
+from grading import load_scheme, scheme_name_for
+
+# --- EXAM SESSIONS ---
+# The session being fetched from VTU (the path segment of its results URL). The in-memory
+# leaderboard, distribution and ranks cover this session; older ones are queried from Mongo.
+EXAM_SESSION = os.environ.get('EXAM_SESSION', 'D25J26Ecbcs')
+# Everything stored before results were keyed by session came from this page.
+LEGACY_SESSION = 'D25J26Ecbcs'
+LEGACY_SEMESTER = 5
+
+# One stored result per student, exam session and semester.
+RESULT_KEY = ('usn', 'exam_session', 'semester')
+RESULT_KEY_INDEX = [(k, 1) for k in RESULT_KEY]
+STUDENT_INDEXES = [
+    'usn', 'name',
+    [('exam_session', 1), ('total_marks', -1), ('usn', 1)],
+    [('exam_session', 1), ('sgpa_float', -1), ('usn', 1)],
+    [('exam_session', 1), ('usn', 1)],
+    [('exam_session', 1), ('subjects.code', 1)],
+    [('exam_session', 1), ('failed_count', 1)],
+    [('exam_session', 1), ('class_band', 1), ('usn', 1)],
+]
+
+
+def validate_usn(usn):
+    if not (usn.startswith('1DB23CS') or usn.startswith('1DB24CS')):
+        return 'Invalid USN! Only 1DB23CS... allowed'
+    if len(usn) != 10:
+        return 'Invalid USN Length'
+    return None
+
+
+def stamp_session(student, session=EXAM_SESSION):
+    """Fill in exam_session / semester (from the credit table) when a result does not carry them."""
+    student.setdefault('exam_session', session)
+    if student.get('semester') is None:
+        student['semester'] = load_scheme(scheme_name_for(student['usn'], None)).semester
+    return student
+
+
+def result_key(student):
+    return {k: student.get(k) for k in RESULT_KEY}
+
+
+def in_session(student, session):
+    return student.get('exam_session', session) == session
+
+
+def superseded(student, semesters):
+    """True if `semesters` (usn -> semester held by a per-USN view) has a later semester of this student.
+
+    The in-memory views keep one entry per USN and session: its latest semester.
+    """
+    held = semesters.get(student['usn'])
+    return held is not None and (student.get('semester') or 0) < held
+
+
+def migrate_legacy_results(students_col):
+    """Key results stored before sessions existed; a no-op (one indexed query) once done."""
+    result = students_col.update_many({'exam_session': {'$exists': False}},
+                                      {'$set': {'exam_session': LEGACY_SESSION, 'semester': LEGACY_SEMESTER}})
+    if result.modified_count:
+        print(f"✅ Keyed {result.modified_count} legacy results to {LEGACY_SESSION} semester {LEGACY_SEMESTER}")
+
+
+def ensure_student_indexes(students_col):
+    migrate_legacy_results(students_col)
+    students_col.create_index(RESULT_KEY_INDEX, unique=True)
+    for keys in STUDENT_INDEXES:
+        students_col.create_index(keys)
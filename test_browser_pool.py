@@ -0,0 +1,128 @@
+"""
+BrowserPool (browser_pool.py) with fake drivers: the size limit, lease
+waits, idle reclaim, unhealthy browsers and concurrent leases.
+"""
+
+import threading
+import time
+import pytest
+import browser_pool
+from browser_pool import BrowserPool, PoolExhausted
+
+
+class FakeDriver:
+    """Just enough of a Selenium driver for the pool's health checks and cleanup."""
+
+    def __init__(self):
+        self.alive = True
+        self.quit_called = False
+        self.window_handles = ['main']
+
+    @property
+    def current_url(self):
+        if not self.alive: raise RuntimeError("browser crashed")
+        return 'about:blank'
+
+    def quit(self):
+        self.quit_called = True
+
+
+@pytest.fixture
+def drivers(monkeypatch):
+    """Every driver the pool starts, in order."""
+    started = []
+
+    def create_driver():
+        started.append(FakeDriver())
+        return started[-1]
+    monkeypatch.setattr(browser_pool, 'create_driver', create_driver)
+    return started
+
+
+def test_leases_are_per_token_up_to_max_size(drivers):
+    pool = BrowserPool(max_size=2, lease_wait=0)
+    first = pool.lease('a')
+    assert pool.lease('a') is first and pool.get('a') is first
+    second = pool.lease('b')
+    assert second is not first and len(drivers) == 2
+    with pytest.raises(PoolExhausted):
+        pool.lease('c')
+    assert pool.stats() == {'size': 2, 'leased': 2, 'idle': 0, 'max_size': 2}
+
+
+def test_released_browser_is_reused(drivers):
+    pool = BrowserPool(max_size=1, lease_wait=0)
+    first = pool.lease('a')
+    pool.release('a')
+    assert pool.get('a') is None
+    assert pool.lease('b') is first and len(drivers) == 1
+
+
+def test_lease_waits_for_a_release(drivers):
+    pool = BrowserPool(max_size=1, lease_wait=5)
+    first = pool.lease('a')
+    threading.Timer(0.1, pool.release, ['a']).start()
+    start = time.monotonic()
+    assert pool.lease('b') is first
+    assert time.monotonic() - start < 2
+
+
+def test_lease_wait_times_out(drivers):
+    pool = BrowserPool(max_size=1, lease_wait=0.2)
+    pool.lease('a')
+    start = time.monotonic()
+    with pytest.raises(PoolExhausted):
+        pool.lease('b')
+    assert 0.2 <= time.monotonic() - start < 2
+
+
+def test_reclaim_idle(drivers):
+    pool = BrowserPool(max_size=2, idle_timeout=0.05, lease_wait=0)
+    pool.lease('a')
+    time.sleep(0.1)
+    pool.reclaim_idle()
+    # The forgotten lease is idled, not quit...
+    assert pool.get('a') is None and pool.stats()['idle'] == 1 and not drivers[0].quit_called
+    time.sleep(0.1)
+    pool.reclaim_idle()
+    # ...and quit once it has sat idle for as long.
+    assert drivers[0].quit_called and pool.stats()['size'] == 0
+
+
+def test_lease_reclaims_an_expired_lease_when_full(drivers):
+    pool = BrowserPool(max_size=1, idle_timeout=0.05, lease_wait=2)
+    first = pool.lease('a')
+    time.sleep(0.1)
+    assert pool.lease('b') is first
+    assert pool.get('a') is None and pool.stats()['size'] == 1
+
+
+def test_unhealthy_browser_is_replaced(drivers):
+    pool = BrowserPool(max_size=1, lease_wait=0)
+    first = pool.lease('a')
+    pool.release('a')
+    first.alive = False
+    second = pool.lease('b')
+    assert second is not first and first.quit_called
+    assert pool.stats() == {'size': 1, 'leased': 1, 'idle': 0, 'max_size': 1}
+
+    pool.discard('b')
+    assert second.quit_called and pool.stats()['size'] == 0
+
+
+def test_concurrent_leases_of_one_token_share_a_browser(drivers, monkeypatch):
+    pool = BrowserPool(max_size=4, lease_wait=5)
+    slow_start = browser_pool.create_driver
+
+    def create_driver():
+        time.sleep(0.05)   # both callers are past the lease check before either browser exists
+        return slow_start()
+    monkeypatch.setattr(browser_pool, 'create_driver', create_driver)
+
+    leased = []
+    threads = [threading.Thread(target=lambda: leased.append(pool.lease('a'))) for _ in range(4)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert len(set(map(id, leased))) == 1
+    stats = pool.stats()
+    assert stats['leased'] == 1 and stats['size'] == len(drivers) and stats['idle'] == len(drivers) - 1
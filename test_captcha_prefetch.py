@@ -0,0 +1,115 @@
+"""
+CaptchaPrefetcher (captcha_prefetch.py): refill, expiry, empty takes and
+backoff, with a fake captcha loader.
+"""
+
+import time
+import pytest
+from captcha_prefetch import CaptchaPrefetcher
+
+
+class InlineExecutor:
+    """Runs submitted loads at once, so each test drives _fill() / _expire() step by step."""
+
+    def submit(self, fn, *args):
+        fn(*args)
+
+
+class Loader:
+    def __init__(self):
+        self.loaded, self.released = [], []
+        self.fail = False
+
+    def load_captcha(self, token):
+        if self.fail: raise RuntimeError("VTU down")
+        self.loaded.append(token)
+        return 'http', b'png:' + token.encode(), 'image/png'
+
+    def release(self, name, token):
+        self.released.append((name, token))
+
+
+def prefetcher(loader, **kwargs):
+    p = CaptchaPrefetcher(loader.load_captcha, loader.release, **kwargs)
+    p._executor = InlineExecutor()
+    return p
+
+
+def test_take_when_empty_is_a_miss():
+    p = prefetcher(Loader(), size=2)
+    assert p.take() is None
+    assert p.stats() == {'size': 2, 'ready': 0, 'loading': 0, 'hits': 0, 'misses': 1}
+
+
+def test_fill_and_take_oldest_first():
+    loader = Loader()
+    p = prefetcher(loader, size=3)
+    p._fill()
+    assert p.stats()['ready'] == 3
+    token, name, image, content_type = p.take()
+    assert token == loader.loaded[0] and name == 'http' and image == b'png:' + token.encode()
+    # Only the taken captcha is replaced.
+    p._fill()
+    assert len(loader.loaded) == 4 and p.stats()['ready'] == 3 and p.stats()['hits'] == 1
+
+
+def test_stale_captchas_are_released_not_handed_out():
+    loader = Loader()
+    p = prefetcher(loader, size=2, max_age=0.05)
+    p._fill()
+    time.sleep(0.1)
+    assert p.take() is None
+    assert sorted(token for _, token in loader.released) == sorted(loader.loaded)
+
+    p._fill()
+    time.sleep(0.1)
+    p._expire()
+    assert p.stats()['ready'] == 0 and len(loader.released) == 4
+    p._fill()
+    assert p.stats()['ready'] == 2
+
+
+def test_failed_loads_back_off():
+    loader = Loader()
+    p = prefetcher(loader, size=2)
+    loader.fail = True
+    p._fill()
+    assert p.stats()['loading'] == 0 and p._backoff == 2 and p._retry_at > time.monotonic()
+    loader.fail = False
+    p._fill()              # still backing off
+    assert loader.loaded == []
+    p._retry_at = 0
+    p._fill()
+    assert p.stats()['ready'] == 2 and p._backoff == 0
+
+
+def test_no_refill_while_idle():
+    loader = Loader()
+    p = prefetcher(loader, size=2, idle=0.05)
+    time.sleep(0.1)
+    p._fill()
+    assert loader.loaded == []
+    p.take()
+    p._fill()
+    assert len(loader.loaded) == 2
+
+
+def test_start_refills_in_the_background():
+    loader = Loader()
+    p = CaptchaPrefetcher(loader.load_captcha, loader.release, size=2)
+    p.start()
+    deadline = time.monotonic() + 5
+    while p.stats()['ready'] < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert p.stats()['ready'] == 2
+    assert p.take() is not None
+    deadline = time.monotonic() + 5
+    while len(loader.loaded) < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert len(loader.loaded) == 3
+
+
+def test_disabled_prefetcher_never_starts():
+    p = CaptchaPrefetcher(Loader().load_captcha, Loader().release, size=0)
+    p.start()
+    assert p._executor is None and p.take() is None
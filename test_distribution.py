@@ -0,0 +1,64 @@
+"""
+Distribution (distribution.py): band and histogram counts kept current by
+upserts, each student counted once.
+"""
+
+from distribution import BANDS, Distribution
+
+
+def loaded(students, docs):
+    distribution = Distribution()
+    distribution.load(students(docs))
+    return distribution
+
+
+def histogram(snapshot, name):
+    return [b['count'] for b in snapshot[f'{name}_histogram']]
+
+
+def test_load_counts_bands_and_bins(result, students):
+    snapshot = loaded(students, [result('1DB23CS001', 700), result('1DB23CS002', 560),
+                                 result('1DB23CS003', 450), dict(result('1DB23CS004', 300), class_band='fail')]).snapshot()
+    assert snapshot['total'] == 4
+    assert snapshot['bands'] == {'fcd': 1, 'fc': 1, 'sc': 1, 'p': 0, 'fail': 1}
+    assert histogram(snapshot, 'percentage') == [0, 0, 0, 1, 0, 1, 1, 1, 0, 0]
+    assert histogram(snapshot, 'sgpa') == [0, 0, 0, 1, 0, 1, 1, 1, 0, 0]
+
+
+def test_upsert_moves_a_student_between_bands(result, students):
+    distribution = loaded(students, [result('1DB23CS001', 700), result('1DB23CS002', 560)])
+    distribution.upsert(result('1DB23CS002', 650))
+    snapshot = distribution.snapshot()
+    assert snapshot['total'] == 2
+    assert snapshot['bands'] == {'fcd': 2, 'fc': 0, 'sc': 0, 'p': 0, 'fail': 0}
+    assert histogram(snapshot, 'percentage') == [0, 0, 0, 0, 0, 0, 0, 2, 0, 0]
+    assert sum(histogram(snapshot, 'sgpa')) == 2
+
+    # The same result again changes nothing; a new student adds one.
+    distribution.upsert(result('1DB23CS002', 650))
+    distribution.upsert(result('1DB23CS003', 400))
+    snapshot = distribution.snapshot()
+    assert snapshot['total'] == 3 and sum(snapshot['bands'].values()) == 3
+    assert snapshot['bands']['p'] == 1
+
+
+def test_results_without_a_band_are_not_counted(result, students):
+    summary = dict(result('1DB23CS002', 850), class_band=None)
+    distribution = loaded(students, [result('1DB23CS001', 700), summary])
+    assert distribution.snapshot()['total'] == 1
+    # A graded result for that student later replaces the summary...
+    distribution.upsert(result('1DB23CS002', 500))
+    assert distribution.snapshot()['bands']['sc'] == 1
+    # ...and a graded result that loses its band leaves the counts.
+    distribution.upsert(dict(result('1DB23CS001', 700), class_band=None))
+    snapshot = distribution.snapshot()
+    assert snapshot['total'] == 1 and sum(snapshot['bands'].values()) == 1 and snapshot['bands']['fcd'] == 0
+
+
+def test_upserts_before_load_and_other_sessions_are_ignored(result, students):
+    distribution = Distribution()
+    distribution.upsert(result('1DB23CS001', 700))
+    distribution.load(students([result('1DB23CS002', 500)]))
+    distribution.upsert(result('1DB23CS003', 700, session='J25'))
+    snapshot = distribution.snapshot()
+    assert snapshot['total'] == 1 and snapshot['bands'] == dict.fromkeys(BANDS, 0) | {'sc': 1}
@@ -0,0 +1,50 @@
+"""
+/export writers (export.py): CSV and XLSX output, and text that must not
+turn into spreadsheet formulas.
+"""
+
+import csv
+import io
+import re
+import zipfile
+import pytest
+from export import LEADERBOARD_COLUMNS, cell, csv_chunks, export_columns, xlsx_chunks
+
+ROWS = [{'rank': 1, 'usn': '1DB23CS001', 'name': '=HYPERLINK("http://x")', 'total_marks': 700,
+         'sgpa': '9.10', 'percentage': '77.78%'},
+        {'rank': 2, 'usn': '1DB23CS002', 'name': '@SUM(A1)', 'total_marks': 650, 'sgpa': '-1', 'percentage': '-'}]
+
+
+def test_cell_guards_formula_text_only():
+    assert [cell(v) for v in ('=1+1', '+91 98', '-x', '@A1')] == ["'=1+1", "'+91 98", "'-x", "'@A1"]
+    assert [cell(v) for v in ('-1.5', 'ASHA', 700, '')] == ['-1.5', 'ASHA', 700, '']
+
+
+def test_csv_chunks_escape_formulas():
+    text = ''.join(csv_chunks(LEADERBOARD_COLUMNS, iter(ROWS)))
+    rows = list(csv.reader(io.StringIO(text)))
+    assert rows[0] == list(LEADERBOARD_COLUMNS)
+    assert rows[1][2] == '\'=HYPERLINK("http://x")' and rows[2][2] == "'@SUM(A1)"
+    assert rows[2][4:] == ['-1', "'-"]
+
+
+def test_csv_chunks_stream_in_chunks(monkeypatch):
+    import export
+    monkeypatch.setattr(export, 'EXPORT_CHUNK_ROWS', 1)
+    chunks = list(csv_chunks(('usn',), iter([{'usn': 'A'}, {'usn': 'B'}])))
+    assert ''.join(chunks).split() == ['usn', 'A', 'B'] and len(chunks) == 3
+
+
+def test_xlsx_cells_are_text_not_formulas():
+    pytest.importorskip('xlsxwriter')
+    data = b''.join(xlsx_chunks(LEADERBOARD_COLUMNS, iter(ROWS), 'leaderboard'))
+    sheet = zipfile.ZipFile(io.BytesIO(data)).read('xl/worksheets/sheet1.xml').decode()
+    assert '<f>' not in sheet
+    texts = re.findall(r'<t[^>]*>([^<]*)</t>', sheet)
+    assert '=HYPERLINK("http://x")' in texts and '@SUM(A1)' in texts and '-' in texts
+    assert not any(t.startswith("'") for t in texts)
+
+
+def test_export_columns():
+    assert export_columns(LEADERBOARD_COLUMNS, 'name,usn') == ('usn', 'name')
+    assert export_columns(LEADERBOARD_COLUMNS, 'bogus') == LEADERBOARD_COLUMNS
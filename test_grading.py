@@ -0,0 +1,69 @@
+"""
+Table-driven grading (grading.py): grade points, class bands, credit
+tables, and grade_batch() agreeing with grade_result() as regrade.py needs.
+"""
+
+import random
+from grading import (CLASS_LABELS, DEFAULT_SCHEME, GradingScheme, class_band, grade_batch, grade_point,
+                     load_scheme, scheme_name_for)
+from regrade import regraded
+from result_parser import grade_result
+
+
+def test_grade_point_cutoffs():
+    assert [grade_point(m) for m in (0, 39, 40, 49, 50, 55, 60, 70, 80, 89, 90, 100)] == \
+        [0, 0, 4, 4, 5, 6, 7, 8, 9, 9, 10, 10]
+    assert grade_point('75') == 8
+    assert grade_point(101) == 0 and grade_point(-1) == 0 and grade_point('AB') == 0
+
+
+def test_class_band():
+    assert [class_band(p, 0) for p in (70, 69.99, 60, 50, 40, 39.99)] == ['fcd', 'fc', 'fc', 'sc', 'p', 'fail']
+    assert class_band(95, 1) == 'fail'
+
+
+def test_credit_table_lookup():
+    scheme = load_scheme()
+    assert scheme.max_marks == 900 and scheme.semester == 5
+    assert scheme.credits('bcs502') == 4
+    assert scheme.credits('BCSL504 (R)') == 1
+    assert scheme.credits('BXX999') == 0
+    assert scheme_name_for('1DB23CS001', 5) == '2022_cs_5'
+    # No table for this branch or semester: fall back to GRADING_SCHEME.
+    assert scheme_name_for('1DB23ZZ001', 5) == DEFAULT_SCHEME
+    assert scheme_name_for('1DB23CS001', 3) == DEFAULT_SCHEME
+
+
+def random_subjects(rng):
+    codes = ['BCS501', 'BCS502', 'BCS503', 'BCSL504', 'BCS515 (R)', 'BRMK557', 'BXX999']
+    return [{'code': code, 'name': code, 'total': str(rng.randrange(0, 101)), 'result': rng.choice('PPPPF')}
+            for code in rng.sample(codes, rng.randrange(0, len(codes) + 1))]
+
+
+def test_grade_batch_matches_grade_result():
+    rng = random.Random(5)
+    schemes = [load_scheme(), GradingScheme('tiny', {'BCS501': 4}, max_marks=200)]
+    for scheme in schemes:
+        docs = [{'subjects': random_subjects(rng)} for _ in range(300)]
+        docs.append({'subjects': [{'code': 'BXX999', 'name': 'X', 'total': '95', 'result': 'P'}]})
+        graded = grade_batch(docs, scheme)
+        for i, doc in enumerate(docs):
+            expected = grade_result('1DB23CS001', 'A', doc['subjects'], scheme)
+            assert int(graded['total_marks'][i]) == expected['total_marks']
+            assert float(graded['sgpa_float'][i]) == expected['sgpa_float']
+            assert float(graded['percentage_float'][i]) == expected['percentage_float']
+            assert int(graded['failed_count'][i]) == expected['failed_count']
+            assert graded['class_band'][i] == expected['class_band']
+            assert graded['class_result'][i] == expected['class_result']
+
+
+def test_regraded_only_reports_changes():
+    scheme = load_scheme()
+    subjects = [{'code': 'BCS501', 'name': 'SE', 'total': '81', 'result': 'P'},
+                {'code': 'BCS502', 'name': 'CN', 'total': '35', 'result': 'F'}]
+    doc = grade_result('1DB23CS001', 'A', subjects, scheme)
+    assert regraded([doc], scheme) == []
+
+    stale = dict(doc, sgpa='9.99', sgpa_float=9.99)
+    [(_, fields)] = regraded([stale], scheme)
+    assert fields['sgpa'] == doc['sgpa'] and fields['class_result'] == CLASS_LABELS['fail']
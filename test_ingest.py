@@ -0,0 +1,146 @@
+"""
+/submit_result ingestion (ingest.py): body decoding, per-record validation,
+the submit token, and uploads through run_app. The app tests need MongoDB
+(see conftest.py).
+"""
+
+import gzip
+import json
+import os
+import pytest
+import ingest
+from ingest import SubmissionError, normalize_record, parse_submission, submit_denied
+from students import validate_usn
+
+SUBMIT_HEADERS = {'X-Submit-Token': os.environ.get('SUBMIT_TOKEN', '')}
+SUBJECTS = [{'code': 'BCS501', 'name': 'SE', 'total': 81, 'result': 'P'},
+            {'code': 'BCS502', 'name': 'CN', 'total': 62, 'result': 'P'}]
+
+
+def test_parse_submission_formats():
+    one = {'usn': '1DB23CS001'}
+    assert parse_submission(json.dumps(one).encode(), 'application/json') == [one]
+    assert parse_submission(json.dumps([one, one]).encode(), 'application/json') == [one, one]
+    ndjson = b'{"usn": "1DB23CS001"}\n\n{"usn": "1DB23CS002"}\n'
+    assert [r['usn'] for r in parse_submission(ndjson, 'application/x-ndjson')] == ['1DB23CS001', '1DB23CS002']
+    assert parse_submission(gzip.compress(ndjson), 'application/x-ndjson', 'gzip')[1]['usn'] == '1DB23CS002'
+
+
+@pytest.mark.parametrize('body, content_type, encoding', [
+    (b'{"usn": ', 'application/json', None),
+    (b'"text"', 'application/json', None),
+    (b'\xff\xfe', 'application/json', None),
+    (b'not gzip', 'application/json', 'gzip'),
+    (json.dumps([{}] * (ingest.MAX_SUBMIT_RECORDS + 1)).encode(), 'application/json', None),
+])
+def test_parse_submission_rejects(body, content_type, encoding):
+    with pytest.raises(SubmissionError):
+        parse_submission(body, content_type, encoding)
+
+
+def test_parse_submission_limits_inflated_size(monkeypatch):
+    monkeypatch.setattr(ingest, 'MAX_BODY_BYTES', 1024)
+    with pytest.raises(SubmissionError, match="too large"):
+        parse_submission(gzip.compress(b' ' * 4096 + b'[]'), 'application/json', 'gzip')
+
+
+def test_normalize_record_regrades_subjects():
+    student, error = normalize_record({'usn': ' 1db23cs001 ', 'name': 'A', 'sgpa': '10.00', 'subjects': SUBJECTS},
+                                      validate_usn)
+    assert error is None
+    assert student['usn'] == '1DB23CS001' and student['total_marks'] == 143
+    assert student['sgpa'] == '7.86' and student['subjects'][0]['total'] == '81'
+
+
+def test_normalize_record_summary_only():
+    student, error = normalize_record({'usn': '1DB23CS001', 'name': 'A', 'total_marks': '450', 'semester': 5},
+                                      validate_usn)
+    assert error is None
+    assert student['total_marks'] == 450 and student['percentage'] == '50.00%'
+    assert student['subjects'] == [] and student['semester'] == 5
+    # Nothing to say whether it passed: no class band, so /analysis and /stats/distribution skip it.
+    assert student['class_band'] is None and student['class_result'] == "N/A"
+
+
+@pytest.mark.parametrize('raw, message', [
+    ([], "object"),
+    ({'usn': '1XX23CS001', 'name': 'A', 'subjects': SUBJECTS}, "Invalid USN"),
+    ({'usn': '1DB23CS001', 'name': 'Unknown', 'subjects': SUBJECTS}, "name"),
+    ({'usn': '1DB23CS001', 'name': 'A'}, "total_marks"),
+    ({'usn': '1DB23CS001', 'name': 'A', 'total_marks': 10 ** 7}, "between 0 and 900"),
+    ({'usn': '1DB23CS001', 'name': 'A', 'total_marks': -1}, "between 0 and 900"),
+    ({'usn': '1DB23CS001', 'name': 'A', 'subjects': [dict(SUBJECTS[0], total='AB')]}, "whole number"),
+    ({'usn': '1DB23CS001', 'name': 'A', 'subjects': [dict(SUBJECTS[0], result='PASS')]}, "result must be"),
+    ({'usn': '1DB23CS001', 'name': 'A', 'subjects': []}, "non-empty"),
+    ({'usn': '1DB23CS001', 'name': 'A', 'subjects': [{'code': 'BCS501'}]}, "Each subject"),
+    ({'usn': '1DB23CS001', 'name': 'A', 'subjects': SUBJECTS, 'semester': 9}, "semester"),
+    ({'usn': '1DB23CS001', 'name': 'A', 'subjects': SUBJECTS, 'exam_session': ' '}, "exam_session"),
+])
+def test_normalize_record_rejects(raw, message):
+    student, error = normalize_record(raw, validate_usn)
+    assert student is None and message in error
+
+
+def test_submit_denied(monkeypatch):
+    monkeypatch.setattr(ingest, 'SUBMIT_OPEN', False)
+    monkeypatch.setattr(ingest, 'SUBMIT_TOKEN', 'secret')
+    assert submit_denied('secret') is None
+    assert submit_denied('wrong') and submit_denied(None)
+    monkeypatch.setattr(ingest, 'SUBMIT_TOKEN', None)
+    assert "disabled" in submit_denied('anything')
+    monkeypatch.setattr(ingest, 'SUBMIT_OPEN', True)
+    assert submit_denied(None) is None
+
+
+# --- APP ---
+def test_submit_requires_token(app):
+    client = app.app.test_client()
+    record = {'usn': '1DB23CS001', 'name': 'A', 'subjects': SUBJECTS}
+    assert client.post('/submit_result', json=record).status_code == 403
+    assert client.post('/submit_result', json=record, headers={'X-Submit-Token': 'wrong'}).status_code == 403
+    assert app.students_col.count_documents({}) == 0
+
+
+def test_submit_reports_bad_records_and_stores_the_rest(app):
+    client = app.app.test_client()
+    body = client.post('/submit_result', headers=SUBMIT_HEADERS, json=[
+        {'usn': '1DB23CS001', 'name': 'A', 'subjects': SUBJECTS},
+        {'usn': '1DB23CS002', 'name': 'B'},
+    ]).get_json()
+    assert body['accepted'] == 1 and body['upserted'] == 1
+    assert body['errors'] == [{'index': 1, 'usn': '1DB23CS002', 'message': "Missing subjects or total_marks"}]
+    assert app.students_col.find_one({'usn': '1DB23CS001'})['source'] == 'upload'
+    assert client.get('/leaderboard').get_json()['data'][0]['usn'] == '1DB23CS001'
+
+    bad = client.post('/submit_result', data=b'{', content_type='application/json', headers=SUBMIT_HEADERS)
+    assert bad.status_code == 400
+    rejected = client.post('/submit_result', json={'usn': '1DB23CS003', 'name': 'C'}, headers=SUBMIT_HEADERS)
+    assert rejected.status_code == 400 and rejected.get_json()['accepted'] == 0
+
+
+def test_summary_upload_keeps_graded_result(app):
+    client = app.app.test_client()
+    graded = {'usn': '1DB23CS001', 'name': 'A', 'subjects': SUBJECTS}
+    assert client.post('/submit_result', json=graded, headers=SUBMIT_HEADERS).status_code == 200
+    summary = {'usn': '1DB23CS001', 'name': 'A B', 'total_marks': 10}
+    assert client.post('/submit_result', json=summary, headers=SUBMIT_HEADERS).status_code == 200
+
+    stored = app.students_col.find_one({'usn': '1DB23CS001'})
+    assert stored['name'] == 'A B' and stored['total_marks'] == 143 and len(stored['subjects']) == 2
+    row = client.get('/leaderboard').get_json()['data'][0]
+    assert (row['name'], row['total_marks']) == ('A B', 143)
+
+
+def test_summary_upload_is_not_graded(app):
+    client = app.app.test_client()
+    uploads = [{'usn': '1DB23CS001', 'name': 'A', 'subjects': SUBJECTS},
+               {'usn': '1DB23CS002', 'name': 'B', 'total_marks': 850}]
+    assert client.post('/submit_result', json=uploads, headers=SUBMIT_HEADERS).status_code == 200
+
+    overall = client.get('/analysis').get_json()['stats']
+    assert overall == {'total': 1, 'pass': 1, 'fail': 0}
+    assert client.get('/analysis?subject=class_fcd').get_json()['data'] == []
+    distribution = client.get('/stats/distribution').get_json()
+    assert distribution['total'] == 1 and sum(distribution['bands'].values()) == 1
+    # Still on the leaderboard by total marks.
+    assert client.get('/leaderboard').get_json()['data'][0]['usn'] == '1DB23CS002'
@@ -0,0 +1,80 @@
+"""
+Leaderboard ordering, search and the rank deltas pushed to live clients.
+The session_rows test needs MongoDB (see conftest.py).
+"""
+
+import pytest
+from leaderboard import Leaderboard, rank_delta, session_rows
+from students import EXAM_SESSION
+
+
+@pytest.fixture
+def docs(result):
+    return [result('1DB23CS001', 600, name='ASHA RAO', sgpa_float=8.1),
+            result('1DB23CS002', 700, name='RAVI KUMAR', sgpa_float=7.9),
+            result('1DB23CS003', 600, name='KUMAR S', sgpa_float=9.0),
+            result('1DB23EC001', 500, name='ANIL', sgpa_float=6.5)]
+
+
+@pytest.fixture
+def leaderboard(docs, students):
+    leaderboard = Leaderboard()
+    leaderboard.load(students(docs))
+    return leaderboard
+
+
+def usns(rows):
+    return [row['usn'] for row in rows]
+
+
+def test_page_orders_by_marks_then_usn(leaderboard):
+    rows, total = leaderboard.page()
+    assert total == 4
+    assert usns(rows) == ['1DB23CS002', '1DB23CS001', '1DB23CS003', '1DB23EC001']
+    assert [row['rank'] for row in rows] == [1, 2, 3, 4]
+
+    rows, _ = leaderboard.page(order='asc', offset=1, limit=2)
+    assert usns(rows) == ['1DB23CS003', '1DB23CS001']
+    assert [row['rank'] for row in rows] == [3, 2]
+
+
+def test_sgpa_page_keeps_marks_ranks(leaderboard):
+    rows, _ = leaderboard.page(sort_by='sgpa')
+    assert usns(rows) == ['1DB23CS003', '1DB23CS001', '1DB23CS002', '1DB23EC001']
+    assert [row['rank'] for row in rows] == [3, 2, 1, 4]
+
+
+def test_prefix_search_matches_usn_or_any_name_word(leaderboard):
+    assert leaderboard.search('1db23cs') == {'1DB23CS001', '1DB23CS002', '1DB23CS003'}
+    assert leaderboard.search('kum') == {'1DB23CS002', '1DB23CS003'}
+    rows, total = leaderboard.page(prefix='kumar')
+    assert total == 2 and usns(rows) == ['1DB23CS002', '1DB23CS003']
+    assert [row['rank'] for row in rows] == [1, 3]
+
+
+def test_upsert_moves_a_student_and_reports_the_shift(leaderboard, result):
+    delta = leaderboard.upsert(result('1DB23EC001', 650, name='ANIL'))
+    assert (delta['old_rank'], delta['rank'], delta['total']) == (4, 2, 4)
+    assert delta['shifted'] == [{'from': 2, 'to': 3, 'by': 1}]
+    assert usns(leaderboard.page()[0]) == ['1DB23CS002', '1DB23EC001', '1DB23CS001', '1DB23CS003']
+
+    delta = leaderboard.upsert(result('1DB23CS004', 100, name='NEW'))
+    assert delta['old_rank'] is None and delta['rank'] == 5 and delta['shifted'] == []
+    assert leaderboard.page(prefix='anil')[0][0]['total_marks'] == 650
+
+
+def test_rank_delta_shifts():
+    row = {'usn': '1DB23CS001'}
+    assert rank_delta(row, None, 2, 5)['shifted'] == [{'from': 2, 'to': 4, 'by': 1}]
+    assert rank_delta(row, 4, 1, 5)['shifted'] == [{'from': 1, 'to': 3, 'by': 1}]
+    assert rank_delta(row, 1, 3, 5)['shifted'] == [{'from': 2, 'to': 3, 'by': -1}]
+    assert rank_delta(row, 2, 2, 5)['shifted'] == []
+
+
+# --- MONGO ---
+def test_session_rows_match_leaderboard_page(db, docs, leaderboard):
+    db['students'].insert_many([dict(d) for d in docs])
+    for sort_by, order in (('total_marks', 'desc'), ('total_marks', 'asc'), ('sgpa', 'desc'), ('sgpa', 'asc')):
+        rows = list(session_rows(db['students'], EXAM_SESSION, sort_by, order))
+        expected, _ = leaderboard.page(sort_by, order)
+        assert [(r['usn'], r['rank']) for r in rows] == [(r['usn'], r['rank']) for r in expected]
@@ -0,0 +1,101 @@
+"""
+The live leaderboard feed (live_feed.py): backlog replay, resync when a
+client falls behind or is ahead of a restarted app, and the SSE framing.
+The app tests need MongoDB (see conftest.py).
+"""
+
+import asyncio
+import os
+import threading
+from live_feed import LiveFeed, sse_messages, sse_stream, start_id
+
+SUBMIT_HEADERS = {'X-Submit-Token': os.environ.get('SUBMIT_TOKEN', '')}
+
+
+def published(n, backlog=10):
+    feed = LiveFeed(backlog=backlog)
+    for i in range(1, n + 1):
+        feed.publish({'rank': i})
+    return feed
+
+
+def test_since_replays_the_backlog():
+    feed = published(3)
+    assert feed.since(0) == [(1, '{"rank": 1}'), (2, '{"rank": 2}'), (3, '{"rank": 3}')]
+    assert [event_id for event_id, _ in feed.since(2)] == [3]
+    assert feed.since(3) == []
+
+
+def test_since_asks_for_resync():
+    feed = published(15, backlog=10)
+    assert feed.since(4) is None           # events 5 and up are gone
+    assert [event_id for event_id, _ in feed.since(5)] == list(range(6, 16))
+    assert feed.since(20) is None          # ahead: the app restarted
+    assert LiveFeed().since(3) is None
+
+
+def test_wait_wakes_on_publish():
+    feed = LiveFeed()
+    threading.Timer(0.05, feed.publish, [{'rank': 1}]).start()
+    assert feed.wait(0, timeout=5) == [(1, '{"rank": 1}')]
+    assert feed.wait(1, timeout=0.01) == []
+
+
+def test_async_wait_wakes_on_publish():
+    feed = LiveFeed()
+
+    async def main():
+        threading.Timer(0.05, feed.publish, [{'rank': 1}]).start()
+        return await feed.async_wait(0, timeout=5)
+
+    assert asyncio.run(main()) == [(1, '{"rank": 1}')]
+    assert feed.stats()['async_waiters'] == 0
+
+
+def test_sse_messages():
+    feed = published(2)
+    messages, last_id = sse_messages(feed, 0, feed.since(0))
+    assert messages[1] == 'id: 2\nevent: delta\ndata: {"rank": 2}\n\n' and last_id == 2
+    assert sse_messages(feed, 2, []) == ([": keepalive\n\n"], 2)
+    assert sse_messages(feed, 9, None) == (['id: 2\nevent: resync\ndata: {}\n\n'], 2)
+
+
+def test_sse_stream_starts_after_last_id():
+    feed = published(3)
+    stream = sse_stream(feed, 1, duration=60)
+    assert next(stream).startswith('retry: ')
+    assert [next(stream), next(stream)] == ['id: 2\nevent: delta\ndata: {"rank": 2}\n\n',
+                                          'id: 3\nevent: delta\ndata: {"rank": 3}\n\n']
+
+
+def test_start_id_and_stream_slots():
+    feed = published(3)
+    assert (start_id(feed, '1'), start_id(feed, None), start_id(feed, ''), start_id(feed, 'x')) == (1, 3, 3, 3)
+    feed = LiveFeed(max_streams=1)
+    assert feed.open_stream() and not feed.open_stream()
+    feed.close_stream()
+    assert feed.open_stream()
+
+
+# --- APP ---
+def test_upload_is_pushed_to_pollers(app):
+    client = app.app.test_client()
+    subjects = [{'code': 'BCS501', 'name': 'SE', 'total': 90, 'result': 'P'}]
+    for usn, total in (('1DB23CS001', 60), ('1DB23CS002', 90)):
+        record = {'usn': usn, 'name': 'A', 'subjects': [dict(subjects[0], total=total)]}
+        assert client.post('/submit_result', json=record, headers=SUBMIT_HEADERS).status_code == 200
+
+    body = client.get('/leaderboard/updates?since=0').get_json()
+    assert body['resync'] is False and body['last_id'] == 2
+    second = body['events'][1]
+    assert (second['id'], second['student']['usn'], second['rank']) == (2, '1DB23CS002', 1)
+    assert second['shifted'] == [{'from': 1, 'to': 1, 'by': 1}]
+
+    assert client.get('/leaderboard/updates?since=2').get_json()['events'] == []
+    body = client.get('/leaderboard/updates?since=50').get_json()
+    assert body['resync'] is True and body['last_id'] == 2
+
+
+def test_stream_turns_clients_away_when_full(app, monkeypatch):
+    monkeypatch.setattr(app, 'live_feed', LiveFeed(max_streams=0))
+    assert app.app.test_client().get('/leaderboard/stream').status_code == 503
@@ -0,0 +1,31 @@
+"""
+Prometheus text rendering of the metrics in metrics.py.
+"""
+
+from metrics import Counter, Gauge, Histogram
+
+
+def test_gauge_renders_each_label_set():
+    gauge = Gauge('g', "A gauge.", lambda: {('a',): 3, ('b"',): 0.5}, ('k',))
+    assert gauge.render() == ['# HELP g A gauge.', '# TYPE g gauge', 'g{k="a"} 3', 'g{k="b\\""} 0.5']
+
+
+def test_gauge_keeps_full_precision():
+    gauge = Gauge('g', "A gauge.", lambda: {('a',): 1234567, ('b',): 0.1 + 0.2, ('c',): float('inf')}, ('k',))
+    assert gauge.render()[2:] == ['g{k="a"} 1234567', 'g{k="b"} 0.30000000000000004', 'g{k="c"} +Inf']
+
+
+def test_counter_and_histogram_values():
+    counter = Counter('c', "A counter.")
+    counter.inc()
+    counter.inc(amount=2)
+    assert counter.render()[2:] == ['c 3']
+
+    histogram = Histogram('h', "A histogram.", buckets=(1,))
+    histogram.observe(0.5)
+    histogram.observe(2)
+    assert histogram.render()[2:] == ['h_bucket{le="1"} 1', 'h_bucket{le="+Inf"} 2', 'h_sum 2.5', 'h_count 2']
+
+    histogram = Histogram('h', "A histogram.", buckets=(1,))
+    histogram.observe(0.0000005)
+    assert histogram.render()[2:] == ['h_bucket{le="1"} 1', 'h_bucket{le="+Inf"} 1', 'h_sum 5e-07', 'h_count 1']
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Result Parser Golden-File Check
+Runs parse_result_page over every saved page in golden/ and compares the
+output with the expected JSON next to it. Run with `python test_parser.py`
+or `pytest test_parser.py`.
+"""
+
+import os
+import sys
+import json
+import glob
+from result_parser import parse_result_page
+
+GOLDEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden')
+
+
+def golden_cases():
+    for html_path in sorted(glob.glob(os.path.join(GOLDEN_DIR, '*.html'))):
+        with open(html_path, encoding='utf-8') as f:
+            html = f.read()
+        with open(html_path[:-5] + '.json', encoding='utf-8') as f:
+            expected = json.load(f)
+        yield os.path.basename(html_path), html, expected
+
+
+def test_golden_pages():
+    for name, html, expected in golden_cases():
+        assert parse_result_page(html, expected['usn']) == expected, name
+
+
+def test_golden_pages_cover_both_name_layouts():
+    names = {expected['name'] for _, _, expected in golden_cases()}
+    assert {"ASTITVA RAJ", "ARSALAN KHAN", "Unknown"} <= names
+
+
+def main():
+    failed = 0
+    for name, html, expected in golden_cases():
+        actual = parse_result_page(html, expected['usn'])
+        if actual == expected:
+            print(f"✅ {name}")
+        else:
+            failed += 1
+            print(f"❌ {name}")
+            for key in expected:
+                if actual.get(key) != expected[key]:
+                    print(f"   {key}: expected {expected[key]!r}, got {actual.get(key)!r}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
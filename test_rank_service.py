@@ -0,0 +1,70 @@
+"""
+Fenwick-tree ranks in rank_service.py, checked against plain counting.
+"""
+
+import random
+from leaderboard import Leaderboard
+from rank_service import FenwickTree, RankService
+
+
+def test_fenwick_prefix_counts():
+    rng = random.Random(7)
+    tree, scores = FenwickTree(50), []
+    for _ in range(300):
+        if scores and rng.random() < 0.3:
+            score = scores.pop(rng.randrange(len(scores)))
+            tree.add(score, -1)
+        else:
+            score = rng.randrange(50)
+            scores.append(score)
+            tree.add(score, 1)
+    assert tree.total == len(scores)
+    for score in range(-1, 60):
+        assert tree.count_upto(score) == sum(s <= score for s in scores)
+
+
+def test_ties_are_ranked_by_usn_within_each_group(result, students):
+    ranks = RankService(max_score=900)
+    ranks.load(students([result('1DB23CS001', 700), result('1DB23CS002', 650), result('1DB23CS003', 700),
+                         result('1DB23EC001', 800), result('1AB23CS001', 900)]))
+    assert ranks.ranks('1DB23CS001') == {'uni_rank': 3, 'coll_rank': 2, 'branch_rank': 1}
+    assert ranks.ranks('1DB23CS003') == {'uni_rank': 4, 'coll_rank': 3, 'branch_rank': 2}
+    assert ranks.ranks('1DB23CS002') == {'uni_rank': 5, 'coll_rank': 4, 'branch_rank': 3}
+    assert ranks.ranks('1DB23EC001') == {'uni_rank': 2, 'coll_rank': 1, 'branch_rank': 1}
+    assert ranks.ranks('1AB23CS001') == {'uni_rank': 1, 'coll_rank': 1, 'branch_rank': 1}
+    assert ranks.ranks('1DB23CS999') is None
+
+
+def test_upsert_moves_a_student(result, students):
+    ranks = RankService(max_score=900)
+    ranks.load(students([result('1DB23CS001', 700), result('1DB23CS002', 650)]))
+    ranks.upsert(result('1DB23CS002', 750))
+    assert ranks.ranks('1DB23CS002')['uni_rank'] == 1
+    assert ranks.ranks('1DB23CS001')['uni_rank'] == 2
+    # A summary without marks keeps the stored score; out-of-range marks are clamped.
+    ranks.upsert({k: v for k, v in result('1DB23CS002', 0).items() if k != 'total_marks'})
+    assert ranks.ranks('1DB23CS002')['uni_rank'] == 1
+    ranks.upsert(result('1DB23CS003', 5000))
+    ranks.upsert(dict(result('1DB23CS004', 0), total_marks='absent'))
+    assert ranks.ranks('1DB23CS003')['uni_rank'] == 1
+    assert ranks.ranks('1DB23CS004')['uni_rank'] == 4
+
+
+def test_ranks_match_counting_and_the_leaderboard(result, students):
+    rng = random.Random(11)
+    docs = [result(f"1DB23{rng.choice(['CS', 'EC'])}{i:03d}", rng.randrange(0, 901, 25)) for i in range(200)]
+    ranks = RankService(max_score=900)
+    ranks.load(students(docs))
+
+    def ahead(doc, group):
+        return sum((d['total_marks'], doc['usn']) > (doc['total_marks'], d['usn']) for d in group) + 1
+
+    for doc in docs:
+        branch = [d for d in docs if d['usn'][:7] == doc['usn'][:7]]
+        assert ranks.ranks(doc['usn']) == {'uni_rank': ahead(doc, docs), 'coll_rank': ahead(doc, docs),
+                                           'branch_rank': ahead(doc, branch)}
+
+    leaderboard = Leaderboard()
+    leaderboard.load(students(docs))
+    for row in leaderboard.page()[0]:
+        assert ranks.ranks(row['usn'])['uni_rank'] == row['rank']
@@ -0,0 +1,61 @@
+"""
+reparse.py against results fetched through run_app: a page archived by a
+fetch is re-parsed into its stored result, and later uploads are kept.
+Needs MongoDB (see conftest.py).
+"""
+
+import os
+import reparse
+from page_archive import PageArchive
+from result_detector import PhaseTimer
+
+GOLDEN_PAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'golden', 'result_pass.html')
+USN = '1DB23CS001'
+SUBMIT_HEADERS = {'X-Submit-Token': os.environ.get('SUBMIT_TOKEN', '')}
+
+
+class PageEngine:
+    """A fetch engine that always answers with the same result page."""
+    name = 'test'
+
+    def __init__(self, html):
+        self.html = html
+
+    def submit(self, token, usn, captcha_text, timer):
+        return 'result', self.html
+
+    def release(self, token):
+        pass
+
+
+def fetch(app):
+    with open(GOLDEN_PAGE, encoding='utf-8') as f:
+        student_data, error = app.scrape_result(PageEngine(f.read()), 'token', USN, 'ABC123', PhaseTimer())
+    assert error is None
+    return student_data
+
+
+def run_reparse(app):
+    archive = PageArchive(app.page_archive.store, app.page_archive.index_col)
+    reparse.init_worker('local', None)
+    parsed, failed = reparse.parse_chunk(list(archive.latest_pages()))
+    assert not failed
+    return reparse.store_parsed(parsed, app.students_col, app.db['transcripts'], archive, dry_run=False)
+
+
+def test_reparse_rewrites_fetched_result(app):
+    fetch(app)
+    # Simulate a parser fix: the stored grade is stale until the page is parsed again.
+    app.students_col.update_one({'usn': USN}, {'$set': {'sgpa': '0.00'}})
+    assert run_reparse(app) == 1
+    assert app.students_col.find_one({'usn': USN})['sgpa'] == '8.52'
+
+
+def test_reparse_keeps_newer_upload(app):
+    fetch(app)
+    client = app.app.test_client()
+    record = {'usn': USN, 'name': 'ASTITVA RAJ', 'subjects': [
+        {'code': 'BCS501', 'name': 'SOFTWARE ENGINEERING', 'total': 99, 'result': 'P'}]}
+    assert client.post('/submit_result', json=record, headers=SUBMIT_HEADERS).status_code == 200
+    assert run_reparse(app) == 0
+    assert len(app.students_col.find_one({'usn': USN})['subjects']) == 1
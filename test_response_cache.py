@@ -0,0 +1,99 @@
+"""
+ResponseCache (response_cache.py): ETags, TTL, LRU eviction and version
+bumps, on a small Flask app. The last test needs MongoDB (see conftest.py).
+"""
+
+import os
+import time
+from flask import Flask, jsonify, request
+from response_cache import ResponseCache, cached_json
+
+SUBMIT_HEADERS = {'X-Submit-Token': os.environ.get('SUBMIT_TOKEN', '')}
+
+
+def counting_app(cache):
+    """An app whose /data view counts how often it actually ran."""
+    app = Flask(__name__)
+    app.calls = 0
+
+    @app.route('/data')
+    @cached_json(cache)
+    def data():
+        app.calls += 1
+        if request.args.get('fail'):
+            return jsonify({'status': 'error'})
+        return jsonify({'status': 'success', 'n': request.args.get('n'), 'run': app.calls})
+    return app
+
+
+def test_etag_and_304():
+    app = counting_app(ResponseCache())
+    client = app.test_client()
+    first = client.get('/data?n=1')
+    etag = first.headers['ETag']
+    assert first.status_code == 200 and etag
+    again = client.get('/data?n=1', headers={'If-None-Match': etag})
+    assert again.status_code == 304 and again.data == b'' and again.headers['ETag'] == etag
+    assert client.get('/data?n=1').get_json()['n'] == '1'
+    assert app.calls == 1
+
+
+def test_keys_include_query_and_errors_are_not_cached():
+    app = counting_app(ResponseCache())
+    client = app.test_client()
+    client.get('/data?n=1'); client.get('/data?n=2'); client.get('/data?n=1&x=')
+    assert app.calls == 2
+    client.get('/data?fail=1'); client.get('/data?fail=1')
+    assert app.calls == 4
+
+
+def test_ttl_expiry():
+    cache = ResponseCache(ttl=0.05)
+    app = counting_app(cache)
+    client = app.test_client()
+    client.get('/data'); client.get('/data')
+    assert app.calls == 1
+    time.sleep(0.1)
+    client.get('/data')
+    assert app.calls == 2 and cache.stats()['entries'] == 1
+
+
+def test_lru_eviction():
+    cache = ResponseCache(max_entries=2)
+    app = counting_app(cache)
+    client = app.test_client()
+    for n in (1, 2, 1, 3):   # 1 is used again, so 2 is the least recently used
+        client.get(f'/data?n={n}')
+    assert app.calls == 3 and cache.stats()['entries'] == 2
+    client.get('/data?n=1'); client.get('/data?n=3')
+    assert app.calls == 3
+    client.get('/data?n=2')
+    assert app.calls == 4
+
+
+def test_bump_invalidates_and_racing_builds_are_not_stored():
+    cache = ResponseCache()
+    app = counting_app(cache)
+    client = app.test_client()
+    etag = client.get('/data').headers['ETag']
+    cache.bump()
+    assert client.get('/data', headers={'If-None-Match': etag}).status_code == 200
+    assert app.calls == 2
+
+    version = cache.version
+    cache.bump()   # a write lands while a response is being built from older data
+    cache.put('key', version, b'{}')
+    assert cache.get('key') is None
+
+
+# --- APP ---
+def test_leaderboard_is_refetched_after_a_write(app):
+    client = app.app.test_client()
+    first = client.get('/leaderboard')
+    assert first.get_json()['data'] == []
+    assert client.get('/leaderboard', headers={'If-None-Match': first.headers['ETag']}).status_code == 304
+
+    record = {'usn': '1DB23CS001', 'name': 'A', 'subjects': [{'code': 'BCS501', 'name': 'SE', 'total': 90, 'result': 'P'}]}
+    assert client.post('/submit_result', json=record, headers=SUBMIT_HEADERS).status_code == 200
+    after = client.get('/leaderboard', headers={'If-None-Match': first.headers['ETag']})
+    assert after.status_code == 200 and after.get_json()['data'][0]['usn'] == '1DB23CS001'
@@ -0,0 +1,113 @@
+"""
+ResultCache (the /fetch_result cache of stored results) and how run_app
+uses it: only results fetched from VTU are served from the cache.
+The app tests need MongoDB (see conftest.py).
+"""
+
+import os
+from datetime import datetime, timezone
+from result_cache import ResultCache
+from students import EXAM_SESSION
+
+SUBMIT_HEADERS = {'X-Submit-Token': os.environ.get('SUBMIT_TOKEN', '')}
+
+
+class StoredResults:
+    """The one students_col call ResultCache.lookup makes on a miss."""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.finds = 0
+
+    def find_one(self, query, projection=None, sort=None):
+        self.finds += 1
+        matches = [dict(d) for d in self.docs if all(d.get(k) == v for k, v in query.items())]
+        matches.sort(key=lambda d: d.get('semester', 0), reverse=True)
+        return matches[0] if matches else None
+
+
+def stored(usn, source='vtu', semester=5, **fields):
+    return {'usn': usn, 'exam_session': EXAM_SESSION, 'semester': semester, 'name': 'A',
+            'fetched_at': datetime(2026, 1, 1, tzinfo=timezone.utc), 'source': source, **fields}
+
+
+def test_lookup_reads_through_once():
+    col = StoredResults([stored('1DB23CS001')])
+    cache = ResultCache()
+    data, fetched_at = cache.lookup('1DB23CS001', col)
+    assert data['name'] == 'A' and 'source' not in data
+    assert fetched_at == datetime(2026, 1, 1, tzinfo=timezone.utc).timestamp()
+    cache.lookup('1DB23CS001', col)
+    assert col.finds == 1 and cache.hits == 1 and cache.misses == 1
+
+
+def test_lookup_serves_latest_semester():
+    col = StoredResults([stored('1DB23CS001', semester=4, name='OLD'), stored('1DB23CS001', semester=5, name='NEW')])
+    assert ResultCache().lookup('1DB23CS001', col)[0]['name'] == 'NEW'
+
+
+def test_lookup_skips_results_not_fetched_from_vtu():
+    col = StoredResults([stored('1DB23CS001', source='upload'), stored('1DB23CS002', source=None)])
+    cache = ResultCache()
+    assert cache.lookup('1DB23CS001', col) is None
+    assert cache.lookup('1DB23CS002', col) is None
+    assert cache.stats()['entries'] == 0
+
+
+def test_put_keeps_newest_and_ignores_other_sessions():
+    cache = ResultCache(session=EXAM_SESSION)
+    cache.put({'usn': '1DB23CS001', 'exam_session': EXAM_SESSION, 'name': 'NEW'}, 200.0)
+    cache.put({'usn': '1DB23CS001', 'exam_session': EXAM_SESSION, 'name': 'OLD'}, 100.0)
+    cache.put({'usn': '1DB23CS001', 'exam_session': 'OTHER', 'name': 'OTHER'}, 300.0)
+    assert cache.lookup('1DB23CS001', StoredResults([]))[0]['name'] == 'NEW'
+    cache.discard('1DB23CS001')
+    assert cache.lookup('1DB23CS001', StoredResults([])) is None
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ResultCache(max_entries=2)
+    for usn in ('1DB23CS001', '1DB23CS002'):
+        cache.put({'usn': usn, 'exam_session': EXAM_SESSION}, 1.0)
+    cache.lookup('1DB23CS001', StoredResults([]))
+    cache.put({'usn': '1DB23CS003', 'exam_session': EXAM_SESSION}, 1.0)
+    assert cache.lookup('1DB23CS002', StoredResults([])) is None
+    assert cache.lookup('1DB23CS001', StoredResults([])) is not None
+
+
+def test_freshness():
+    cache = ResultCache(fresh_for=60)
+    assert cache.is_fresh(1000.0, now=1059.0)
+    assert not cache.is_fresh(1000.0, now=1060.0)
+    assert not cache.is_fresh(None)
+    assert ResultCache(fresh_for=0).is_fresh(1000.0, now=1000.0) is False
+
+
+def test_refresh_is_claimed_once():
+    cache = ResultCache()
+    assert cache.begin_refresh('1DB23CS001')
+    assert not cache.begin_refresh('1DB23CS001')
+    cache.end_refresh('1DB23CS001')
+    assert cache.begin_refresh('1DB23CS001')
+
+
+# --- APP ---
+def test_fetched_result_is_served_from_cache(app):
+    app.record_student({'usn': '1DB23CS001', 'name': 'A', 'total_marks': 700, 'sgpa': '8.00', 'sgpa_float': 8.0,
+                        'subjects': [{'code': 'BCS501', 'name': 'SE', 'total': 90, 'result': 'P'}]})
+    body = app.app.test_client().post('/fetch_result', data={'usn': '1DB23CS001', 'captcha': 'X'}).get_json()
+    assert body['status'] == 'success'
+    assert body['cached'] and not body['stale']
+    assert 'source' not in body['data'] and 'page_digest' not in body['data']
+
+
+def test_uploaded_result_is_not_served_from_cache(app):
+    client = app.app.test_client()
+    app.record_student({'usn': '1DB23CS001', 'name': 'A', 'total_marks': 700, 'sgpa': '8.00', 'sgpa_float': 8.0,
+                        'subjects': [{'code': 'BCS501', 'name': 'SE', 'total': 90, 'result': 'P'}]})
+    upload = [{'usn': '1DB23CS001', 'name': 'A', 'subjects': [{'code': 'BCS501', 'name': 'SE', 'total': 95, 'result': 'P'}]},
+              {'usn': '1DB23CS002', 'name': 'B', 'total_marks': 650}]
+    assert client.post('/submit_result', json=upload, headers=SUBMIT_HEADERS).get_json()['status'] == 'success'
+    # No captcha session: a cache miss has to go to VTU and is refused.
+    for usn in ('1DB23CS001', '1DB23CS002'):
+        body = client.post('/fetch_result', data={'usn': usn, 'captcha': 'X'}).get_json()
+        assert body['status'] == 'error' and 'Reload Captcha' in body['message']
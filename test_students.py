@@ -0,0 +1,76 @@
+"""
+Results keyed by (usn, exam_session, semester) and the per-USN in-memory
+views built over them. The app tests need MongoDB (see conftest.py).
+"""
+
+import os
+from distribution import Distribution
+from leaderboard import Leaderboard
+from rank_service import RankService
+from students import EXAM_SESSION, result_key, stamp_session, superseded
+
+SUBMIT_HEADERS = {'X-Submit-Token': os.environ.get('SUBMIT_TOKEN', '')}
+
+
+def test_stamp_session_fills_missing_keys_only():
+    student = stamp_session({'usn': '1DB23CS001'})
+    assert student['exam_session'] == EXAM_SESSION and student['semester'] == 5
+    student = stamp_session({'usn': '1DB23CS001', 'exam_session': 'J25', 'semester': 4})
+    assert result_key(student) == {'usn': '1DB23CS001', 'exam_session': 'J25', 'semester': 4}
+
+
+def test_superseded():
+    held = {'1DB23CS001': 5}
+    assert superseded({'usn': '1DB23CS001', 'semester': 4}, held)
+    assert not superseded({'usn': '1DB23CS001', 'semester': 5}, held)
+    assert not superseded({'usn': '1DB23CS001', 'semester': 6}, held)
+    assert not superseded({'usn': '1DB23CS002', 'semester': 1}, held)
+
+
+def test_views_keep_latest_semester_whatever_the_order(result, students):
+    for docs in ([result('1DB23CS001', 500, 4), result('1DB23CS001', 700, 5)],
+                 [result('1DB23CS001', 700, 5), result('1DB23CS001', 500, 4)]):
+        leaderboard, distribution, ranks = Leaderboard(), Distribution(), RankService()
+        for view in (leaderboard, distribution, ranks):
+            view.load(students(docs + [result('1DB23CS002', 600, 5)]))
+        assert len(leaderboard) == 2
+        assert leaderboard.page()[0][0]['total_marks'] == 700
+        assert distribution.snapshot()['total'] == 2
+        assert ranks.ranks('1DB23CS001')['uni_rank'] == 1
+
+
+def test_upsert_of_earlier_semester_is_ignored(result, students):
+    leaderboard, distribution, ranks = Leaderboard(), Distribution(), RankService()
+    for view in (leaderboard, distribution, ranks):
+        view.load(students([result('1DB23CS001', 700, 5), result('1DB23CS002', 600, 5)]))
+    assert leaderboard.upsert(result('1DB23CS001', 100, 4)) is None
+    distribution.upsert(result('1DB23CS001', 100, 4))
+    ranks.upsert(result('1DB23CS001', 100, 4))
+    assert leaderboard.rank_of('1DB23CS001') == 1
+    assert ranks.ranks('1DB23CS001')['uni_rank'] == 1
+    assert distribution.snapshot()['total'] == 2
+
+    delta = leaderboard.upsert(result('1DB23CS001', 550, 6))
+    assert delta['rank'] == 2 and delta['old_rank'] == 1
+
+
+def test_views_ignore_other_sessions(result, students):
+    leaderboard = Leaderboard()
+    leaderboard.load(students([result('1DB23CS001', 700, 5), result('1DB23CS002', 600, 5, session='J25')]))
+    assert len(leaderboard) == 1
+    assert leaderboard.upsert(result('1DB23CS003', 650, 5, session='J25')) is None
+
+
+# --- APP ---
+def test_upload_keeps_both_semesters_of_a_usn(app):
+    subjects = [{'code': 'BCS501', 'name': 'SE', 'total': 90, 'result': 'P'}]
+    upload = [{'usn': '1DB23CS001', 'name': 'A', 'semester': 4, 'subjects': subjects},
+              {'usn': '1DB23CS001', 'name': 'A', 'semester': 5, 'subjects': subjects},
+              {'usn': '1DB23CS001', 'name': 'B', 'semester': 5, 'subjects': subjects}]
+    client = app.app.test_client()
+    body = client.post('/submit_result', json=upload, headers=SUBMIT_HEADERS).get_json()
+    assert body['accepted'] == 2 and body['upserted'] == 2
+    stored = {doc['semester']: doc['name'] for doc in app.students_col.find({'usn': '1DB23CS001'})}
+    assert stored == {4: 'A', 5: 'B'}
+    rows = client.get('/leaderboard').get_json()['data']
+    assert [row['name'] for row in rows] == ['B']
@@ -0,0 +1,73 @@
+"""
+VTUHttpEngine (vtu_http.py) against the offline fake VTU in bench/fake_vtu.py.
+"""
+
+import os
+import sys
+import threading
+import pytest
+import vtu_http
+from result_detector import PhaseTimer
+from result_parser import parse_result_page
+from vtu_http import VTUHttpEngine, find_alert
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench'))
+from fake_vtu import CAPTCHA_PNG, CAPTCHA_TEXT, serve
+
+USN = '1DB23CS001'
+
+
+@pytest.fixture(scope='module')
+def fake_vtu():
+    """The fake VTU on a free port, serving golden/result_pass.html for every USN."""
+    server = serve(port=0, seed=None)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/index.php"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def engine(fake_vtu, monkeypatch):
+    monkeypatch.setattr(vtu_http, 'VTU_URL', fake_vtu)
+    return VTUHttpEngine()
+
+
+def test_get_captcha_opens_a_session(engine, fake_vtu):
+    image, content_type = engine.get_captcha('t1')
+    assert image == CAPTCHA_PNG and content_type == 'image/png'
+    assert engine.session_count() == 1
+    entry = engine._sessions['t1']
+    assert entry['form_token'] and entry['action'].startswith(fake_vtu.rsplit('/', 1)[0])
+    assert entry['http'].cookies.get('PHPSESSID')
+
+
+def test_submit_returns_the_result_page(engine):
+    engine.get_captcha('t1')
+    outcome, html = engine.submit('t1', USN, CAPTCHA_TEXT, PhaseTimer())
+    assert outcome == 'page'
+    assert parse_result_page(html, USN)['name'] == "ASTITVA RAJ"
+    engine.release('t1')
+    assert engine.session_count() == 0
+
+
+def test_wrong_captcha_is_an_alert(engine):
+    engine.get_captcha('t1')
+    assert engine.submit('t1', USN, 'WRONG', PhaseTimer()) == ('alert', "Invalid captcha code !!!")
+
+
+def test_submit_without_captcha_is_expired(engine):
+    assert engine.submit('nobody', USN, CAPTCHA_TEXT, PhaseTimer()) == ('expired', None)
+
+
+def test_idle_sessions_are_reclaimed(engine):
+    engine.idle_timeout = -1
+    engine.get_captcha('t1')
+    engine.get_captcha('t2')   # reclaims t1, idle for "too long"
+    assert engine.session_count() == 1 and 't2' in engine._sessions
+
+
+def test_find_alert():
+    assert find_alert("<script>alert( 'University Seat Number is not available' );</script>") == \
+        "University Seat Number is not available"
+    assert find_alert("<html>no alert</html>") is None
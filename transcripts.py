@@ -0,0 +1,44 @@
+from pymongo import UpdateOne
+from grading import load_scheme, scheme_name_for
+
+# transcripts: one document per USN holding each semester's SGPA and credits,
+#   {'_id': usn, 'semesters': {'5': {'sgpa': 8.52, 'credits': 21, 'exam_session': ...}}}
+# so CGPA is updated from a handful of numbers instead of re-reading every stored result.
+
+
+def semester_credits(student):
+    """Credits behind a result's SGPA (0 for summary-only uploads)."""
+    scheme = load_scheme(scheme_name_for(student['usn'], student.get('semester')))
+    return sum(scheme.credits(sub['code']) for sub in student.get('subjects') or [])
+
+
+def cgpa_of(semesters):
+    """Credit-weighted mean of the per-semester SGPAs, or None without credits."""
+    credits = sum(s['credits'] for s in semesters.values())
+    if not credits: return None
+    return sum(s['sgpa'] * s['credits'] for s in semesters.values()) / credits
+
+
+def cgpa_fields(value):
+    if value is None: return {}
+    return {'cgpa': "{:.2f}".format(value), 'cgpa_float': value}
+
+
+def record_transcripts(transcripts_col, students):
+    """Add each result's semester to its student's transcript.
+
+    Returns {usn: {'cgpa', 'cgpa_float'}} for every student with credits on
+    record. A later result for the same semester (a revaluation or a
+    makeup exam) replaces the earlier one.
+    """
+    ops = []
+    for s in students:
+        credits = semester_credits(s)
+        if not credits or s.get('semester') is None: continue
+        entry = {'sgpa': s.get('sgpa_float', 0.0), 'credits': credits, 'exam_session': s.get('exam_session')}
+        ops.append(UpdateOne({'_id': s['usn']}, {'$set': {f"semesters.{s['semester']}": entry}}, upsert=True))
+    if ops:
+        transcripts_col.bulk_write(ops, ordered=False)
+    usns = list({s['usn'] for s in students})
+    return {doc['_id']: cgpa_fields(cgpa_of(doc.get('semesters', {})))
+            for doc in transcripts_col.find({'_id': {'$in': usns}}, {'semesters': 1})}
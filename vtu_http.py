@@ -0,0 +1,122 @@
+import os
+import re
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib.parse import urljoin
+from students import EXAM_SESSION
+
+# --- CONFIG ---
+VTU_URL = os.environ.get('VTU_URL', f'https://results.vtu.ac.in/{EXAM_SESSION}/index.php')
+SESSION_IDLE_TIMEOUT = int(os.environ.get('HTTP_SESSION_IDLE_TIMEOUT', 180))
+HTTP_TIMEOUT = 15
+USER_AGENT = ("Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+              "(KHTML, like Gecko) Chrome/124.0 Safari/537.36")
+
+FORM_RE = re.compile(r'<form[^>]*action="([^"]+)"', re.I)
+TOKEN_RE = re.compile(r'<input[^>]*name="Token"[^>]*value="([^"]*)"|<input[^>]*value="([^"]*)"[^>]*name="Token"', re.I)
+CAPTCHA_RE = re.compile(r'<img[^>]*src="([^"]*captcha[^"]*)"', re.I)
+ALERT_RE = re.compile(r"alert\(\s*['\"](.*?)['\"]\s*\)", re.S)
+
+
+class VTUPageError(Exception):
+    pass
+
+
+def find_alert(html):
+    m = ALERT_RE.search(html)
+    return m.group(1).strip() if m else None
+
+
+class VTUHttpEngine:
+    """Fetches VTU results with plain HTTP: index.php, the captcha image and one POST.
+
+    Each client token gets its own requests.Session (VTU ties the captcha to
+    the PHP session cookie), but all sessions share one keep-alive adapter.
+    """
+
+    name = 'http'
+
+    def __init__(self, idle_timeout=SESSION_IDLE_TIMEOUT):
+        self.idle_timeout = idle_timeout
+        self._adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+        self._lock = threading.Lock()
+        self._sessions = {}   # token -> {'http', 'action', 'form_token', 'last_used'}
+
+    def _new_session(self):
+        http = requests.Session()
+        http.mount('https://', self._adapter)
+        http.mount('http://', self._adapter)
+        http.headers['User-Agent'] = USER_AGENT
+        return http
+
+    def _reclaim_locked(self, now):
+        for token, entry in list(self._sessions.items()):
+            if now - entry['last_used'] > self.idle_timeout:
+                del self._sessions[token]
+
+    def get_captcha(self, token):
+        with self._lock:
+            self._reclaim_locked(time.monotonic())
+            entry = self._sessions.get(token)
+        http = entry['http'] if entry else self._new_session()
+
+        page = http.get(VTU_URL, timeout=HTTP_TIMEOUT)
+        page.raise_for_status()
+        html = page.text
+
+        captcha = CAPTCHA_RE.search(html)
+        if not captcha:
+            raise VTUPageError("Captcha image not found on VTU page")
+        form = FORM_RE.search(html)
+        form_token = TOKEN_RE.search(html)
+
+        # VTU double-escapes the ampersand in the captcha URL.
+        captcha_url = urljoin(page.url, captcha.group(1).replace('&amp;', '&'))
+        img = http.get(captcha_url, timeout=HTTP_TIMEOUT, headers={'Referer': page.url})
+        img.raise_for_status()
+
+        with self._lock:
+            self._sessions[token] = {
+                'http': http,
+                'action': urljoin(page.url, form.group(1) if form else 'resultpage.php'),
+                'referer': page.url,
+                'form_token': (form_token.group(1) or form_token.group(2)) if form_token else None,
+                'last_used': time.monotonic(),
+            }
+        return img.content, img.headers.get('Content-Type', 'image/png')
+
+    def submit(self, token, usn, captcha_text, timer):
+        """Submit the form; returns ('page', html), ('alert', text), ('timeout', None) or ('expired', None)."""
+        with self._lock:
+            entry = self._sessions.get(token)
+        if entry is None:
+            return ('expired', None)
+        timer.mark('navigate')
+
+        form = {'lns': usn, 'captchacode': captcha_text}
+        if entry['form_token'] is not None:
+            form['Token'] = entry['form_token']
+        try:
+            resp = entry['http'].post(entry['action'], data=form, timeout=HTTP_TIMEOUT,
+                                      headers={'Referer': entry['referer']})
+        except requests.Timeout:
+            timer.mark('submit')
+            return ('timeout', None)
+        timer.mark('submit')
+
+        html = resp.text
+        alert = find_alert(html)
+        if alert and "Student Name" not in html:
+            return ('alert', alert)
+        return ('page', html)
+
+    def release(self, token):
+        # The captcha is single-use; drop the session and its cookies.
+        with self._lock:
+            self._sessions.pop(token, None)
+
+    def session_count(self):
+        with self._lock:
+            return len(self._sessions)
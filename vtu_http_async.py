@@ -0,0 +1,112 @@
+import time
+import asyncio
+import httpx
+from urllib.parse import urljoin
+from vtu_http import (VTU_URL, SESSION_IDLE_TIMEOUT, HTTP_TIMEOUT, USER_AGENT,
+                      FORM_RE, TOKEN_RE, CAPTCHA_RE, VTUPageError, find_alert)
+
+
+class AsyncVTUHttpEngine:
+    """VTUHttpEngine for asyncio: the same index.php / captcha / POST exchange over httpx.
+
+    Each client token gets its own AsyncClient (for the PHP session cookie);
+    all of them share one connection pool, so an in-flight exchange costs a
+    socket and a coroutine, not a thread.
+    """
+
+    name = 'http'
+
+    def __init__(self, idle_timeout=SESSION_IDLE_TIMEOUT, max_connections=64):
+        self.idle_timeout = idle_timeout
+        self._transport = httpx.AsyncHTTPTransport(limits=httpx.Limits(max_connections=max_connections,
+                                                                         max_keepalive_connections=32))
+        self._sessions = {}   # token -> {'http', 'action', 'referer', 'form_token', 'last_used'}
+
+    def _new_client(self):
+        # Clients are only dropped, never closed: closing one would close the shared transport.
+        return httpx.AsyncClient(transport=self._transport, timeout=HTTP_TIMEOUT,
+                                 headers={'User-Agent': USER_AGENT}, follow_redirects=True)
+
+    def _reclaim(self, now):
+        for token, entry in list(self._sessions.items()):
+            if now - entry['last_used'] > self.idle_timeout:
+                del self._sessions[token]
+
+    async def get_captcha(self, token):
+        self._reclaim(time.monotonic())
+        entry = self._sessions.get(token)
+        http = entry['http'] if entry else self._new_client()
+
+        page = await http.get(VTU_URL)
+        page.raise_for_status()
+        html = page.text
+
+        captcha = CAPTCHA_RE.search(html)
+        if not captcha:
+            raise VTUPageError("Captcha image not found on VTU page")
+        form = FORM_RE.search(html)
+        form_token = TOKEN_RE.search(html)
+
+        page_url = str(page.url)
+        captcha_url = urljoin(page_url, captcha.group(1).replace('&amp;', '&'))
+        img = await http.get(captcha_url, headers={'Referer': page_url})
+        img.raise_for_status()
+
+        self._sessions[token] = {
+            'http': http,
+            'action': urljoin(page_url, form.group(1) if form else 'resultpage.php'),
+            'referer': page_url,
+            'form_token': (form_token.group(1) or form_token.group(2)) if form_token else None,
+            'last_used': time.monotonic(),
+        }
+        return img.content, img.headers.get('Content-Type', 'image/png')
+
+    async def submit(self, token, usn, captcha_text, timer):
+        """Submit the form; returns ('page', html), ('alert', text), ('timeout', None) or ('expired', None)."""
+        entry = self._sessions.get(token)
+        if entry is None:
+            return ('expired', None)
+        timer.mark('navigate')
+
+        form = {'lns': usn, 'captchacode': captcha_text}
+        if entry['form_token'] is not None:
+            form['Token'] = entry['form_token']
+        try:
+            resp = await entry['http'].post(entry['action'], data=form, headers={'Referer': entry['referer']})
+        except httpx.TimeoutException:
+            timer.mark('submit')
+            return ('timeout', None)
+        timer.mark('submit')
+
+        html = resp.text
+        alert = find_alert(html)
+        if alert and "Student Name" not in html:
+            return ('alert', alert)
+        return ('page', html)
+
+    async def release(self, token):
+        self._sessions.pop(token, None)
+
+    async def close(self):
+        self._sessions.clear()
+        await self._transport.aclose()
+
+
+class ThreadedEngine:
+    """Runs a blocking engine (SeleniumEngine) behind the async interface via worker threads."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.name = engine.name
+
+    async def get_captcha(self, token):
+        return await asyncio.to_thread(self.engine.get_captcha, token)
+
+    async def submit(self, token, usn, captcha_text, timer):
+        return await asyncio.to_thread(self.engine.submit, token, usn, captcha_text, timer)
+
+    async def release(self, token):
+        await asyncio.to_thread(self.engine.release, token)
+
+    async def close(self):
+        pass
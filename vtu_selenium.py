@@ -0,0 +1,85 @@
+import threading
+from browser_pool import BrowserPool, kill_stale_drivers
+from result_detector import wait_for_result, wait_for_image
+from vtu_http import VTU_URL
+
+
+def _selenium():
+    # Imported on the first Chromium fetch, not when the app starts.
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+    from selenium.webdriver.support import expected_conditions as EC
+    return By, WebDriverWait, EC
+
+
+class SeleniumEngine:
+    """Fetches VTU results by driving a pooled headless Chromium per client token."""
+
+    name = 'selenium'
+
+    def __init__(self):
+        self._pool = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def pool(self):
+        # Chromium is only started once this engine is actually used; the lock keeps
+        # concurrent first requests from each creating a pool (and killing the other's drivers).
+        if self._pool is None:
+            with self._pool_lock:
+                if self._pool is None:
+                    kill_stale_drivers()
+                    pool = BrowserPool()
+                    pool.start_reaper()
+                    self._pool = pool
+        return self._pool
+
+    def get_captcha(self, token):
+        By, WebDriverWait, EC = _selenium()
+        driver = self.pool.lease(token)
+        try:
+            driver.get(VTU_URL)
+        except:
+            self.pool.discard(token)
+            driver = self.pool.lease(token)
+            driver.get(VTU_URL)
+
+        wait = WebDriverWait(driver, 15)
+        captcha_img = wait.until(EC.presence_of_element_located((By.XPATH, "//img[contains(@src, 'captcha')]")))
+        driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", captcha_img)
+        wait_for_image(driver, captcha_img)
+        return captcha_img.screenshot_as_png, 'image/png'
+
+    def submit(self, token, usn, captcha_text, timer):
+        """Submit the form; returns ('page', html), ('alert', text), ('timeout', None) or ('expired', None)."""
+        By, WebDriverWait, EC = _selenium()
+        driver = self.pool.get(token)
+        if driver is None:
+            return ('expired', None)
+
+        if "results.vtu.ac.in" not in driver.current_url:
+            driver.get(VTU_URL)
+        timer.mark('navigate')
+
+        wait = WebDriverWait(driver, 15)
+
+        wait.until(EC.presence_of_element_located((By.NAME, "lns"))).send_keys(usn)
+        wait.until(EC.presence_of_element_located((By.NAME, "captchacode"))).send_keys(captcha_text)
+
+        submit_btn = wait.until(EC.element_to_be_clickable((By.XPATH, "//input[@type='submit']")))
+        handles_before = len(driver.window_handles)
+        driver.execute_script("arguments[0].click();", submit_btn)
+        timer.mark('submit')
+
+        outcome, alert_text = wait_for_result(driver, handles_before, timer=timer)
+        if outcome == 'page':
+            return ('page', driver.page_source)
+        return (outcome, alert_text)
+
+    def release(self, token):
+        if self._pool is not None:
+            self._pool.release(token)
+
+    def pool_stats(self):
+        """Browser pool stats, or None before Chromium was first used."""
+        return self._pool.stats() if self._pool is not None else None